@@ -1,16 +1,44 @@
+import os
 from flask import Flask
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
-from .config import Config
-from .db import init_db
+from flask_mail import Mail
+from werkzeug.middleware.proxy_fix import ProxyFix
+from .config import config
+from .db import init_db, create_tables
+from .middleware.compression import init_compression
 from .middleware.error_handler import register_error_handlers
 from .middleware.rate_limiting import init_rate_limiter
+from .middleware.request_metrics import init_request_metrics
+from .routes import register_blueprints
+from .utils.json_provider import FastJSONProvider
+from .utils.structured_logging import init_logging
+from .utils.response_cache import init_response_cache
+from .utils.unit_of_work import init_unit_of_work
 
 def create_app(config_name=None):
-    """Create and configure Flask app"""
+    """Application factory pattern"""
+    
+    # Determine configuration
+    if config_name is None:
+        config_name = os.environ.get('FLASK_ENV', 'development')
+    
+    # Create Flask app
     app = Flask(__name__)
-    app.config.from_object(Config)
+    
+    # Load configuration
+    app.config.from_object(config[config_name])
+
+    # request.remote_addr is the client, not the proxy, for rate limits and login throttling
+    proxies = app.config.get('PROXY_FIX_X_FOR', 0)
+    if proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+
+    # Before anything logs, so Flask never installs its blocking default handler
+    init_logging(app)
 
+    # orjson-backed jsonify() when it is installed
+    app.json = FastJSONProvider(app)
+    
     # Configure CORS - single source of truth
     CORS(
         app,
@@ -18,43 +46,59 @@ def create_app(config_name=None):
             "https://makeja-csu3.vercel.app",    # old URL
             "https://makeja-kappa.vercel.app"    # new URL
         ],
-        methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
         allow_headers=["Content-Type", "Authorization"],
         supports_credentials=True
     )
+  
+    # Initialize extensions (database, migrations and JWT)
+    init_db(app)
+    
+    # Initialize mail
+    mail = Mail()
+    mail.init_app(app)
+
+    # Initialize middleware (after_request hooks run in reverse, so compression runs last)
+    init_compression(app)
+    init_rate_limiter(app)
+    register_error_handlers(app)
+    init_request_metrics(app)
+    init_response_cache(app)
+    init_unit_of_work(app)
 
-    # Initialize extensions
-    try:
-        init_db(app)
-        jwt = JWTManager(app)
-        print("Extensions initialized successfully")
-    except Exception as e:
-        print(f"Extensions error: {e}")
-    
-    # Initialize middleware
-    try:
-        init_rate_limiter(app)
-        register_error_handlers(app)
-        print("Middleware initialized successfully")
-    except Exception as e:
-        print(f"Middleware error: {e}")
-    
-    # Register blueprints
-    try:
-        from .routes.auth import auth_bp
-        app.register_blueprint(auth_bp, url_prefix='/api/auth')
-        print("Auth blueprint registered successfully")
-    except Exception as e:
-        print(f"Auth blueprint error: {e}")
+    # Register the blueprints listed in app/routes/__init__.py
+    register_blueprints(app)
     
     # Health check endpoint
     @app.route('/api/health')
     def health_check():
-        return {'status': 'healthy'}, 200
+        return {'status': 'healthy', 'environment': config_name}, 200
     
     # Root endpoint
     @app.route('/')
-    def home():
-        return {'message': 'Flask app is running'}, 200
+    def index():
+        return {
+            'message': 'Welcome to Makeja Backend API',
+            'version': '1.0.0',
+            'environment': config_name,
+            'endpoints': {
+                'auth': '/api/auth',
+                'users': '/api/users',
+                'hostels': '/api/hostels',
+                'bookings': '/api/bookings',
+                'payments': '/api/payments',
+                'reviews': '/api/reviews',
+                'admin': '/api/admin',
+                'health': '/api/health'
+            }
+        }, 200
+    
+    # Schema changes belong to migrations (flask db upgrade); only the
+    # development config creates missing tables on start
+    if app.config.get('AUTO_CREATE_TABLES'):
+        create_tables(app)
+
+    # The user search indexes are warmed by gunicorn.conf.py, not here, so
+    # CLI commands such as `flask db upgrade` never query the users table
     
-    return app
\ No newline at end of file
+    return app
@@ -1,11 +1,15 @@
+import logging
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager  
+from app.utils.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()  
 
+logger = logging.getLogger(__name__)
+
 
 def init_db(app):
     """Initialize database with app"""
@@ -13,36 +17,13 @@ def init_db(app):
     migrate.init_app(app, db)
     jwt.init_app(app)  
 
-   
-    try:
-        from app.models.user import User
-        print("User model loaded")
-    except ImportError:
-        print("User model not found")
-
-    try:
-        from app.models.hostel import Hostel
-        print("Hostel model loaded")
-    except ImportError:
-        print("Hostel model not found")
-
-    try:
-        from app.models.booking import Booking
-        print("Booking model loaded")
-    except ImportError:
-        print("Booking model not found")
-
-    try:
-        from app.models.payment import Payment
-        print("Payment model loaded")
-    except ImportError:
-        print("Payment model not found")
-
-    try:
-        from app.models.review import Review
-        print("Review model loaded")
-    except ImportError:
-        print("Review model not found")
+    # Import every model once so relationships and create_all see all tables
+    from app import models  # noqa: F401
+
+    @app.cli.command('create-tables')
+    def create_tables_command():
+        """Create missing tables without running migrations."""
+        create_tables()
 
     return db
 
@@ -51,7 +32,6 @@ def create_tables(app=None):
     if app:
         with app.app_context():
             db.create_all()
-            print("Database tables created successfully")
     else:
         db.create_all()
-        print("Database tables created successfully")
\ No newline at end of file
+    logger.info("Database tables created", extra={'event': 'tables_created'})
\ No newline at end of file
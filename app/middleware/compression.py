@@ -0,0 +1,72 @@
+"""
+Response compression.
+
+JSON and text responses of at least COMPRESS_MIN_SIZE bytes are compressed
+with brotli (when the brotli package is installed) or gzip, whichever the
+client prefers per Accept-Encoding. Smaller bodies are left alone, since
+compressing them saves too little to pay for the CPU, as are files sent
+with send_file (images are already compressed) and streamed bodies.
+"""
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/csv',
+})
+
+
+def choose_encoding(accept_encodings):
+    """Best encoding we support out of the request's Accept-Encoding, or None."""
+    candidates = ('br', 'gzip') if brotli is not None else ('gzip',)
+    return accept_encodings.best_match(candidates)
+
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config.get('COMPRESS_BROTLI_QUALITY', 4))
+    return gzip.compress(data, compresslevel=config.get('COMPRESS_LEVEL', 6), mtime=0)
+
+
+def init_compression(app):
+    """Compress eligible responses after every request."""
+    if not app.config.get('COMPRESSION_ENABLED', True):
+        return
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300
+        ):
+            return response
+
+        min_size = app.config.get('COMPRESS_MIN_SIZE', 1024)
+        if (response.content_length or 0) < min_size:
+            return response
+
+        # The body depends on Accept-Encoding from here on, compressed or not
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.set_data(compress(response.get_data(), encoding, app.config))
+        response.headers['Content-Encoding'] = encoding
+        # A strong validator must differ per encoding; weak ones may be shared
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f"{etag}-{encoding}")
+        return response
@@ -0,0 +1,111 @@
+"""
+Rate limit storage shared by every worker on a host.
+
+Importing this module registers the ``sqlite://`` scheme with the limits
+library, so ``RATELIMIT_STORAGE_URI = "sqlite:////var/tmp/makeja_ratelimit.db"``
+makes all gunicorn workers count against one WAL-mode SQLite file instead of
+keeping per-process ``memory://`` counters. Use ``redis://`` for limits shared
+across hosts (requires the redis package).
+"""
+import os
+import sqlite3
+import threading
+import time
+from limits.storage import Storage
+
+
+class SQLiteStorage(Storage):
+    """Fixed-window counters in a SQLite database in WAL mode."""
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    # Expired rows are swept once every this many increments
+    EVICT_EVERY = 1000
+
+    def __init__(self, uri=None, wrap_exceptions=False, timeout=5.0, **options):
+        # Same convention as SQLAlchemy: sqlite:///relative.db, sqlite:////absolute.db
+        path = uri.split("://", 1)[1] if uri and "://" in uri else ""
+        self.path = (path[1:] if path.startswith("/") else path) or ":memory:"
+        self.timeout = float(timeout)
+        self._local = threading.local()
+        self._increments = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self._connection()
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        # Connections are per thread and must not survive a fork
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT INTO rate_limits (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "value = CASE WHEN expires_at <= ? THEN excluded.value ELSE value + excluded.value END, "
+                "expires_at = CASE WHEN expires_at <= ? OR ? THEN excluded.expires_at ELSE expires_at END",
+                (key, amount, now + expiry, now, now, int(elastic_expiry))
+            )
+            value = connection.execute(
+                "SELECT value FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()[0]
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+        self._increments += 1
+        if self._increments % self.EVICT_EVERY == 0:
+            self.evict_expired()
+        return value
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM rate_limits WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._connection().execute(
+            "SELECT expires_at FROM rate_limits WHERE key = ?", (key,)
+        ).fetchone()
+        return int(row[0]) if row else int(time.time())
+
+    def check(self):
+        try:
+            self._connection().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        cursor = self._connection().execute("DELETE FROM rate_limits")
+        return cursor.rowcount
+
+    def clear(self, key):
+        self._connection().execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+    def evict_expired(self):
+        cursor = self._connection().execute(
+            "DELETE FROM rate_limits WHERE expires_at <= ?", (time.time(),)
+        )
+        return cursor.rowcount
@@ -1,16 +1,23 @@
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask import jsonify
+from app.middleware import rate_limit_storage  # noqa: F401 - registers sqlite://
 
 
 def init_rate_limiter(app):
+    # memory:// counts per worker; use sqlite:// (one host) or redis:// (many)
+    # so every worker shares the same counters
     limiter = Limiter(
         get_remote_address,
         app=app,
         default_limits=[app.config.get("RATE_LIMIT_DEFAULT")],
-        storage_uri="memory://"
+        storage_uri=app.config.get("RATELIMIT_STORAGE_URI", "memory://"),
+        storage_options=app.config.get("RATELIMIT_STORAGE_OPTIONS", {})
     )
 
+    # rate_limit_by_ip() keeps its sliding-window counters in the same storage
+    app.extensions["rate_limit_storage"] = limiter.storage
+
     @limiter.request_filter
     def exempt_health_checks():
         return False
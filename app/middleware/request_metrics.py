@@ -0,0 +1,181 @@
+"""
+Per-endpoint request timing and SQL statement counts.
+
+Every request is timed and every SQL statement run while it is active is
+counted and timed through engine events. Totals are kept per endpoint
+("GET /api/admin/bookings") with a latency histogram, and requests slower
+than SLOW_REQUEST_MS or issuing more than SLOW_REQUEST_QUERY_COUNT
+statements are logged. The snapshot is served at /api/admin/metrics.
+
+Figures at /api/admin/metrics are per worker process. Request counts,
+latencies and pool usage are also written to the shared Prometheus metrics
+served at /metrics.
+"""
+import bisect
+import threading
+import time
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utils.db_pool import export_pool_gauges
+from app.utils.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+# Upper bounds of the latency histogram buckets in milliseconds
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+# Pool gauges are refreshed at most this often per process
+POOL_GAUGE_INTERVAL_SECONDS = 1.0
+_pool_gauges_updated_at = [0.0]
+
+
+class EndpointStats:
+    """Latency histogram and SQL totals for one endpoint."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS_MS)
+        self.queries = 0
+        self.max_queries = 0
+        self.query_ms = 0.0
+
+    def record(self, duration_ms, status_code, queries, query_ms):
+        self.count += 1
+        if status_code >= 500:
+            self.errors += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+        self.queries += queries
+        self.max_queries = max(self.max_queries, queries)
+        self.query_ms += query_ms
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of requests."""
+        rank = fraction * self.count
+        seen = 0
+        for bound, hits in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += hits
+            if seen >= rank:
+                return bound if bound != float('inf') else round(self.max_ms, 3)
+        return round(self.max_ms, 3)
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / self.count, 3),
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'total_ms': round(self.total_ms, 3),
+            'histogram': {
+                ('+Inf' if bound == float('inf') else str(bound)): hits
+                for bound, hits in zip(LATENCY_BUCKETS_MS, self.buckets)
+            },
+            'queries_avg': round(self.queries / self.count, 2),
+            'queries_max': self.max_queries,
+            'query_ms_avg': round(self.query_ms / self.count, 3),
+        }
+
+
+class RequestMetrics:
+    """Thread-safe per-endpoint request statistics for this process."""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def record(self, endpoint, duration_ms, status_code, queries=0, query_ms=0.0):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats()
+            stats.record(duration_ms, status_code, queries, query_ms)
+
+    def snapshot(self):
+        """Endpoint stats, the most total time first."""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items(), key=lambda item: item[1].total_ms, reverse=True)
+            return {endpoint: stats.snapshot() for endpoint, stats in endpoints}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self.started_at = time.time()
+
+
+request_metrics = RequestMetrics()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = g.get('_sql_stats') if g else None
+    if stats is None:
+        return
+    stats[0] += 1
+    started = getattr(context, '_metrics_started', None)
+    if started is not None:
+        stats[1] += (time.perf_counter() - started) * 1000
+
+
+def _endpoint_name():
+    rule = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+    return f"{request.method} {rule}"
+
+
+def _refresh_pool_gauges():
+    now = time.monotonic()
+    if now - _pool_gauges_updated_at[0] < POOL_GAUGE_INTERVAL_SECONDS:
+        return
+    if 'sqlalchemy' not in current_app.extensions:
+        return
+    _pool_gauges_updated_at[0] = now
+    from app.db import db
+    export_pool_gauges(db.engines)
+
+
+def init_request_metrics(app):
+    """Time requests and count their SQL statements."""
+    if not app.config.get('REQUEST_METRICS_ENABLED', True):
+        return
+
+    @app.before_request
+    def start_request_timer():
+        g._request_started = time.perf_counter()
+        # [statement count, statement time in ms]
+        g._sql_stats = [0, 0.0]
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get('_request_started')
+        if started is None:
+            return response
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        queries, query_ms = g.pop('_sql_stats', (0, 0.0))
+        endpoint = _endpoint_name()
+        request_metrics.record(endpoint, duration_ms, response.status_code, queries, query_ms)
+        rule = endpoint.split(' ', 1)[1]
+        HTTP_REQUESTS.inc(method=request.method, endpoint=rule, status=response.status_code)
+        HTTP_REQUEST_DURATION.observe(duration_ms / 1000, method=request.method, endpoint=rule)
+        _refresh_pool_gauges()
+
+        slow_ms = current_app.config.get('SLOW_REQUEST_MS', 500)
+        query_limit = current_app.config.get('SLOW_REQUEST_QUERY_COUNT', 25)
+        if duration_ms >= slow_ms or queries > query_limit:
+            current_app.logger.warning(
+                f"Slow request {endpoint} -> {response.status_code}: "
+                f"{duration_ms:.1f} ms, {queries} queries ({query_ms:.1f} ms in SQL)"
+            )
+        return response
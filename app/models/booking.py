@@ -1,5 +1,6 @@
 from app.db import db
 from datetime import datetime
+from app.utils.serializers import serializer_for
 
 class Booking(db.Model):
     __tablename__ = 'bookings'
@@ -17,4 +18,12 @@ class Booking(db.Model):
     updated_at = db.Column(db.DateTime, onupdate=db.func.now())
 
     #user = db.relationship('User', back_populates='bookings')
-    #room = db.relationship('Room', back_populates='bookings')
+    room = db.relationship('Room', back_populates='bookings')
+
+    def to_dict(self):
+        return _serialize_booking(self)
+
+
+# Columns of BookingSchema without the nested user and room
+BOOKING_FIELDS = ('id', 'user_id', 'room_id', 'check_in', 'check_out', 'total_price', 'status', 'created_at')
+_serialize_booking = serializer_for(Booking, BOOKING_FIELDS)
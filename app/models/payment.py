@@ -1,6 +1,7 @@
 from app.db import db
 from datetime import datetime
 import uuid
+from app.utils.serializers import serializer_for
 
 class Payment(db.Model):
     __tablename__ = 'payments'
@@ -32,18 +33,13 @@ class Payment(db.Model):
         return f'<Payment {self.id} - {self.amount} {self.currency} - {self.status}>'
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'amount': float(self.amount),
-            'currency': self.currency,
-            'payment_method': self.payment_method,
-            'status': self.status,
-            'phone_number': self.phone_number,
-            'mpesa_checkout_request_id': self.mpesa_checkout_request_id,
-            'mpesa_receipt_number': self.mpesa_receipt_number,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'description': self.description,
-            'reference': self.reference
-        }
\ No newline at end of file
+        return _serialize_payment(self)
+
+
+# Fields returned by Payment.to_dict, in order
+PAYMENT_FIELDS = (
+    'id', 'user_id', 'amount', 'currency', 'payment_method', 'status', 'phone_number',
+    'mpesa_checkout_request_id', 'mpesa_receipt_number', 'created_at', 'completed_at',
+    'description', 'reference'
+)
+_serialize_payment = serializer_for(Payment, PAYMENT_FIELDS)
@@ -2,9 +2,18 @@ from app.db import db
 from flask_bcrypt import Bcrypt
 from datetime import datetime, timedelta
 import uuid
+import secrets
+from app.utils.metrics import BCRYPT_DURATION
+from app.utils.serializers import serializer_for
+from app.utils.unit_of_work import commit
+from app.services.file_service import FileService, is_file_key, thumbnail_key
+from app.utils.constants import LIST_THUMBNAIL_SIZE
 
 bcrypt = Bcrypt()
 
+# Hash checked for unknown emails so they cost as much as a real login
+_dummy_password_hash = None
+
 class User(db.Model): 
     __tablename__ = 'users'
 
@@ -14,6 +23,8 @@ class User(db.Model):
     first_name = db.Column(db.String(100), nullable=False)
     last_name = db.Column(db.String(100), nullable=False)
     phone_number = db.Column(db.String(20), nullable=True)
+    # Key of a file in FileService storage (or an external URL); inline images
+    # from before are moved out by `flask files migrate-profile-pictures`
     profile_picture = db.Column(db.Text, nullable=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     is_verified = db.Column(db.Boolean, default=False, nullable=False)
@@ -29,6 +40,9 @@ class User(db.Model):
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Bumped only when a field the user search indexes read changes (see
+    # search_service.INDEXED_FIELDS); logins touch updated_at but not this
+    search_updated_at = db.Column(db.DateTime, nullable=True)
 
     __table_args__ = (
         db.Index('idx_user_email_active', 'email', 'is_active'),
@@ -37,10 +51,21 @@ class User(db.Model):
     )
 
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        with BCRYPT_DURATION.time(operation='hash'):
+            self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
     
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        with BCRYPT_DURATION.time(operation='check'):
+            return bcrypt.check_password_hash(self.password_hash, password)
+
+    @staticmethod
+    def check_dummy_password(password):
+        global _dummy_password_hash
+        if _dummy_password_hash is None:
+            _dummy_password_hash = bcrypt.generate_password_hash(secrets.token_hex(16)).decode('utf-8')
+        with BCRYPT_DURATION.time(operation='check'):
+            bcrypt.check_password_hash(_dummy_password_hash, password)
+        return False
 
     def generate_reset_token(self):
         self.reset_token = str(uuid.uuid4())
@@ -78,23 +103,18 @@ class User(db.Model):
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
 
+    @property
+    def profile_picture_url(self):
+        return FileService.url_for(self.profile_picture)
+
+    @property
+    def profile_picture_thumbnail_url(self):
+        if not is_file_key(self.profile_picture):
+            return self.profile_picture_url
+        return FileService.url_for(thumbnail_key(self.profile_picture, LIST_THUMBNAIL_SIZE))
+
     def serialize(self):
-        return {
-            'id': self.id,
-            'email': self.email,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'phone_number': self.phone_number,
-            'profile_picture': self.profile_picture,
-            'is_active': self.is_active,
-            'is_verified': self.is_verified,
-            'is_email_verified': self.is_email_verified,
-            'role': self.role,
-            'is_admin': self.is_admin,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'full_name': self.full_name
-        }
+        return _serialize_user(self)
 
     def serialize_with_token(self, access_token, refresh_token=None):
         user_data = self.serialize()
@@ -105,18 +125,18 @@ class User(db.Model):
 
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     def delete(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
 
     def update(self, **kwargs):
         for key, value in kwargs.items():
             if hasattr(self, key):
                 setattr(self, key, value)
         self.updated_at = datetime.utcnow()
-        db.session.commit()
+        commit()
 
     @classmethod
     def find_by_email(cls, email):
@@ -138,6 +158,16 @@ class User(db.Model):
         return f"<User {self.email}>"
 
 
+# Fields returned by User.serialize, in order
+USER_FIELDS = (
+    'id', 'email', 'first_name', 'last_name', 'phone_number',
+    'profile_picture', 'profile_picture_url', 'profile_picture_thumbnail_url',
+    'is_active', 'is_verified', 'is_email_verified', 'role', 'is_admin',
+    'created_at', 'updated_at', 'full_name'
+)
+_serialize_user = serializer_for(User, USER_FIELDS)
+
+
 class TokenBlacklist(db.Model):
     __tablename__ = "token_blacklist"
 
@@ -153,7 +183,7 @@ class TokenBlacklist(db.Model):
 
     def save(self):
         db.session.add(self)
-        db.session.commit()
+        commit()
 
     @classmethod
     def is_blacklisted(cls, jti):
@@ -177,6 +207,29 @@ class TokenBlacklist(db.Model):
         return f"<TokenBlacklist {self.token_jti}>"
 
 
+class LoginAttempt(db.Model):
+    __tablename__ = "login_attempts"
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(320), unique=True, nullable=False, index=True)  # 'email:...' or 'ip:...'
+    failures = db.Column(db.Integer, default=0, nullable=False)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    last_failure_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    @classmethod
+    def find_by_key(cls, key):
+        return cls.query.filter_by(key=key).first()
+
+    @classmethod
+    def cleanup_stale(cls, older_than):
+        deleted = cls.query.filter(cls.last_failure_at < older_than).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def __repr__(self):
+        return f"<LoginAttempt {self.key} failures={self.failures}>"
+
+
 # from app.models.room import Room
 # from app.models.booking import Booking
 # User.rooms = db.relationship('Room', back_populates='host', lazy=True)
@@ -0,0 +1,55 @@
+"""
+Blueprint manifest.
+
+Route modules are imported from this list when the app is created, so a
+deployment that sets ENABLED_BLUEPRINTS only pays for the modules it serves.
+"""
+import importlib
+
+# (name, module, blueprint attribute, url prefix, required)
+BLUEPRINTS = (
+    ('auth', 'app.routes.auth', 'auth_bp', '/api/auth', True),
+    ('users', 'app.routes.user', 'user_bp', '/api/users', False),
+    ('hostels', 'app.routes.hostel', 'hostel_bp', '/api/hostels', False),
+    ('bookings', 'app.routes.booking', 'booking_bp', '/api/bookings', False),
+    ('payments', 'app.routes.payment', 'payment_bp', '/api/payments', False),
+    ('reviews', 'app.routes.review', 'review_bp', '/api/reviews', False),
+    ('admin', 'app.routes.admin', 'admin_bp', '/api/admin', False),
+    ('files', 'app.routes.files', 'files_bp', '/api/files', False),
+    ('metrics', 'app.routes.metrics', 'metrics_bp', '/metrics', False),
+)
+
+
+def register_blueprints(app):
+    """
+    Register the enabled blueprints from the manifest.
+
+    A required blueprint that cannot be imported stops the app from
+    starting; optional ones whose module is missing, or does not define its
+    blueprint yet, are logged and skipped. Any other error raised while
+    importing a route module propagates.
+
+    Returns:
+        Names of the registered blueprints
+    """
+    enabled = app.config.get('ENABLED_BLUEPRINTS')
+    registered = []
+    for name, module_name, attribute, url_prefix, required in BLUEPRINTS:
+        if enabled is not None and name not in enabled:
+            continue
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            if required:
+                raise
+            app.logger.warning(f"{name} routes not registered: {e}")
+            continue
+        blueprint = getattr(module, attribute, None)
+        if blueprint is None:
+            if required:
+                raise ImportError(f"{module_name} does not define {attribute}")
+            app.logger.warning(f"{name} routes not registered: {module_name} does not define {attribute}")
+            continue
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
+        registered.append(name)
+    return registered
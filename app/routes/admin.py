@@ -1,13 +1,21 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import jwt_required
 from app.models.review import Review
 from app.schemas.review_schema import ReviewSchema
-from app.models.booking import Booking
+from app.services.review_service import ReviewService
+from app.models.booking import Booking, BOOKING_FIELDS
 from app.schemas.booking_schema import BookingSchema
 from app.models.room import Room
 from app.schemas.room_schema import RoomSchema
 from app.utils.decorators import admin_required
+from app.utils.db_pool import pool_stats
+from app.utils.db_routing import replica_engines, replica_health, use_read_replica
+from app.utils.projections import Projection
+from app.middleware.conditional_get import conditional_get, query_version
+from app.middleware.request_metrics import request_metrics
+from app.utils.response_cache import cached_response, invalidate_tags
 from app.db import db
+from sqlalchemy import func
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -19,6 +27,8 @@ review_schema = ReviewSchema()
 @admin_bp.route('/reviews', methods=['GET'])
 @jwt_required()
 @admin_required
+@use_read_replica
+@conditional_get(lambda: ReviewService.list_version(Review.query))
 def get_all_reviews():
     reviews = Review.query.all()
     return jsonify(review_schema.dump(reviews, many=True)), 200
@@ -28,24 +38,55 @@ def get_all_reviews():
 @admin_required
 def delete_review(review_id):
     review = Review.query.get_or_404(review_id)
+    hostel_id = review.hostel_id
     db.session.delete(review)
     db.session.commit()
+    invalidate_tags(f"hostel:{hostel_id}")
     return jsonify({"message": "Review deleted"}), 200
 
+@admin_bp.route('/reviews/moderate', methods=['POST'])
+@jwt_required()
+@admin_required
+def moderate_reviews():
+    data = request.get_json() or {}
+    review_ids = data.get('review_ids')
+
+    if review_ids is not None and not isinstance(review_ids, list):
+        return jsonify({'error': 'review_ids must be a list'}), 400
+
+    try:
+        result = ReviewService.bulk_moderate(
+            data.get('action'),
+            review_ids=review_ids,
+            user_id=data.get('user_id'),
+            hostel_id=data.get('hostel_id'),
+            comment_contains=data.get('comment_contains'),
+            dry_run=bool(data.get('dry_run', False))
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify(result), 200
+
 
 
 # Booking Routes
 
 
 booking_schema = BookingSchema()
-bookings_schema = BookingSchema(many=True)
+# Flat booking columns; the listing loads no users or rooms
+BOOKING_LIST = Projection(Booking, BOOKING_FIELDS)
 
 @admin_bp.route('/bookings', methods=['GET'])
 @jwt_required()
 @admin_required
+@use_read_replica
+@conditional_get(lambda: query_version(
+    Booking.query, func.count(), func.max(Booking.id), func.max(Booking.updated_at)
+))
 def get_all_bookings():
-    bookings = Booking.query.all()
-    return bookings_schema.jsonify(bookings), 200
+    bookings = BOOKING_LIST.query().order_by(Booking.id).all()
+    return jsonify(BOOKING_LIST.dump(bookings)), 200
 
 @admin_bp.route('/bookings/<int:booking_id>/status', methods=['PATCH'])
 @jwt_required()
@@ -74,9 +115,11 @@ rooms_schema = RoomSchema(many=True)
 @admin_bp.route('/rooms', methods=['GET'])
 @jwt_required()
 @admin_required
+@cached_response(['rooms'])
+@use_read_replica
 def get_all_rooms():
     rooms = Room.query.all()
-    return rooms_schema.jsonify(rooms), 200
+    return jsonify(rooms_schema.dump(rooms)), 200
 
 @admin_bp.route('/rooms', methods=['POST'])
 @jwt_required()
@@ -100,7 +143,8 @@ def create_room():
 
     db.session.add(new_room)
     db.session.commit()
-    return room_schema.jsonify(new_room), 201
+    invalidate_tags('rooms')
+    return jsonify(room_schema.dump(new_room)), 201
 
 @admin_bp.route('/rooms/<int:room_id>', methods=['DELETE'])
 @jwt_required()
@@ -109,4 +153,36 @@ def delete_room(room_id):
     room = Room.query.get_or_404(room_id)
     db.session.delete(room)
     db.session.commit()
+    invalidate_tags('rooms', f"room:{room_id}")
     return jsonify({'message': 'Room deleted'}), 200
+
+
+# System Routes
+
+@admin_bp.route('/db-pool', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_db_pool_stats():
+    stats = pool_stats(db.engine)
+    stats['profile'] = current_app.config.get('DB_POOL_PROFILE', 'sync')
+    stats['replicas'] = {
+        key: {**pool_stats(engine), **replica_health.status(key)}
+        for key, engine in replica_engines(db).items()
+    }
+    return jsonify(stats), 200
+
+@admin_bp.route('/metrics', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_request_metrics():
+    return jsonify({
+        'since': request_metrics.started_at,
+        'endpoints': request_metrics.snapshot()
+    }), 200
+
+@admin_bp.route('/metrics', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def reset_request_metrics():
+    request_metrics.reset()
+    return jsonify({'message': 'Metrics reset'}), 200
@@ -2,11 +2,18 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.services.auth_service import AuthService
 from app.models.user import TokenBlacklist
+from app.utils.constants import RATE_LIMIT_BUDGETS
+from app.utils.exceptions import TooManyRequestsError
+from app.utils.security import rate_limit_by_ip
 from datetime import datetime
+import logging
 
 auth_bp = Blueprint('auth', __name__)
 
+logger = logging.getLogger(__name__)
+
 @auth_bp.route('/register', methods=['POST'])
+@rate_limit_by_ip(*RATE_LIMIT_BUDGETS['register'])
 def register():
     """Register a new user with email verification"""
     try:
@@ -44,6 +51,7 @@ def register():
         return jsonify({'error': 'Registration failed due to server error'}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit_by_ip(*RATE_LIMIT_BUDGETS['login'])
 def login():
     """Login user with email and password"""
     try:
@@ -55,38 +63,30 @@ def login():
         email = data.get('email', '').strip()
         password = data.get('password', '')
         
-        print(f"Login attempt - Email: {email}")
-        
-        # Check if user exists and their status
-        from app.models.user import User
-        user = User.find_by_email(email.lower())
-        if user:
-            print(f"User found - Email verified: {user.is_email_verified}, Active: {user.is_active}")
-            print(f"Password check: {user.check_password(password)}")
-        else:
-            print("User not found") 
-        
         if not email or not password:
             return jsonify({'error': 'Email and password are required'}), 400
         
-        print("About to call AuthService.authenticate_user...")  # Add this
-        
         # Use AuthService to authenticate user
-        result = AuthService.authenticate_user(email=email, password=password)
-        
-        print(f"AuthService result: {result}")  # Add this
+        result = AuthService.authenticate_user(
+            email=email,
+            password=password,
+            ip_address=request.remote_addr
+        )
         
+        logger.info("Login succeeded", extra={'event': 'login_succeeded'})
         return jsonify(result), 200
         
+    except TooManyRequestsError as e:
+        logger.info("Login throttled", extra={'event': 'login_throttled', 'retry_after': e.retry_after})
+        response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
     except ValueError as e:
-        print(f"Auth ValueError: {str(e)}")
+        logger.info("Login failed", extra={'event': 'login_failed', 'reason': str(e)})
         return jsonify({'error': str(e)}), 401
-    except Exception as e:
-        # ADD THIS MISSING EXCEPTION HANDLER:
-        print(f"🚨 LOGIN ERROR: {str(e)}")
-        print(f"Error type: {type(e).__name__}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Login error", extra={'event': 'login_error'})
         return jsonify({"message": "An unexpected error occurred", "status": "error"}), 500
 @auth_bp.route('/verify', methods=['GET'])
 @jwt_required()
@@ -211,6 +211,7 @@ def change_password():
         return jsonify({'error': 'Failed to change password'}), 500
 
 @auth_bp.route('/forgot-password', methods=['POST'])
+@rate_limit_by_ip(*RATE_LIMIT_BUDGETS['forgot_password'])
 def forgot_password():
     """Request password reset"""
     try:
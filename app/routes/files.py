@@ -0,0 +1,70 @@
+import os
+import click
+from flask import Blueprint, abort, current_app, jsonify, send_file
+from app.services.file_service import CONTENT_TYPES, FileService, is_file_key, parse_thumbnail_key
+from app.services.image_service import ImageService
+
+files_bp = Blueprint('files', __name__)
+
+
+def _ensure_thumbnail(key):
+    """Generate a missing thumbnail now, e.g. when requested before the background job ran."""
+    parsed = parse_thumbnail_key(key)
+    if parsed is None or parsed[1] not in ImageService.sizes():
+        return False
+    original = FileService.find_original(parsed[0])
+    if original is None:
+        return False
+    try:
+        ImageService.process(original)
+    except OSError:
+        return False
+    return os.path.exists(FileService.path_for(key))
+
+
+@files_bp.route('/<key>', methods=['GET'])
+def get_file(key):
+    """Serve a stored file. Keys are content hashes, so responses never change."""
+    if not is_file_key(key):
+        abort(404)
+    path = FileService.path_for(key)
+    if not os.path.exists(path) and not _ensure_thumbnail(key):
+        abort(404)
+
+    max_age = current_app.config.get('FILES_CACHE_MAX_AGE', 365 * 24 * 3600)
+    response = send_file(
+        path,
+        mimetype=CONTENT_TYPES[key.rsplit('.', 1)[1]],
+        etag=key.split('.', 1)[0],
+        conditional=True,
+        max_age=max_age
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@files_bp.route('/<key>/info', methods=['GET'])
+def get_file_info(key):
+    """Dimensions of a stored image and its thumbnails."""
+    if not FileService.exists(key) or parse_thumbnail_key(key) is not None:
+        abort(404)
+    info = ImageService.info(key)
+    if info is None:
+        try:
+            info = ImageService.process(key)
+        except OSError:
+            abort(404)
+    return jsonify(info), 200
+
+
+@files_bp.cli.command('migrate-profile-pictures')
+@click.option('--batch-size', default=100, show_default=True, help='Rows per transaction')
+@click.option('--dry-run', is_flag=True, help='Report what would move without writing')
+def migrate_profile_pictures_command(batch_size, dry_run):
+    """Move inline profile pictures out of the users table into file storage."""
+    stats = FileService.migrate_inline_profile_pictures(batch_size=batch_size, dry_run=dry_run)
+    click.echo(
+        f"{'Would migrate' if dry_run else 'Migrated'} {stats['migrated']} pictures "
+        f"({stats['bytes']} bytes) in {stats['batches']} batches; skipped {stats['skipped']}"
+    )
@@ -0,0 +1,22 @@
+import hmac
+from flask import Blueprint, Response, current_app, jsonify, request
+from app.db import db
+from app.utils.db_pool import export_pool_gauges
+from app.utils.metrics import CONTENT_TYPE, generate_latest
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('', methods=['GET'])
+def export_metrics():
+    """Prometheus text-format metrics merged across every worker on this host."""
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        # Open only in development and tests; elsewhere a missing token must not publish the metrics
+        if not (current_app.debug or current_app.testing):
+            return jsonify({'error': 'Metrics are disabled until METRICS_TOKEN is set'}), 403
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    export_pool_gauges(db.engines)
+    return Response(generate_latest(), content_type=CONTENT_TYPE)
@@ -1,14 +1,28 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.payment import Payment
+from app.models.payment import Payment, PAYMENT_FIELDS
 from app.db import db
+from app.utils.constants import RATE_LIMIT_BUDGETS
+from app.utils.security import rate_limit_by_ip
+from app.utils.db_routing import use_read_replica
+from app.utils.metrics import MPESA_CALL_DURATION, MPESA_CALLS
+from app.utils.projections import Projection
+from app.utils.unit_of_work import commit_now
+from app.middleware.conditional_get import conditional_get, query_version
+from sqlalchemy import func
 import requests
 import base64
 from datetime import datetime
 import os
+import logging
 
 payment_bp = Blueprint('payment', __name__)
 
+logger = logging.getLogger(__name__)
+
+# Payment history selects the to_dict() columns only
+PAYMENT_LIST = Projection(Payment, PAYMENT_FIELDS)
+
 # M-Pesa Configuration (use environment variables)
 MPESA_CONSUMER_KEY = os.getenv('MPESA_CONSUMER_KEY')
 MPESA_CONSUMER_SECRET = os.getenv('MPESA_CONSUMER_SECRET')
@@ -29,13 +43,18 @@ def get_mpesa_token():
             "Content-Type": "application/json"
         }
         
-        response = requests.get(api_url, headers=headers)
-        return response.json().get('access_token')
-    except Exception as e:
-        print(f"Token error: {str(e)}")
+        with MPESA_CALL_DURATION.time(operation='token'):
+            response = requests.get(api_url, headers=headers)
+        token = response.json().get('access_token')
+        MPESA_CALLS.inc(operation='token', outcome='success' if token else 'rejected')
+        return token
+    except Exception:
+        MPESA_CALLS.inc(operation='token', outcome='error')
+        logger.exception("M-Pesa token request failed", extra={'event': 'mpesa_token_error'})
         return None
 
 @payment_bp.route('/mpesa/stk-push', methods=['POST'])
+@rate_limit_by_ip(*RATE_LIMIT_BUDGETS['mpesa_stk_push'])
 @jwt_required()
 def mpesa_stk_push():
     """Initiate M-Pesa STK Push"""
@@ -73,7 +92,9 @@ def mpesa_stk_push():
             status='pending'
         )
         db.session.add(payment)
-        db.session.commit()
+        # The pending payment must be saved before M-Pesa hears of it, and no
+        # transaction should stay open during the API call
+        commit_now()
         
         # Prepare STK Push request
         timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
@@ -100,13 +121,20 @@ def mpesa_stk_push():
             "Content-Type": "application/json"
         }
         
-        response = requests.post(api_url, json=stk_push_data, headers=headers)
-        response_data = response.json()
+        try:
+            with MPESA_CALL_DURATION.time(operation='stk_push'):
+                response = requests.post(api_url, json=stk_push_data, headers=headers)
+            response_data = response.json()
+        except Exception:
+            MPESA_CALLS.inc(operation='stk_push', outcome='error')
+            raise
         
         if response_data.get('ResponseCode') == '0':
-            # Update payment with checkout request ID
+            MPESA_CALLS.inc(operation='stk_push', outcome='success')
+            # Update payment with checkout request ID. The callback looks the
+            # payment up by it and may arrive before this request finishes
             payment.mpesa_checkout_request_id = response_data.get('CheckoutRequestID')
-            db.session.commit()
+            commit_now()
             
             return jsonify({
                 'success': True,
@@ -115,8 +143,10 @@ def mpesa_stk_push():
                 'checkout_request_id': response_data.get('CheckoutRequestID')
             }), 200
         else:
+            MPESA_CALLS.inc(operation='stk_push', outcome='rejected')
             payment.status = 'failed'
-            db.session.commit()
+            # Saved even though the response is a 400, which rolls back deferred changes
+            commit_now()
             return jsonify({
                 'error': 'STK Push failed',
                 'message': response_data.get('errorMessage', 'Unknown error')
@@ -140,8 +170,10 @@ def mpesa_callback():
         payment = Payment.query.filter_by(mpesa_checkout_request_id=checkout_request_id).first()
         
         if not payment:
+            MPESA_CALLS.inc(operation='callback', outcome='unknown_payment')
             return jsonify({'error': 'Payment not found'}), 404
         
+        MPESA_CALLS.inc(operation='callback', outcome='success' if result_code == 0 else 'failed')
         if result_code == 0:
             # Payment successful
             callback_metadata = stk_callback.get('CallbackMetadata', {}).get('Item', [])
@@ -162,8 +194,8 @@ def mpesa_callback():
         
         return jsonify({'success': True}), 200
         
-    except Exception as e:
-        print(f"Callback error: {str(e)}")
+    except Exception:
+        logger.exception("M-Pesa callback processing failed", extra={'event': 'mpesa_callback_error'})
         return jsonify({'error': 'Callback processing failed'}), 500
 
 @payment_bp.route('/status/<payment_id>', methods=['GET'])
@@ -184,13 +216,17 @@ def payment_status(payment_id):
 
 @payment_bp.route('/history', methods=['GET'])
 @jwt_required()
+@use_read_replica
+@conditional_get(lambda: (get_jwt_identity(), query_version(
+    Payment.query.filter_by(user_id=get_jwt_identity()), func.count(), func.max(Payment.updated_at)
+)))
 def payment_history():
     """Get user payment history"""
     try:
         user_id = get_jwt_identity()
-        payments = Payment.query.filter_by(user_id=user_id).order_by(Payment.created_at.desc()).all()
+        payments = PAYMENT_LIST.query(Payment.query.filter_by(user_id=user_id)).order_by(Payment.created_at.desc()).all()
         
-        return jsonify([payment.to_dict() for payment in payments]), 200
+        return jsonify(PAYMENT_LIST.dump(payments)), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
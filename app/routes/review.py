@@ -3,10 +3,17 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.review import Review
 from app.schemas.review_schema import ReviewSchema
 from app.services.review_service import ReviewService
+from app.utils.db_routing import use_read_replica
+from app.utils.projections import Projection
+from app.middleware.conditional_get import conditional_get
+from app.utils.response_cache import cached_response
+from app.utils.single_flight import single_flight
 
 review_bp = Blueprint('reviews', __name__, url_prefix='/api/reviews')
 review_schema = ReviewSchema()
-reviews_schema = ReviewSchema(many=True)
+
+# ReviewSchema's fields, selected as columns so Review.user is never joined
+REVIEW_LIST = Projection(Review, ('id', 'user_id', 'hostel_id', 'rating', 'comment', 'created_at', 'is_flagged'))
 
 @review_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -25,12 +32,16 @@ def create_review():
             'rating': data['rating'],
             'comment': data.get('comment', '')
         }
-        review = ReviewService.create_review(review_data)
+        review = ReviewService.create_review(**review_data)
         return jsonify(review_schema.dump(review)), 201
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
 
 @review_bp.route('/hostel/<int:hostel_id>', methods=['GET'])
+@cached_response(lambda hostel_id: [f"hostel:{hostel_id}"])
+@use_read_replica
+@conditional_get(lambda hostel_id: ReviewService.list_version(Review.query.filter_by(hostel_id=hostel_id)))
+@single_flight()
 def get_hostel_reviews(hostel_id):
-    reviews = Review.query.filter_by(hostel_id=hostel_id).all()
-    return jsonify(reviews_schema.dump(reviews)), 200
+    reviews = REVIEW_LIST.query(Review.query.filter_by(hostel_id=hostel_id)).all()
+    return jsonify(REVIEW_LIST.dump(reviews)), 200
@@ -3,8 +3,18 @@ User management routes for profile operations and admin functions.
 """
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.user import User
+from app.models.user import User, USER_FIELDS
 from app.db import db
+from app.services.search_service import UserSearchService
+from app.utils.helpers import keyset_paginate, cached_count
+from app.utils.db_routing import use_read_replica
+from app.middleware.conditional_get import conditional_get, query_version
+from app.utils.projections import Projection
+from app.utils.constants import ALLOWED_IMAGE_EXTENSIONS, ALLOWED_IMAGE_TYPES, MAX_UPLOAD_SIZE_MB
+from app.services.image_service import ImageService
+from app.utils.exceptions import BadRequestError, FileTooLargeError
+from app.utils.uploads import receive_upload
+from sqlalchemy import func
 import logging
 import re
 
@@ -13,13 +23,22 @@ logger = logging.getLogger(__name__)
 # Create the blueprint
 user_bp = Blueprint('users', __name__)
 
+# Listings select just the serialized columns instead of loading User objects
+USER_LIST = Projection(User, USER_FIELDS)
+
 def validate_email(email):
     """Enhanced email validation"""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return re.match(pattern, email) is not None
 
+def _active_users_version():
+    # Any profile change bumps updated_at; deactivations change the count
+    return query_version(User.query.filter(User.is_active == True), func.max(User.updated_at), func.count())
+
 @user_bp.route('', methods=['GET'])
 @jwt_required()  # Protect user listing
+@use_read_replica
+@conditional_get(_active_users_version)
 def get_users():
     """
     Get list of users with pagination and search.
@@ -28,11 +47,15 @@ def get_users():
     - page: Page number (default: 1)
     - per_page: Items per page (default: 10, max: 100)
     - search: Search term for email/name
+    - count: Set to 'false' for keyset pagination without a COUNT query
+    - cursor: Cursor from a previous keyset page (implies count=false)
     """
     try:
         page = int(request.args.get('page', 1))
         per_page = min(int(request.args.get('per_page', 10)), 100)
         search = request.args.get('search', '').strip()
+        cursor = request.args.get('cursor', '').strip()
+        use_keyset = bool(cursor) or request.args.get('count', 'true').lower() == 'false'
         
         # Ensure positive values
         page = max(1, page)
@@ -41,30 +64,25 @@ def get_users():
         # Basic query - only active users
         query = User.query.filter(User.is_active == True)
         
-        # Add search filter if provided
+        if use_keyset:
+            return _get_users_keyset(query, search, cursor, per_page)
+        
+        # Add search filter if provided, ranked by relevance
         if search:
-            search_filter = f"%{search}%"
-            query = query.filter(
-                db.or_(
-                    User.email.ilike(search_filter),  # Case-insensitive search
-                    User.first_name.ilike(search_filter),
-                    User.last_name.ilike(search_filter),
-                    db.func.concat(User.first_name, ' ', User.last_name).ilike(search_filter)
-                )
-            )
+            query = UserSearchService.apply(query, search)
         
-        # Order by created_at for consistent pagination
+        # Order by created_at for consistent pagination (tie-breaker when searching)
         query = query.order_by(User.created_at.desc())
         
         # Paginate results
-        users_pagination = query.paginate(
+        users_pagination = USER_LIST.query(query).paginate(
             page=page, 
             per_page=per_page, 
             error_out=False
         )
         
         # Serialize users
-        users_data = [user.serialize() for user in users_pagination.items]
+        users_data = USER_LIST.dump(users_pagination.items)
         
         return jsonify({
             'users': users_data,
@@ -90,6 +108,37 @@ def get_users():
             'message': 'An unexpected error occurred'
         }), 500
 
+def _get_users_keyset(query, search, cursor, per_page):
+    """
+    Keyset page of users on (created_at, id) without a per-request COUNT(*).
+
+    The total counts active users matching the search, cached for
+    USER_COUNT_CACHE_SECONDS, so it may lag recent writes by that much.
+    """
+    if search:
+        query = UserSearchService.apply(query, search, rank=False)
+    
+    users, next_cursor = keyset_paginate(USER_LIST.query(query), User, cursor, per_page)
+    
+    total = cached_count(
+        query,
+        f"users:active:{search.lower()}",
+        current_app.config.get('USER_COUNT_CACHE_SECONDS', 60)
+    )
+    
+    return jsonify({
+        'users': USER_LIST.dump(users),
+        'pagination': {
+            'per_page': per_page,
+            'total': total,
+            'pages': (total + per_page - 1) // per_page,
+            'has_prev': bool(cursor),
+            'has_next': next_cursor is not None,
+            'next_cursor': next_cursor,
+            'estimated': True
+        }
+    }), 200
+
 @user_bp.route('/<int:user_id>', methods=['GET'])
 @jwt_required()
 def get_user(user_id):
@@ -228,6 +277,69 @@ def update_user(user_id):
             'message': 'An unexpected error occurred'
         }), 500
 
+@user_bp.route('/<int:user_id>/profile-picture', methods=['PUT'])
+@jwt_required()
+def upload_profile_picture(user_id):
+    """
+    Upload a profile picture as multipart form field 'file'.
+
+    The image is stored once per distinct content (see FileService) and the
+    user keeps only its key; the response carries the URLs to display.
+    Thumbnails are made in the background by ImageService.
+    """
+    try:
+        current_user_id = get_jwt_identity()
+
+        if current_user_id != user_id:
+            return jsonify({
+                'error': 'Unauthorized',
+                'message': 'You can only update your own profile picture'
+            }), 403
+
+        user = User.find_by_id(user_id)
+        if not user:
+            return jsonify({
+                'error': 'User not found',
+                'message': f'User with ID {user_id} does not exist'
+            }), 404
+
+        # Parsed as it arrives: a wrong extension, non-image content or an
+        # oversized file is refused without reading the rest of the body
+        try:
+            upload = receive_upload(
+                'file',
+                allowed_extensions=ALLOWED_IMAGE_EXTENSIONS,
+                allowed_types=ALLOWED_IMAGE_TYPES,
+                max_bytes=MAX_UPLOAD_SIZE_MB * 1024 * 1024
+            )
+        except FileTooLargeError:
+            return jsonify({
+                'error': 'File too large',
+                'message': f'Maximum size is {MAX_UPLOAD_SIZE_MB} MB'
+            }), 413
+        except BadRequestError as e:
+            return jsonify({
+                'error': 'Invalid upload',
+                'message': f'{e}; allowed types: {", ".join(sorted(ALLOWED_IMAGE_EXTENSIONS))}'
+            }), 400
+
+        user.update(profile_picture=upload.key)
+        # Listings link the thumbnails; a request before they exist makes them on demand
+        ImageService.process_async(upload.key)
+
+        return jsonify({
+            'message': 'Profile picture updated successfully',
+            'user': user.serialize()
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Profile picture upload error: {str(e)}")
+        return jsonify({
+            'error': 'Upload failed',
+            'message': 'An unexpected error occurred'
+        }), 500
+
 @user_bp.route('/<int:user_id>', methods=['DELETE'])
 @jwt_required()
 def delete_user(user_id):
@@ -359,6 +471,7 @@ def create_user():
 
 @user_bp.route('/search', methods=['GET'])
 @jwt_required()
+@use_read_replica
 def search_users():
     """
     Search users by email or name.
@@ -383,17 +496,11 @@ def search_users():
                 'message': 'Search query must be at least 2 characters'
             }), 400
         
-        # Search users (only active ones)
-        search_filter = f"%{query}%"
-        users = User.query.filter(
-            User.is_active == True
-        ).filter(
-            db.or_(
-                User.email.ilike(search_filter),
-                User.first_name.ilike(search_filter),
-                User.last_name.ilike(search_filter),
-                db.func.concat(User.first_name, ' ', User.last_name).ilike(search_filter)
-            )
+        # Search users (only active ones), best matches first
+        users = UserSearchService.apply(
+            User.query.filter(User.is_active == True),
+            query,
+            limit=limit
         ).limit(limit).all()
         
         # Serialize users
@@ -417,6 +524,46 @@ def search_users():
             'message': 'An unexpected error occurred'
         }), 500
 
+@user_bp.route('/suggest', methods=['GET'])
+@jwt_required()
+def suggest_users():
+    """
+    Typeahead suggestions from the in-memory prefix index.
+    
+    Query parameters:
+    - q: Prefix of a first name, last name, full name or email
+    - limit: Maximum results (default: 8, max: 20)
+    """
+    try:
+        prefix = request.args.get('q', '').strip()
+        limit = max(1, min(int(request.args.get('limit', 8)), 20))
+        
+        if not prefix:
+            return jsonify({
+                'error': 'Missing search query',
+                'message': 'Search query (q) is required'
+            }), 400
+        
+        suggestions = UserSearchService.suggest(prefix, limit=limit)
+        
+        return jsonify({
+            'suggestions': suggestions,
+            'count': len(suggestions),
+            'query': prefix
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({
+            'error': 'Invalid query parameters',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Suggest users error: {str(e)}")
+        return jsonify({
+            'error': 'Suggest failed',
+            'message': 'An unexpected error occurred'
+        }), 500
+
 @user_bp.route('/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
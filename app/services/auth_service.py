@@ -8,6 +8,9 @@ import re
 from app.models.user import User, TokenBlacklist
 from app.db import db
 from app.services.email_service import EmailService
+from app.services.login_attempt_service import LoginAttemptService
+from app.utils.exceptions import TooManyRequestsError
+from app.utils.unit_of_work import commit_now
 
 
 class AuthService:
@@ -94,8 +97,9 @@ class AuthService:
             # Generate verification token
             verification_token = user.generate_verification_token()
             
-            # Save user to database
+            # Save user to database; committed now since the email below carries its token
             user.save()
+            commit_now()
             
             current_app.logger.info(f"User created successfully: {email}")
             
@@ -144,22 +148,29 @@ class AuthService:
             raise ValueError("Registration failed due to server error")
     
     @staticmethod
-    def authenticate_user(email: str, password: str) -> Dict[str, Any]:
+    def authenticate_user(email: str, password: str, ip_address: Optional[str] = None) -> Dict[str, Any]:
         """
         Authenticate user with email and password.
         
         Args:
             email: User's email address
             password: User's password (plain text)
+            ip_address: Client IP, throttled alongside the email (optional)
             
         Returns:
             Dict containing user info and access token
             
         Raises:
+            TooManyRequestsError: If the email or IP is backing off
             ValueError: If authentication fails
         """
         email = email.strip().lower()
         
+        # Reject throttled attempts before any user lookup or hashing
+        retry_after = LoginAttemptService.retry_after(email, ip_address)
+        if retry_after:
+            raise TooManyRequestsError("Too many failed login attempts, try again later", retry_after)
+        
         # Validate email format
         if not AuthService.validate_email(email):
             raise ValueError("Invalid email format")
@@ -167,9 +178,15 @@ class AuthService:
         # Find user by email
         user = User.find_by_email(email)
         
-        if not user or not user.check_password(password):
+        # Unknown emails still pay for one bcrypt check so timing does not
+        # reveal which accounts exist
+        password_ok = user.check_password(password) if user else User.check_dummy_password(password)
+        if not password_ok:
+            LoginAttemptService.record_failure(email, ip_address)
             raise ValueError("Invalid email or password")
         
+        LoginAttemptService.record_success(email)
+        
         # Check if user is active
         # if not user.is_active:
            #raise ValueError("Account is deactivated")
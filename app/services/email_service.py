@@ -1,6 +1,7 @@
 from flask import current_app
 from flask_mail import Message, Mail
 import os
+from app.utils.metrics import EMAILS_IN_FLIGHT, EMAILS_SENT
 
 class EmailService:
     @staticmethod
@@ -60,10 +61,13 @@ class EmailService:
             </html>
             """
             
-            mail.send(msg)
+            with EMAILS_IN_FLIGHT.track_inprogress():
+                mail.send(msg)
+            EMAILS_SENT.inc(kind='verification', outcome='sent')
             return True
             
         except Exception as e:
+            EMAILS_SENT.inc(kind='verification', outcome='failed')
             current_app.logger.error(f"Error sending verification email: {str(e)}")
             return False
     
@@ -94,9 +98,12 @@ class EmailService:
             </html>
             """
             
-            mail.send(msg)
+            with EMAILS_IN_FLIGHT.track_inprogress():
+                mail.send(msg)
+            EMAILS_SENT.inc(kind='password_reset', outcome='sent')
             return True
             
         except Exception as e:
+            EMAILS_SENT.inc(kind='password_reset', outcome='failed')
             current_app.logger.error(f"Error sending password reset email: {str(e)}")
             return False
\ No newline at end of file
@@ -0,0 +1,310 @@
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from datetime import datetime
+from typing import BinaryIO, Iterable, Optional, Tuple
+from flask import current_app
+from app.utils.exceptions import FileTooLargeError
+
+# Key of a stored file: sha256 of its content plus the detected extension.
+# Thumbnails of an image add their size: <sha256>-<size>.<ext>
+FILE_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}(-[0-9]{1,4})?\.(png|jpg|gif|webp)$')
+
+# Leading bytes of each image format we accept
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+# Where app/routes/files.py serves stored files
+FILES_URL_PREFIX = '/api/files'
+
+# Bytes needed to recognise any of the signatures above
+_SIGNATURE_BYTES = 16
+
+CONTENT_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'gif': 'image/gif', 'webp': 'image/webp'}
+
+_DATA_URL = re.compile(r'^data:image/[a-z+.-]+;base64,', re.IGNORECASE)
+
+
+def detect_image_type(head: bytes) -> Optional[str]:
+    """Extension for the image format that head starts with, or None."""
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def _checked_type(head: bytes, extension: Optional[str], allowed_types) -> str:
+    detected = detect_image_type(head) or extension
+    if not detected or (allowed_types is not None and detected not in allowed_types):
+        raise ValueError("Unsupported file type")
+    return detected
+
+
+def is_file_key(value: Optional[str]) -> bool:
+    return bool(value) and FILE_KEY_PATTERN.match(value) is not None
+
+
+def thumbnail_key(key: str, size: int, extension: str = 'webp') -> str:
+    """Key of the size-pixel thumbnail of the stored image key."""
+    return f"{key.split('.', 1)[0]}-{size}.{extension}"
+
+
+def parse_thumbnail_key(key: str) -> Optional[Tuple[str, int]]:
+    """(content hash of the original, size) for a thumbnail key, else None."""
+    match = FILE_KEY_PATTERN.match(key or '')
+    if not match or not match.group(1):
+        return None
+    return key.split('-', 1)[0], int(match.group(1)[1:])
+
+
+def decode_inline_image(value: str) -> Optional[bytes]:
+    """
+    Bytes of an image stored inline as a data: URL or bare base64.
+
+    Returns:
+        None if value is not an inline image (e.g. an external URL)
+    """
+    value = value.strip()
+    if value.startswith(('http://', 'https://', '/')):
+        return None
+    value = _DATA_URL.sub('', value, count=1)
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return data if detect_image_type(data[:_SIGNATURE_BYTES]) else None
+
+
+class FileService:
+    """
+    Content-addressed file storage on local disk.
+
+    Files are stored under UPLOAD_FOLDER as ab/cd/<sha256>.<ext>, so the
+    same content is written once however many users upload it, and a key
+    never changes meaning, which lets clients cache it forever.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    @staticmethod
+    def root() -> str:
+        return current_app.config['UPLOAD_FOLDER']
+
+    @staticmethod
+    def path_for(key: str) -> str:
+        """
+        Absolute path of a stored file.
+
+        Raises:
+            ValueError: If key is not a valid file key
+        """
+        if not is_file_key(key):
+            raise ValueError(f"Invalid file key: {key!r}")
+        return os.path.join(FileService.root(), key[:2], key[2:4], key)
+
+    @staticmethod
+    def exists(key: str) -> bool:
+        return is_file_key(key) and os.path.exists(FileService.path_for(key))
+
+    @staticmethod
+    def url_for(key: Optional[str]) -> Optional[str]:
+        """Public URL of a stored file; external URLs are passed through."""
+        if not key:
+            return None
+        if is_file_key(key):
+            return f"{FILES_URL_PREFIX}/{key}"
+        if key.startswith(('http://', 'https://')):
+            return key
+        return None
+
+    @staticmethod
+    def find_original(digest: str) -> Optional[str]:
+        """Key of the stored original with this content hash, if any."""
+        for extension in CONTENT_TYPES:
+            key = f"{digest}.{extension}"
+            if FileService.exists(key):
+                return key
+        return None
+
+    @staticmethod
+    def save_bytes(data: bytes, extension: Optional[str] = None) -> str:
+        """
+        Store data and return its key. Content already stored is not written again.
+
+        Raises:
+            ValueError: If the type cannot be detected and no extension is given
+        """
+        extension = detect_image_type(data[:_SIGNATURE_BYTES]) or extension
+        if not extension:
+            raise ValueError("Unsupported file type")
+        key = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+        path = FileService.path_for(key)
+        if not os.path.exists(path):
+            FileService._write_atomically(path, [data])
+        return key
+
+    @staticmethod
+    def save_derived(key: str, data: bytes) -> None:
+        """Store a file derived from a stored one (e.g. a thumbnail) under key."""
+        FileService._write_atomically(FileService.path_for(key), [data])
+
+    @staticmethod
+    def save_derived_info(key: str, data: bytes) -> None:
+        """Store metadata about key (e.g. image dimensions) in a sidecar file."""
+        FileService._write_atomically(FileService.path_for(key) + '.json', [data])
+
+    @staticmethod
+    def read_derived_info(key: str) -> Optional[bytes]:
+        try:
+            with open(FileService.path_for(key) + '.json', 'rb') as info_file:
+                return info_file.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def save_stream(stream: BinaryIO, extension: Optional[str] = None,
+                    max_bytes: Optional[int] = None, allowed_types=None) -> Tuple[str, int]:
+        """
+        Store a file read from stream in chunks; see save_chunks.
+
+        Returns:
+            (key, size in bytes)
+        """
+        chunks = iter(lambda: stream.read(FileService.CHUNK_SIZE), b'')
+        return FileService.save_chunks(chunks, extension, max_bytes, allowed_types)
+
+    @staticmethod
+    def save_chunks(chunks: Iterable[bytes], extension: Optional[str] = None,
+                    max_bytes: Optional[int] = None, allowed_types=None) -> Tuple[str, int]:
+        """
+        Store a file arriving as chunks, hashing as it is written.
+
+        Only one chunk is held in memory at a time. The type is checked as
+        soon as the first bytes arrive and the size after every chunk, so a
+        bad file is rejected without consuming the rest of it.
+
+        Args:
+            chunks: Iterable of bytes
+            extension: Used when the type cannot be detected from the content
+            max_bytes: Fail as soon as the file exceeds this
+            allowed_types: Detected extensions to accept, default all known
+
+        Returns:
+            (key, size in bytes)
+
+        Raises:
+            ValueError: If the content is not an allowed type
+            FileTooLargeError: If the file is longer than max_bytes
+        """
+        os.makedirs(FileService.root(), exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        head = b''
+        detected = None
+        handle, temp_path = tempfile.mkstemp(dir=FileService.root(), prefix='.upload-')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                for chunk in chunks:
+                    if detected is None:
+                        head += chunk[:_SIGNATURE_BYTES - len(head)]
+                        if len(head) >= _SIGNATURE_BYTES:
+                            detected = _checked_type(head, extension, allowed_types)
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise FileTooLargeError(f"File exceeds {max_bytes} bytes", max_bytes)
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            if detected is None:
+                detected = _checked_type(head, extension, allowed_types)
+            key = f"{digest.hexdigest()}.{detected}"
+            path = FileService.path_for(key)
+            if os.path.exists(path):
+                os.unlink(temp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+            return key, size
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    @staticmethod
+    def _write_atomically(path: str, chunks) -> None:
+        # Readers never see a half-written file: write aside, then rename
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    @staticmethod
+    def migrate_inline_profile_pictures(batch_size: int = 100, dry_run: bool = False) -> dict:
+        """
+        Move images stored inline in users.profile_picture into file storage.
+
+        Rows are read in id order, batch_size at a time, and each batch is
+        committed on its own, so the migration holds no long transaction and
+        can be stopped and rerun; migrated rows hold keys and are skipped.
+        updated_at is bumped in the same update so cached user lists and
+        their ETags pick up the new picture URLs.
+
+        Args:
+            batch_size: Rows read and updated per transaction
+            dry_run: Count what would move without writing anything
+
+        Returns:
+            Counts of migrated and skipped rows and bytes moved out of the table
+        """
+        from sqlalchemy import func, select, update
+        from app.db import db
+        from app.models.user import User
+
+        stats = {'migrated': 0, 'skipped': 0, 'bytes': 0, 'batches': 0}
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(User.id, User.profile_picture)
+                .where(User.id > last_id, func.length(User.profile_picture) > 80)
+                .order_by(User.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            changes = []
+            now = datetime.utcnow()
+            for user_id, value in rows:
+                data = decode_inline_image(value)
+                if data is None:
+                    stats['skipped'] += 1
+                    continue
+                key = FileService.save_bytes(data) if not dry_run else None
+                changes.append({'id': user_id, 'profile_picture': key, 'updated_at': now})
+                stats['migrated'] += 1
+                stats['bytes'] += len(value)
+
+            if changes and not dry_run:
+                db.session.execute(update(User), changes)
+                db.session.commit()
+            else:
+                db.session.rollback()
+            stats['batches'] += 1
+        return stats
@@ -0,0 +1,163 @@
+import io
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from flask import current_app
+from PIL import Image, ImageOps
+from app.services.file_service import FileService, thumbnail_key
+from app.utils.constants import THUMBNAIL_SIZES
+
+logger = logging.getLogger(__name__)
+
+# Pillow format name and save options per thumbnail extension. No exif or
+# icc_profile is passed, so thumbnails carry no metadata
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# EXIF orientations that swap width and height
+_ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+class ImageService:
+    """
+    Thumbnails and dimensions for uploaded images.
+
+    Each image is decoded once: JPEGs are decoded straight at the scale of
+    the largest thumbnail (Image.draft), rotated upright from EXIF, and each
+    smaller size is resized from the one before. Every size is written as
+    WebP and JPEG next to the original, and the dimensions go in a
+    <key>.json sidecar. Uploads hand the work to a small thread pool;
+    Pillow releases the GIL while decoding and resizing.
+
+    Images over IMAGE_MAX_PIXELS are refused from their header, before any
+    pixel data is decoded. Originals that fail are recorded in the sidecar,
+    so requests for their thumbnails do not decode them again.
+    """
+
+    _executor = None
+    _executor_pid = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def sizes():
+        return tuple(sorted(current_app.config.get('THUMBNAIL_SIZES', THUMBNAIL_SIZES), reverse=True))
+
+    @staticmethod
+    def process(key: str) -> dict:
+        """
+        Write the thumbnails and info sidecar of a stored image.
+
+        Args:
+            key: FileService key of the original
+
+        Returns:
+            Image info: original width, height, format and thumbnail sizes
+
+        Raises:
+            OSError: If the file is not a readable image or is too large to
+                decode, now or on an earlier attempt
+        """
+        recorded = FileService.read_derived_info(key)
+        error = json.loads(recorded).get('error') if recorded is not None else None
+        if error:
+            raise OSError(error)
+
+        sizes = ImageService.sizes()
+        try:
+            image, width, height, source_format = ImageService._decode(key, sizes[0])
+        except FileNotFoundError:
+            raise
+        except OSError as e:
+            # Keys are content hashes, so the same file would fail the same way again
+            FileService.save_derived_info(key, json.dumps({'error': str(e)}).encode('utf-8'))
+            logger.warning("Image rejected", extra={'event': 'image_rejected', 'key': key, 'reason': str(e)})
+            raise
+
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        thumbnails = {}
+        for size in sizes:
+            image = image.copy()
+            image.thumbnail((size, size), Image.LANCZOS)
+            for extension, (pillow_format, options) in THUMBNAIL_FORMATS.items():
+                data = ImageService._encode(image, pillow_format, options)
+                FileService.save_derived(thumbnail_key(key, size, extension), data)
+            thumbnails[str(size)] = {'width': image.width, 'height': image.height}
+
+        info = {'width': width, 'height': height, 'format': source_format, 'thumbnails': thumbnails}
+        FileService.save_derived_info(key, json.dumps(info).encode('utf-8'))
+        return info
+
+    @staticmethod
+    def _decode(key, largest):
+        """Open key's original and decode it upright at about the largest thumbnail's scale."""
+        max_pixels = current_app.config.get('IMAGE_MAX_PIXELS', 40_000_000)
+        # Pillow only warns between MAX_IMAGE_PIXELS and twice that; refuse those images too
+        if Image.MAX_IMAGE_PIXELS:
+            max_pixels = min(max_pixels, Image.MAX_IMAGE_PIXELS)
+        try:
+            source = Image.open(FileService.path_for(key))
+        except Image.DecompressionBombError as e:
+            raise OSError(str(e)) from e
+        with source:
+            width, height = source.size
+            if width * height > max_pixels:
+                raise OSError(f"Image has {width * height} pixels, more than the {max_pixels} allowed")
+            if source.getexif().get(0x0112) in _ROTATED_ORIENTATIONS:
+                width, height = height, width
+            source_format = source.format
+            source.draft('RGB', (largest, largest))
+            image = ImageOps.exif_transpose(source)
+        return image, width, height, source_format
+
+    @staticmethod
+    def _encode(image, pillow_format, options) -> bytes:
+        if pillow_format == 'JPEG' and image.mode == 'RGBA':
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        buffer = io.BytesIO()
+        image.save(buffer, pillow_format, **options)
+        return buffer.getvalue()
+
+    @staticmethod
+    def info(key: str) -> Optional[dict]:
+        """Info recorded by process(), or None if it has not run yet or failed."""
+        data = FileService.read_derived_info(key)
+        info = json.loads(data) if data is not None else None
+        return None if info is None or 'error' in info else info
+
+    @staticmethod
+    def process_async(key: str):
+        """Run process(key) in the background pool; returns its Future."""
+        app = current_app._get_current_object()
+
+        def run():
+            with app.app_context():
+                try:
+                    return ImageService.process(key)
+                except Exception:
+                    logger.exception("Thumbnail generation failed", extra={'event': 'thumbnail_failed', 'key': key})
+                    return None
+
+        return ImageService._pool(app).submit(run)
+
+    @staticmethod
+    def _pool(app):
+        # A pool's threads do not survive fork, so each worker starts its own
+        pid = os.getpid()
+        with ImageService._lock:
+            if ImageService._executor is None or ImageService._executor_pid != pid:
+                ImageService._executor = ThreadPoolExecutor(
+                    max_workers=app.config.get('IMAGE_WORKERS', 2),
+                    thread_name_prefix='thumbnails'
+                )
+                ImageService._executor_pid = pid
+            return ImageService._executor
@@ -0,0 +1,202 @@
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+from flask import current_app
+from sqlalchemy import case, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.db import db
+from app.models.user import LoginAttempt
+from app.utils.cache import TTLCache
+
+
+class LoginAttemptService:
+    """
+    Tracks failed logins per email and per IP with exponential backoff.
+
+    Lockout state is checked from process memory first so throttled attempts
+    are rejected without touching the database or bcrypt. Failures are
+    written through to the login_attempts table, which other workers and
+    restarted processes load on a cache miss.
+
+    Only failures within LOGIN_THROTTLE_WINDOW_SECONDS of each other count:
+    a key whose last failure is older starts again from one. Rows idle for
+    longer than the window are deleted every LOGIN_THROTTLE_CLEANUP_SECONDS.
+    """
+
+    _states = TTLCache(max_entries=100000)
+    _next_cleanup = 0.0
+
+    @staticmethod
+    def email_key(email: str) -> str:
+        return f"email:{email.strip().lower()}"
+
+    @staticmethod
+    def ip_key(ip: str) -> str:
+        return f"ip:{ip}"
+
+    @staticmethod
+    def backoff_seconds(failures: int, free_attempts: int) -> int:
+        """
+        Lockout length after the given number of consecutive failures.
+
+        Args:
+            failures: Consecutive failed attempts
+            free_attempts: Failures allowed before any lockout
+
+        Returns:
+            Seconds to lock out for, 0 while under the free allowance
+        """
+        if failures < free_attempts:
+            return 0
+        base = current_app.config.get('LOGIN_THROTTLE_BASE_DELAY_SECONDS', 1)
+        maximum = current_app.config.get('LOGIN_THROTTLE_MAX_DELAY_SECONDS', 900)
+        # Cap the exponent so huge failure counts cannot overflow
+        return min(base * 2 ** min(failures - free_attempts, 32), maximum)
+
+    @staticmethod
+    def retry_after(email: str, ip: Optional[str] = None) -> int:
+        """
+        Seconds until the email or IP may try again.
+
+        Args:
+            email: Email the attempt is for
+            ip: Client IP address (optional)
+
+        Returns:
+            0 if the attempt may proceed
+        """
+        now = datetime.utcnow()
+        wait = 0
+        for key in LoginAttemptService._keys(email, ip):
+            _, locked_until = LoginAttemptService._state(key)
+            if locked_until and locked_until > now:
+                wait = max(wait, int((locked_until - now).total_seconds()) + 1)
+        return wait
+
+    @staticmethod
+    def record_failure(email: str, ip: Optional[str] = None) -> None:
+        """
+        Count a failed attempt against the email and IP.
+
+        Args:
+            email: Email the attempt was for
+            ip: Client IP address (optional)
+        """
+        now = datetime.utcnow()
+        window_start = LoginAttemptService._window_start(now)
+        try:
+            for key in LoginAttemptService._keys(email, ip):
+                if key.startswith('ip:'):
+                    free_attempts = current_app.config.get('LOGIN_THROTTLE_FREE_ATTEMPTS_IP', 20)
+                else:
+                    free_attempts = current_app.config.get('LOGIN_THROTTLE_FREE_ATTEMPTS_EMAIL', 5)
+
+                failures = LoginAttemptService._increment(key, now, window_start)
+                lockout = LoginAttemptService.backoff_seconds(failures, free_attempts)
+                locked_until = now + timedelta(seconds=lockout) if lockout else None
+                if locked_until:
+                    # A concurrent failure may already have set a longer lockout
+                    db.session.execute(
+                        update(LoginAttempt)
+                        .where(LoginAttempt.key == key)
+                        .where(or_(LoginAttempt.locked_until.is_(None), LoginAttempt.locked_until < locked_until))
+                        .values(locked_until=locked_until)
+                        .execution_options(synchronize_session=False)
+                    )
+                LoginAttemptService._remember(key, failures, locked_until)
+            # Committed right away, not with the request, which ends in a 401
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to persist login attempt: {str(e)}")
+            return
+
+        LoginAttemptService._cleanup_if_due(window_start)
+
+    @staticmethod
+    def record_success(email: str) -> None:
+        """
+        Clear the failure history of an email after a successful login.
+
+        IP history is kept so one valid account cannot reset a stuffing run.
+
+        Args:
+            email: Email that logged in
+        """
+        key = LoginAttemptService.email_key(email)
+        failures, _ = LoginAttemptService._state(key)
+        LoginAttemptService._remember(key, 0, None)
+        if failures:
+            try:
+                LoginAttempt.query.filter_by(key=key).delete(synchronize_session=False)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Failed to clear login attempts: {str(e)}")
+
+    @staticmethod
+    def reset() -> None:
+        LoginAttemptService._states.clear()
+        LoginAttemptService._next_cleanup = 0.0
+
+    @staticmethod
+    def _keys(email, ip):
+        keys = [LoginAttemptService.email_key(email)]
+        if ip:
+            keys.append(LoginAttemptService.ip_key(ip))
+        return keys
+
+    @staticmethod
+    def _window_start(now):
+        return now - timedelta(seconds=current_app.config.get('LOGIN_THROTTLE_WINDOW_SECONDS', 3600))
+
+    @staticmethod
+    def _increment(key, now, window_start):
+        """Add one failure to key in a single upsert and return the new count."""
+        table = LoginAttempt.__table__
+        dialect = db.session.get_bind(LoginAttempt).dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        statement = insert(table).values(key=key, failures=1, last_failure_at=now)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={
+                # Failures older than the window are forgotten rather than added to
+                'failures': case((table.c.last_failure_at < window_start, 1), else_=table.c.failures + 1),
+                'last_failure_at': now
+            }
+        ).returning(table.c.failures)
+        return db.session.execute(statement).scalar_one()
+
+    @staticmethod
+    def _cleanup_if_due(window_start):
+        interval = current_app.config.get('LOGIN_THROTTLE_CLEANUP_SECONDS', 3600)
+        if time.monotonic() < LoginAttemptService._next_cleanup:
+            return
+        LoginAttemptService._next_cleanup = time.monotonic() + interval
+        try:
+            LoginAttempt.cleanup_stale(window_start)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to clean up login attempts: {str(e)}")
+
+    @staticmethod
+    def _state(key):
+        state = LoginAttemptService._states.get(key)
+        if state is None:
+            attempt = LoginAttempt.find_by_key(key)
+            if attempt is None or attempt.last_failure_at < LoginAttemptService._window_start(datetime.utcnow()):
+                state = (0, attempt.locked_until if attempt else None)
+            else:
+                state = (attempt.failures, attempt.locked_until)
+            LoginAttemptService._remember(key, *state)
+        return state
+
+    @staticmethod
+    def _remember(key, failures, locked_until):
+        # Keep locked keys in memory for the whole lockout so rejections
+        # never reach the database
+        ttl = current_app.config.get('LOGIN_THROTTLE_CACHE_SECONDS', 30)
+        if locked_until:
+            ttl = max(ttl, (locked_until - datetime.utcnow()).total_seconds())
+        LoginAttemptService._states.set(key, (failures, locked_until), ttl)
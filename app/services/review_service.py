@@ -1,5 +1,10 @@
+import hashlib
+from sqlalchemy import select, update, delete, func
 from app.db import db
 from app.models.review import Review
+from app.utils.response_cache import invalidate_tags
+
+MODERATION_ACTIONS = ('flag', 'unflag', 'delete')
 
 class ReviewService:
     @staticmethod
@@ -15,6 +20,7 @@ class ReviewService:
         )
         db.session.add(review)
         db.session.commit()
+        invalidate_tags(f"hostel:{hostel_id}")
         return review
 
     @staticmethod
@@ -22,9 +28,125 @@ class ReviewService:
         review = Review.query.get_or_404(review_id)
         review.is_flagged = True
         db.session.commit()
+        invalidate_tags(f"hostel:{review.hostel_id}")
         return review
 
     @staticmethod
     def get_reviews_by_hostel(hostel_id):
         reviews = Review.query.filter_by(hostel_id=hostel_id).all()
         return reviews
+
+    @staticmethod
+    def list_version(query):
+        """
+        Value that changes whenever the reviews matched by query do.
+
+        Reviews are never edited, only added, deleted, flagged or
+        unflagged. The count and newest id cover additions and deletions.
+        The flagged ids are hashed as a set, because sums of ids can
+        collide (flagging 5 sums like flagging 2 and 3).
+        """
+        count, newest = query.order_by(None).with_entities(func.count(Review.id), func.max(Review.id)).one()
+        flagged = query.filter(Review.is_flagged.is_(True)).order_by(None).with_entities(Review.id)
+        digest = hashlib.blake2b(digest_size=8)
+        for (review_id,) in flagged.order_by(Review.id):
+            digest.update(b'%d,' % review_id)
+        return count, newest, digest.hexdigest()
+
+    @staticmethod
+    def get_rating_summaries(hostel_ids):
+        """Average rating and review count per hostel, ignoring flagged reviews."""
+        hostel_ids = [hostel_id for hostel_id in set(hostel_ids) if hostel_id is not None]
+        if not hostel_ids:
+            return {}
+
+        rows = db.session.execute(
+            select(Review.hostel_id, func.count(Review.id), func.avg(Review.rating))
+            .where(Review.hostel_id.in_(hostel_ids), Review.is_flagged.is_not(True))
+            .group_by(Review.hostel_id)
+        ).all()
+
+        summaries = {hostel_id: {'review_count': 0, 'average_rating': None} for hostel_id in hostel_ids}
+        for hostel_id, review_count, average_rating in rows:
+            summaries[hostel_id] = {
+                'review_count': review_count,
+                'average_rating': round(float(average_rating), 2) if average_rating is not None else None
+            }
+        return summaries
+
+    @staticmethod
+    def _moderation_criteria(action, review_ids=None, user_id=None, hostel_id=None, comment_contains=None):
+        criteria = []
+        if review_ids:
+            criteria.append(Review.id.in_(review_ids))
+        if user_id is not None:
+            criteria.append(Review.user_id == user_id)
+        if hostel_id is not None:
+            criteria.append(Review.hostel_id == hostel_id)
+        if comment_contains:
+            # autoescape so % and _ in the input match literally, not as wildcards
+            criteria.append(Review.comment.icontains(comment_contains, autoescape=True))
+
+        # Refuse to moderate the whole table by accident
+        if not criteria:
+            raise ValueError("At least one of review_ids, user_id, hostel_id or comment_contains is required")
+
+        # Only count rows whose state would actually change
+        if action == 'flag':
+            criteria.append(Review.is_flagged.is_not(True))
+        elif action == 'unflag':
+            criteria.append(Review.is_flagged.is_(True))
+        return criteria
+
+    @staticmethod
+    def bulk_moderate(action, review_ids=None, user_id=None, hostel_id=None,
+                      comment_contains=None, dry_run=False):
+        """
+        Flag, unflag or delete every review matching the given filters.
+
+        Each action runs as one UPDATE/DELETE statement. With dry_run the
+        matching rows are only counted and nothing is written.
+        """
+        if action not in MODERATION_ACTIONS:
+            raise ValueError(f"Action must be one of: {', '.join(MODERATION_ACTIONS)}")
+
+        criteria = ReviewService._moderation_criteria(
+            action,
+            review_ids=review_ids,
+            user_id=user_id,
+            hostel_id=hostel_id,
+            comment_contains=comment_contains
+        )
+
+        if dry_run:
+            matched = db.session.execute(
+                select(func.count(Review.id)).where(*criteria)
+            ).scalar()
+            return {'action': action, 'dry_run': True, 'matched': matched}
+
+        hostel_ids = db.session.execute(
+            select(Review.hostel_id).where(*criteria).distinct()
+        ).scalars().all()
+
+        if action == 'delete':
+            stmt = delete(Review).where(*criteria)
+        else:
+            stmt = update(Review).where(*criteria).values(is_flagged=(action == 'flag'))
+
+        try:
+            result = db.session.execute(stmt.execution_options(synchronize_session=False))
+            # Recompute the affected hostels' ratings before committing so the
+            # summaries returned match what was written
+            ratings = ReviewService.get_rating_summaries(hostel_ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        invalidate_tags(*(f"hostel:{hostel_id}" for hostel_id in hostel_ids))
+        return {
+            'action': action,
+            'dry_run': False,
+            'matched': result.rowcount,
+            'ratings': ratings
+        }
@@ -0,0 +1,449 @@
+"""
+User search backends.
+
+On PostgreSQL with the pg_trgm extension, substring searches are answered
+from a trigram GIN index and ranked by similarity. Elsewhere (SQLite in
+development) an in-process n-gram index over active users is used, kept in
+sync with committed User changes.
+"""
+import threading
+import time
+from datetime import datetime
+from bisect import bisect_left, insort
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import event, func, inspect, select, case, false, text
+from sqlalchemy.orm import Session, object_session
+from app.db import db
+from app.models.user import User
+
+_PENDING_CHANGES_KEY = 'user_index_changes'
+_change_listeners = []
+
+WORD_SEPARATORS = ' .@_-+'
+
+# User columns read into index documents; changing any of them bumps search_updated_at
+INDEXED_FIELDS = ('email', 'first_name', 'last_name', 'is_active', 'created_at')
+
+
+def normalize(value):
+    """Lower-case and trim a value for indexing and matching."""
+    return (value or '').strip().lower()
+
+
+def user_document(user):
+    """Snapshot of the indexed fields of a user, or None if not searchable."""
+    if not user.is_active:
+        return None
+    return {
+        'id': user.id,
+        'email': normalize(user.email),
+        'first_name': normalize(user.first_name),
+        'last_name': normalize(user.last_name),
+        'name': f"{user.first_name} {user.last_name}",
+        'created_at': user.created_at.timestamp() if user.created_at else 0.0,
+        'search_updated_at': user.search_updated_at
+    }
+
+
+def documents_signature(docs):
+    """(count, max id, max search_updated_at) of docs, as _ensure_index reads it from the table."""
+    count, max_id, max_updated = 0, None, None
+    for doc in docs:
+        count += 1
+        if max_id is None or doc['id'] > max_id:
+            max_id = doc['id']
+        updated = doc.get('search_updated_at')
+        if updated is not None and (max_updated is None or updated > max_updated):
+            max_updated = updated
+    return count, max_id, max_updated
+
+
+def _indexed_fields_changed(user):
+    state = inspect(user)
+    return any(state.attrs[field].history.has_changes() for field in INDEXED_FIELDS)
+
+
+def register_user_change_listener(listener):
+    """
+    Call listener(changes) after each commit that touched users.
+
+    changes maps user id to its new document, or None when the user was
+    deleted or deactivated.
+    """
+    if listener not in _change_listeners:
+        _change_listeners.append(listener)
+
+
+@event.listens_for(User, 'before_insert')
+@event.listens_for(User, 'before_update')
+def _stamp_search_change(mapper, connection, target):
+    if inspect(target).pending or _indexed_fields_changed(target):
+        target.search_updated_at = datetime.utcnow()
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_update')
+def _capture_user_change(mapper, connection, target):
+    # _stamp_search_change only bumps this when a document changes; a login does not
+    if not inspect(target).attrs.search_updated_at.history.has_changes():
+        return
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_CHANGES_KEY, {})[target.id] = user_document(target)
+
+
+@event.listens_for(User, 'after_delete')
+def _capture_user_delete(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_CHANGES_KEY, {})[target.id] = None
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_user_changes(session):
+    changes = session.info.pop(_PENDING_CHANGES_KEY, None)
+    if changes:
+        for listener in _change_listeners:
+            listener(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_changes(session):
+    session.info.pop(_PENDING_CHANGES_KEY, None)
+
+
+def _rank(doc, term):
+    """Lower is better: exact match, prefix, word start, then any substring."""
+    full_name = f"{doc['first_name']} {doc['last_name']}"
+    fields = (doc['email'], doc['first_name'], doc['last_name'], full_name)
+
+    if term in fields:
+        return 0
+    if any(field.startswith(term) for field in fields):
+        return 1
+    for field in fields:
+        position = field.find(term)
+        while position > 0:
+            if field[position - 1] in WORD_SEPARATORS:
+                return 2
+            position = field.find(term, position + 1)
+    return 3
+
+
+class NGramIndex:
+    """Substring index mapping character n-grams to user documents."""
+
+    def __init__(self, n=3):
+        self.n = n
+        self._postings = defaultdict(set)
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _grams(self, value):
+        return {value[i:i + self.n] for i in range(len(value) - self.n + 1)}
+
+    def _haystack(self, doc):
+        # The NUL separator keeps n-grams from spanning name and email
+        return f"{doc['first_name']} {doc['last_name']}\x00{doc['email']}"
+
+    def _add(self, doc):
+        self._remove(doc['id'])
+        self._docs[doc['id']] = doc
+        for gram in self._grams(self._haystack(doc)):
+            self._postings[gram].add(doc['id'])
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        for gram in self._grams(self._haystack(doc)):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def rebuild(self, docs):
+        with self._lock:
+            self._postings = defaultdict(set)
+            self._docs = {}
+            for doc in docs:
+                self._add(doc)
+
+    def apply(self, changes):
+        """Apply a {doc_id: doc or None} mapping of changes."""
+        with self._lock:
+            for doc_id, doc in changes.items():
+                if doc is None:
+                    self._remove(doc_id)
+                else:
+                    self._add(doc)
+
+    def signature(self):
+        with self._lock:
+            return documents_signature(self._docs.values())
+
+    def search(self, term, limit=None):
+        """Return ids of documents containing term, best matches first."""
+        term = normalize(term)
+        if not term:
+            return []
+
+        with self._lock:
+            grams = self._grams(term)
+            if grams:
+                postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+                candidates = postings[0].intersection(*postings[1:])
+            else:
+                # Shorter than one n-gram, nothing to narrow on
+                candidates = self._docs.keys()
+
+            matches = []
+            for doc_id in candidates:
+                doc = self._docs[doc_id]
+                if term in self._haystack(doc):
+                    matches.append((_rank(doc, term), -doc['created_at'], -doc_id))
+
+        matches.sort()
+        if limit is not None:
+            matches = matches[:limit]
+        return [-doc_id for _, _, doc_id in matches]
+
+
+class PrefixIndex:
+    """Sorted (key, id) array answering prefix lookups with bisect."""
+
+    def __init__(self):
+        self._entries = []
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    @staticmethod
+    def _keys(doc):
+        first_name, last_name = doc['first_name'], doc['last_name']
+        return {doc['email'], first_name, last_name, f"{first_name} {last_name}", f"{last_name} {first_name}"}
+
+    def _add(self, doc):
+        self._remove(doc['id'])
+        self._docs[doc['id']] = doc
+        for key in self._keys(doc):
+            insort(self._entries, (key, doc['id']))
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        for key in self._keys(doc):
+            position = bisect_left(self._entries, (key, doc_id))
+            if position < len(self._entries) and self._entries[position] == (key, doc_id):
+                del self._entries[position]
+
+    def rebuild(self, docs):
+        with self._lock:
+            self._docs = {doc['id']: doc for doc in docs}
+            self._entries = sorted(
+                (key, doc['id']) for doc in self._docs.values() for key in self._keys(doc)
+            )
+
+    def apply(self, changes):
+        """Apply a {doc_id: doc or None} mapping of changes."""
+        with self._lock:
+            for doc_id, doc in changes.items():
+                if doc is None:
+                    self._remove(doc_id)
+                else:
+                    self._add(doc)
+
+    def signature(self):
+        with self._lock:
+            return documents_signature(self._docs.values())
+
+    def search(self, prefix, limit=10):
+        """Return up to limit documents with a key starting with prefix."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        with self._lock:
+            # (prefix,) sorts before every (key, id) whose key starts with prefix
+            position = bisect_left(self._entries, (prefix,))
+            while position < len(self._entries) and len(results) < limit:
+                key, doc_id = self._entries[position]
+                if not key.startswith(prefix):
+                    break
+                if doc_id not in seen:
+                    seen.add(doc_id)
+                    results.append(self._docs[doc_id])
+                position += 1
+        return results
+
+
+class UserSearchService:
+    """Ranked substring search and prefix suggestions over active users."""
+
+    _indexes = {'ngram': NGramIndex(), 'prefix': PrefixIndex()}
+    _lock = threading.Lock()
+    _synced_at = {}
+    _signatures = {}
+    _pg_trgm_available = None
+
+    @staticmethod
+    def search_expression():
+        # Must match idx_user_search_trgm (migration 7c0dbafbbf3c) exactly
+        return func.lower(User.first_name + ' ' + User.last_name + ' ' + User.email)
+
+    @classmethod
+    def backend(cls):
+        """Resolve the configured backend: 'trigram', 'ngram' or 'ilike'."""
+        configured = current_app.config.get('USER_SEARCH_BACKEND', 'auto')
+        if configured != 'auto':
+            return configured
+
+        if db.engine.dialect.name != 'postgresql':
+            return 'ngram'
+
+        if cls._pg_trgm_available is None:
+            try:
+                cls._pg_trgm_available = db.session.execute(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                ).first() is not None
+            except Exception:
+                db.session.rollback()
+                cls._pg_trgm_available = False
+        return 'trigram' if cls._pg_trgm_available else 'ilike'
+
+    @classmethod
+    def apply(cls, query, term, limit=None, rank=True):
+        """
+        Filter a User query to rows matching term, ordered by relevance.
+
+        Callers may add further order_by clauses as tie-breakers. limit is a
+        hint that lets the in-process index hand back fewer ids. Pass
+        rank=False to filter only, e.g. for keyset pagination.
+        """
+        backend = cls.backend()
+
+        if backend == 'trigram':
+            query = cls._filter_substring(query, term)
+            if rank:
+                query = query.order_by(func.similarity(cls.search_expression(), normalize(term)).desc())
+            return query
+
+        if backend == 'ngram':
+            # The ids become an IN list and a CASE with one branch each, so a
+            # short or common term matching more than this filters in SQL instead
+            max_ids = current_app.config.get('USER_SEARCH_MAX_CANDIDATES', 1000)
+            ids = cls._ensure_index('ngram').search(term, limit=min(limit or max_ids + 1, max_ids + 1))
+            if not ids:
+                return query.filter(false())
+            if len(ids) <= max_ids:
+                query = query.filter(User.id.in_(ids))
+                if rank:
+                    ranking = case({user_id: position for position, user_id in enumerate(ids)}, value=User.id)
+                    query = query.order_by(ranking)
+                return query
+
+        return cls._filter_substring(query, term)
+
+    @classmethod
+    def _filter_substring(cls, query, term):
+        """Rows whose name or email contains term, with LIKE wildcards taken literally."""
+        escaped = normalize(term).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return query.filter(cls.search_expression().like(f"%{escaped}%", escape='\\'))
+
+    @classmethod
+    def suggest(cls, prefix, limit=10):
+        """Typeahead suggestions for users whose name or email starts with prefix."""
+        return [
+            {'id': doc['id'], 'full_name': doc['name'], 'email': doc['email']}
+            for doc in cls._ensure_index('prefix').search(prefix, limit=limit)
+        ]
+
+    @classmethod
+    def warm(cls):
+        """Build the in-process indexes ahead of the first request."""
+        cls._ensure_index('prefix')
+        if cls.backend() == 'ngram':
+            cls._ensure_index('ngram')
+
+    @classmethod
+    def invalidate(cls):
+        """Force a signature check on the next lookup, e.g. after bulk SQL."""
+        cls._synced_at.clear()
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            for index in cls._indexes.values():
+                index.rebuild([])
+            cls._synced_at.clear()
+            cls._signatures.clear()
+            cls._pg_trgm_available = None
+
+    @classmethod
+    def _ensure_index(cls, name):
+        # Other workers' writes never reach this process's listeners, so
+        # periodically compare a cheap signature of the table and rebuild
+        # when it has moved. The signature only covers what the index reads
+        # (search_updated_at, not updated_at, which every login bumps)
+        index = cls._indexes[name]
+        interval = current_app.config.get('USER_SEARCH_REFRESH_SECONDS', 60)
+        now = time.monotonic()
+        synced_at = cls._synced_at.get(name)
+        if synced_at is not None and now - synced_at < interval:
+            return index
+
+        with cls._lock:
+            synced_at = cls._synced_at.get(name)
+            if synced_at is not None and now - synced_at < interval:
+                return index
+            signature = tuple(db.session.execute(
+                select(func.count(User.id), func.max(User.id), func.max(User.search_updated_at))
+                .where(User.is_active.is_(True))
+            ).one())
+            if signature != cls._signatures.get(name):
+                index.rebuild(cls._load_documents())
+                cls._signatures[name] = signature
+            cls._synced_at[name] = now
+        return index
+
+    @staticmethod
+    def _load_documents():
+        rows = db.session.execute(
+            select(User.id, User.email, User.first_name, User.last_name, User.is_active, User.created_at,
+                   User.search_updated_at)
+            .where(User.is_active.is_(True))
+        ).all()
+        return [user_document(row) for row in rows]
+
+    @classmethod
+    def _on_user_changes(cls, changes):
+        for name, index in cls._indexes.items():
+            # Indexes that were never built load everything on first use
+            if name in cls._signatures:
+                index.apply(changes)
+                # The table now matches the index again, so the next check
+                # does not mistake this worker's own write for someone else's
+                cls._signatures[name] = index.signature()
+
+
+def init_search_indexes(app):
+    """Warm the user search indexes at startup."""
+    with app.app_context():
+        try:
+            UserSearchService.warm()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f"User search indexes not warmed: {e}")
+
+
+register_user_change_listener(UserSearchService._on_user_changes)
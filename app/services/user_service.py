@@ -1,18 +1,35 @@
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from fastapi import HTTPException, status
+from sqlalchemy import and_, case, func
 
-from app.db import User
-from ..utils.validators import validate_email
-from ..utils.security import get_password_hash
+from app.models.user import User
+from app.config import Config
+from ..utils.cache import TTLCache
+from ..utils.exceptions import BadRequestError, NotFoundError
+from ..utils.helpers import invalidate_cached_counts
+from .auth_service import AuthService
+from .search_service import UserSearchService
 from datetime import timedelta
 
+# Dashboard statistics snapshots, shared by every UserService in the process
+_stats_cache = TTLCache()
+
+# Ids per UPDATE ... WHERE id IN (...), well under driver parameter limits
+BULK_UPDATE_CHUNK_SIZE = 500
+
+
+def invalidate_user_stats() -> None:
+    """Drop cached user statistics so the next call recomputes them."""
+    _stats_cache.clear()
+
 
 class UserService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, stats_cache_ttl: Optional[int] = None):
         self.db = db
+        self.stats_cache_ttl = (
+            Config.USER_STATS_CACHE_SECONDS if stats_cache_ttl is None else stats_cache_ttl
+        )
 
     def get_user_by_id(self, user_id: int) -> Optional[User]:
         """
@@ -49,21 +66,17 @@ class UserService:
             Dict containing user profile data
             
         Raises:
-            HTTPException: If user not found
+            NotFoundError: If user not found
         """
         user = self.get_user_by_id(user_id)
         if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+            raise NotFoundError("User not found")
         
         return {
             "id": user.id,
             "email": user.email,
             "full_name": user.full_name,
             "is_active": user.is_active,
-            "last_login": user.last_login,
             "created_at": user.created_at,
             "updated_at": user.updated_at
         }
@@ -82,38 +95,30 @@ class UserService:
             Dict containing updated user profile data
             
         Raises:
-            HTTPException: If user not found or email already exists
+            NotFoundError: If user not found
+            BadRequestError: If the email is invalid or already taken
         """
         user = self.get_user_by_id(user_id)
         if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+            raise NotFoundError("User not found")
         
         # Update full name if provided
         if full_name is not None:
-            user.full_name = full_name.strip()
+            user.first_name, _, user.last_name = full_name.strip().partition(' ')
         
         # Update email if provided
         if email is not None:
             email = email.lower()
             
             # Validate email format
-            if not validate_email(email):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Invalid email format"
-                )
+            if not AuthService.validate_email(email):
+                raise BadRequestError("Invalid email format")
             
             # Check if email is already taken by another user
             if email != user.email:
                 existing_user = self.get_user_by_email(email)
                 if existing_user:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Email already taken"
-                    )
+                    raise BadRequestError("Email already taken")
                 user.email = email
         
         # Update timestamp
@@ -126,7 +131,6 @@ class UserService:
             "email": user.email,
             "full_name": user.full_name,
             "is_active": user.is_active,
-            "last_login": user.last_login,
             "created_at": user.created_at,
             "updated_at": user.updated_at
         }
@@ -142,14 +146,11 @@ class UserService:
             Dict with success message
             
         Raises:
-            HTTPException: If user not found
+            NotFoundError: If user not found
         """
         user = self.get_user_by_id(user_id)
         if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+            raise NotFoundError("User not found")
         
         # Soft delete by deactivating the account
         user.is_active = False
@@ -184,7 +185,6 @@ class UserService:
                 "email": user.email,
                 "full_name": user.full_name,
                 "is_active": user.is_active,
-                "last_login": user.last_login,
                 "created_at": user.created_at,
                 "updated_at": user.updated_at
             }
@@ -208,10 +208,7 @@ class UserService:
         users = self.db.query(User).filter(
             and_(
                 User.is_active == True,
-                or_(
-                    User.email.ilike(search_term),
-                    User.full_name.ilike(search_term)
-                )
+                UserSearchService.search_expression().like(search_term)
             )
         ).offset(skip).limit(limit).all()
         
@@ -221,7 +218,6 @@ class UserService:
                 "email": user.email,
                 "full_name": user.full_name,
                 "is_active": user.is_active,
-                "last_login": user.last_login,
                 "created_at": user.created_at,
                 "updated_at": user.updated_at
             }
@@ -260,31 +256,26 @@ class UserService:
             Dict containing new user data
             
         Raises:
-            HTTPException: If validation fails or user already exists
+            BadRequestError: If validation fails or user already exists
         """
         # Validate email
-        if not validate_email(email):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid email format"
-            )
+        if not AuthService.validate_email(email):
+            raise BadRequestError("Invalid email format")
         
         # Check if user already exists
         existing_user = self.get_user_by_email(email)
         if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User with this email already exists"
-            )
+            raise BadRequestError("User with this email already exists")
         
         # Create new user
-        hashed_password = get_password_hash(password)
+        first_name, _, last_name = full_name.strip().partition(' ')
         new_user = User(
             email=email.lower(),
-            hashed_password=hashed_password,
-            full_name=full_name.strip(),
+            first_name=first_name,
+            last_name=last_name,
             is_active=is_active
         )
+        new_user.set_password(password)
         
         self.db.add(new_user)
         self.db.commit()
@@ -311,14 +302,11 @@ class UserService:
             Dict containing updated user data
             
         Raises:
-            HTTPException: If user not found
+            NotFoundError: If user not found
         """
         user = self.get_user_by_id(user_id)
         if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+            raise NotFoundError("User not found")
         
         user.is_active = is_active
         user.updated_at = datetime.utcnow()
@@ -330,84 +318,127 @@ class UserService:
             "email": user.email,
             "full_name": user.full_name,
             "is_active": user.is_active,
-            "last_login": user.last_login,
             "created_at": user.created_at,
             "updated_at": user.updated_at
         }
 
-    def get_user_stats(self) -> Dict[str, Any]:
+    def get_user_stats(self, days: int = 30) -> Dict[str, Any]:
         """
-        Get user statistics.
+        Get user statistics for the admin dashboard.
+        
+        The snapshot is cached for stats_cache_ttl seconds.
         
+        Args:
+            days: Size of the recent-activity window and registration series
+            
         Returns:
-            Dict containing user statistics
+            Dict containing user statistics and a per-day registration series
         """
-        total_users = self.get_user_count(active_only=False)
-        active_users = self.get_user_count(active_only=True)
-        inactive_users = total_users - active_users
-        
-        # Get recent registrations (last 30 days)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_registrations = self.db.query(User).filter(
-            User.created_at >= thirty_days_ago
-        ).count()
-        
-        # Get recent logins (last 30 days)
-        recent_logins = self.db.query(User).filter(
-            and_(
-                User.last_login >= thirty_days_ago,
-                User.is_active == True
-            )
-        ).count()
+        return _stats_cache.get_or_set(
+            ("user_stats", days),
+            lambda: self._compute_user_stats(days),
+            self.stats_cache_ttl
+        )
+
+    def _compute_user_stats(self, days: int) -> Dict[str, Any]:
+        """
+        Compute user statistics with one aggregate query plus one grouped
+        query for the registration series.
+        """
+        now = datetime.utcnow()
+        since = now - timedelta(days=days)
+        
+        totals = self.db.query(
+            func.count(User.id),
+            func.sum(case((User.is_active == True, 1), else_=0)),
+            func.sum(case((User.created_at >= since, 1), else_=0))
+        ).one()
+        total_users, active_users, recent_registrations = (
+            int(value or 0) for value in totals
+        )
+        
+        # Registrations per day over the window, zero-filled
+        start_day = since.date()
+        registration_day = func.date(User.created_at)
+        counts_by_day = {
+            str(day): count
+            for day, count in self.db.query(registration_day, func.count(User.id))
+            .filter(User.created_at >= datetime.combine(start_day, datetime.min.time()))
+            .group_by(registration_day)
+            .all()
+        }
+        registrations_by_day = []
+        for offset in range((now.date() - start_day).days + 1):
+            day = (start_day + timedelta(days=offset)).isoformat()
+            registrations_by_day.append({"date": day, "count": counts_by_day.get(day, 0)})
         
         return {
             "total_users": total_users,
             "active_users": active_users,
-            "inactive_users": inactive_users,
+            "inactive_users": total_users - active_users,
             "recent_registrations": recent_registrations,
-            "recent_logins": recent_logins
+            "registrations_by_day": registrations_by_day,
+            "generated_at": now.isoformat()
         }
 
     def bulk_update_users(self, user_ids: List[int], 
-                         updates: Dict[str, Any]) -> Dict[str, Any]:
+                         updates: Dict[str, Any],
+                         chunk_size: int = BULK_UPDATE_CHUNK_SIZE) -> Dict[str, Any]:
         """
         Bulk update multiple users (admin function).
         
+        Runs one UPDATE ... WHERE id IN (...) per chunk of ids instead of
+        loading each user, then commits once.
+        
         Args:
             user_ids: List of user IDs to update
             updates: Dictionary of fields to update
+            chunk_size: Maximum number of ids per UPDATE statement
             
         Returns:
             Dict with update results
             
         Raises:
-            HTTPException: If invalid update fields provided
+            BadRequestError: If invalid update fields provided
         """
         # Validate update fields
-        allowed_fields = {"is_active", "full_name"}
+        allowed_fields = {"is_active", "first_name", "last_name"}
         invalid_fields = set(updates.keys()) - allowed_fields
         
         if invalid_fields:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid update fields: {', '.join(invalid_fields)}"
-            )
+            raise BadRequestError(f"Invalid update fields: {', '.join(invalid_fields)}")
         
-        # Update users
-        updated_count = 0
-        for user_id in user_ids:
-            user = self.get_user_by_id(user_id)
-            if user:
-                for field, value in updates.items():
-                    setattr(user, field, value)
-                user.updated_at = datetime.utcnow()
-                updated_count += 1
+        values = dict(updates)
+        values["updated_at"] = datetime.utcnow()
+        # Every allowed field is read by the search indexes
+        values["search_updated_at"] = values["updated_at"]
+        unique_ids = list(dict.fromkeys(user_ids))
         
-        self.db.commit()
+        # Update users chunk by chunk
+        updated_count = 0
+        chunk_counts = []
+        try:
+            for start in range(0, len(unique_ids), chunk_size):
+                chunk = unique_ids[start:start + chunk_size]
+                count = self.db.query(User).filter(User.id.in_(chunk)).update(
+                    values, synchronize_session=False
+                )
+                chunk_counts.append(count)
+                updated_count += count
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        # Bulk SQL bypasses ORM events, so drop anything derived from users
+        invalidate_user_stats()
+        invalidate_cached_counts()
+        UserSearchService.invalidate()
         
         return {
             "updated_count": updated_count,
             "total_requested": len(user_ids),
+            "chunk_counts": chunk_counts,
             "message": f"Successfully updated {updated_count} users"
         }
 
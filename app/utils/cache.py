@@ -0,0 +1,84 @@
+import threading
+import time
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache whose entries expire after a TTL in seconds.
+
+    With max_entries set, expired entries are purged once the cache is full
+    and the oldest entries are dropped if that is not enough.
+    """
+
+    def __init__(self, default_ttl=60, max_entries=None):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._entries.pop(key, None)
+            if self.max_entries is not None and len(self._entries) >= self.max_entries:
+                self._purge()
+            self._entries[key] = (value, time.monotonic() + ttl)
+
+    def _purge(self):
+        now = time.monotonic()
+        for key in [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        # Entries are kept in insertion order, so the first ones are the oldest
+        while len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Return the cached value for key, computing and storing it on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class LRUCache(TTLCache):
+    """
+    TTLCache that evicts the least recently used entries when full.
+
+    Every hit moves the entry to the end of the insertion order, so the
+    oldest-first eviction in _purge drops the coldest entries.
+    """
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            if entry[1] <= time.monotonic():
+                return default
+            self._entries[key] = entry
+            return entry[0]
@@ -5,5 +5,20 @@ USER_ROLES = {
 }
 
 ALLOWED_IMAGE_EXTENSIONS = {"png", "jpg", "jpeg"}
+# The same formats as detected from file content (magic bytes)
+ALLOWED_IMAGE_TYPES = {"png", "jpg"}
 MAX_UPLOAD_SIZE_MB = 5
+
+# Bounding boxes (px) of the thumbnails made for each uploaded image;
+# listings link the smallest
+THUMBNAIL_SIZES = (96, 320, 960)
+LIST_THUMBNAIL_SIZE = 96
 DEFAULT_PAGE_SIZE = 10
+
+# (max_requests, window_seconds) per client IP for abuse-prone endpoints
+RATE_LIMIT_BUDGETS = {
+    "login": (10, 60),
+    "register": (5, 3600),
+    "forgot_password": (5, 3600),
+    "mpesa_stk_push": (5, 60)
+}
@@ -0,0 +1,167 @@
+"""
+SQLAlchemy connection pool profiles and checkout metrics.
+
+Each gunicorn worker class needs a different pool shape:
+
+* ``sync``: one request at a time per worker, so one connection plus a spare
+* ``gthread``: one connection per thread (``GUNICORN_THREADS``)
+* ``gevent``: many greenlets share a small pool and queue briefly for it
+  instead of each opening a connection
+
+Connection counts are clamped so that ``workers * (pool_size + max_overflow)``
+stays within PostgreSQL ``max_connections`` minus a reserve for migrations,
+psql sessions and other services.
+"""
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from app.utils.metrics import DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUT_WAIT, DB_POOL_OVERFLOW, DB_POOL_SIZE, DB_POOL_TIMEOUTS
+
+POOL_PROFILES = {
+    'sync': {'pool_size': 1, 'max_overflow': 1, 'pool_timeout': 10},
+    # pool_size None means one connection per thread
+    'gthread': {'pool_size': None, 'max_overflow': 2, 'pool_timeout': 10},
+    'gevent': {'pool_size': 10, 'max_overflow': 5, 'pool_timeout': 5},
+}
+
+# Checkouts that wait longer than this are counted as slow
+SLOW_CHECKOUT_SECONDS = 0.1
+
+
+def engine_options(profile='sync', database_uri=None, threads=1, workers=1, max_connections=None,
+                   reserved_connections=5, recycle_seconds=1800, statement_timeout_ms=30000):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for a pooling profile.
+
+    Args:
+        profile: One of POOL_PROFILES
+        database_uri: Database URI; non-PostgreSQL databases keep driver defaults
+        threads: Threads per worker, used by the gthread profile
+        workers: Worker processes sharing the database
+        max_connections: PostgreSQL max_connections (optional)
+        reserved_connections: Connections kept free for everything else
+        recycle_seconds: Age after which connections are replaced
+        statement_timeout_ms: Server-side statement timeout, 0 to disable
+
+    Returns:
+        Engine options dict
+    """
+    if profile not in POOL_PROFILES:
+        raise ValueError(f"Unknown pool profile '{profile}', expected one of {', '.join(POOL_PROFILES)}")
+
+    # SQLite in development and tests picks its own pool
+    if database_uri and not database_uri.startswith('postgres'):
+        return {}
+
+    settings = POOL_PROFILES[profile]
+    pool_size = settings['pool_size'] or max(threads, 1)
+    max_overflow = settings['max_overflow']
+
+    if max_connections:
+        budget = max((max_connections - reserved_connections) // max(workers, 1), 1)
+        pool_size = min(pool_size, budget)
+        max_overflow = min(max_overflow, budget - pool_size)
+
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': settings['pool_timeout'],
+        'pool_recycle': recycle_seconds,
+        'pool_pre_ping': True,
+        # Reuse the most recent connection so idle extras age out via recycle
+        'pool_use_lifo': True,
+        'connect_args': {'connect_timeout': 10},
+    }
+    if statement_timeout_ms:
+        options['connect_args']['options'] = f"-c statement_timeout={statement_timeout_ms}"
+    return options
+
+
+class PoolMetrics:
+    """Running totals of pool checkout waits, timeouts and overflow."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.overflow_peak = 0
+
+    def record(self, waited, overflow, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if waited >= SLOW_CHECKOUT_SECONDS:
+                self.slow_checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def snapshot(self):
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'slow_checkouts': self.slow_checkouts,
+                'timeouts': self.timeouts,
+                'wait_ms_avg': round(self.wait_seconds_total / attempts * 1000, 3) if attempts else 0.0,
+                'wait_ms_max': round(self.wait_seconds_max * 1000, 3),
+                'overflow_peak': self.overflow_peak,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - started, max(self.overflow(), 0), timed_out=True)
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        waited = time.perf_counter() - started
+        self.metrics.record(waited, max(self.overflow(), 0))
+        DB_POOL_CHECKOUT_WAIT.observe(waited)
+        return connection
+
+
+def pool_stats(engine):
+    """Current size, usage and checkout metrics of an engine's pool."""
+    pool = engine.pool
+    stats = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'checked_in': pool.checkedin(),
+            'checked_out': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+        })
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
+
+
+def export_pool_gauges(engines):
+    """Publish pool usage of {bind name: engine} to the shared metrics."""
+    for bind, engine in engines.items():
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            continue
+        bind = bind or 'primary'
+        DB_POOL_SIZE.set(pool.size(), bind=bind)
+        DB_POOL_CHECKED_OUT.set(pool.checkedout(), bind=bind)
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0), bind=bind)
@@ -0,0 +1,145 @@
+"""
+Read-replica routing for the Flask-SQLAlchemy session.
+
+Replica URLs from DATABASE_REPLICA_URLS are registered as binds named
+``replica_0``, ``replica_1``, ... Views decorated with ``@use_read_replica``
+read from a healthy replica on GET and HEAD requests. Everything else stays on
+the primary, and once a session writes anything its later reads in the same
+request stay on the primary as well, so a request always sees its own writes.
+
+Replicas whose replay lag exceeds DB_REPLICA_MAX_LAG_SECONDS, or that cannot
+be reached, are skipped until the next health check.
+"""
+import random
+import threading
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND_PREFIX = 'replica_'
+READ_ONLY_METHODS = ('GET', 'HEAD')
+
+# Zero when the replica has replayed everything it received, so an idle
+# primary does not look like lag
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def replica_binds(urls):
+    """SQLALCHEMY_BINDS entries for a comma-separated list of replica URLs."""
+    urls = [url.strip() for url in (urls or '').split(',') if url.strip()]
+    return {f"{REPLICA_BIND_PREFIX}{position}": url for position, url in enumerate(urls)}
+
+
+def use_read_replica(fn):
+    """Let a read-only view run its queries on a read replica."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        g.db_read_replica = True
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+class ReplicaHealth:
+    """Caches whether each replica is reachable and within the allowed lag."""
+
+    def __init__(self):
+        self._checks = {}
+        self._lock = threading.Lock()
+
+    def is_healthy(self, key, engine):
+        interval = current_app.config.get('DB_REPLICA_CHECK_SECONDS', 5)
+        now = time.monotonic()
+        check = self._checks.get(key)
+        if check is not None and now < check['next_check']:
+            return check['healthy']
+
+        with self._lock:
+            check = self._checks.get(key)
+            if check is not None and now < check['next_check']:
+                return check['healthy']
+            check = self._check(engine)
+            # An unreachable replica is retried less often, since every check
+            # can cost a full connect timeout
+            check['next_check'] = now + (interval if check['error'] is None else max(interval, 30))
+            self._checks[key] = check
+        return check['healthy']
+
+    def _check(self, engine):
+        max_lag = current_app.config.get('DB_REPLICA_MAX_LAG_SECONDS', 5)
+        try:
+            with engine.connect() as connection:
+                if engine.dialect.name == 'postgresql':
+                    lag = float(connection.execute(REPLICA_LAG_SQL).scalar() or 0)
+                else:
+                    connection.execute(text('SELECT 1'))
+                    lag = 0.0
+        except Exception as e:
+            current_app.logger.warning(f"Read replica {engine.url.host or engine.url.database} unavailable: {e}")
+            return {'healthy': False, 'lag_seconds': None, 'error': str(e)}
+        return {'healthy': lag <= max_lag, 'lag_seconds': lag, 'error': None}
+
+    def status(self, key):
+        check = self._checks.get(key)
+        if check is None:
+            return {'healthy': None, 'lag_seconds': None, 'error': None}
+        return {name: check[name] for name in ('healthy', 'lag_seconds', 'error')}
+
+    def reset(self):
+        with self._lock:
+            self._checks.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+def replica_engines(db):
+    """Replica engines keyed by bind name."""
+    return {key: engine for key, engine in db.engines.items() if key and key.startswith(REPLICA_BIND_PREFIX)}
+
+
+class RoutingSession(Session):
+    """Session that sends reads in replica-enabled requests to a read replica."""
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self._uses_primary = False
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._can_use_replica(clause):
+            replica = self._choose_replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _can_use_replica(self, clause):
+        if self._uses_primary:
+            return False
+        locks_rows = getattr(clause, '_for_update_arg', None) is not None
+        if self._flushing or locks_rows or isinstance(clause, UpdateBase) or not self._is_clean():
+            # Read-after-write: stay on the primary for the rest of the session
+            self._uses_primary = True
+            return False
+        return (
+            has_request_context()
+            and request.method in READ_ONLY_METHODS
+            and g.get('db_read_replica', False)
+        )
+
+    def _choose_replica(self):
+        # One replica per session so a request never mixes replicas with different lag
+        if self._replica is not None:
+            return self._replica
+        healthy = [
+            engine for key, engine in replica_engines(self._db).items()
+            if replica_health.is_healthy(key, engine)
+        ]
+        if healthy:
+            self._replica = random.choice(healthy)
+        return self._replica
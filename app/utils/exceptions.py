@@ -6,3 +6,13 @@ class UnauthorizedError(Exception):
 
 class BadRequestError(Exception):
     pass
+
+class TooManyRequestsError(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class FileTooLargeError(Exception):
+    def __init__(self, message, max_bytes):
+        super().__init__(message)
+        self.max_bytes = max_bytes
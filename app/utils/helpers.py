@@ -1,8 +1,14 @@
 import uuid
+import base64
+import json
 from datetime import datetime
+from sqlalchemy import and_, or_
 from sqlalchemy.orm.query import Query
 import os
 from werkzeug.utils import secure_filename
+from app.utils.cache import TTLCache
+
+_count_cache = TTLCache()
 
 
 def generate_slug(value):
@@ -17,6 +23,52 @@ def paginate_query(query: Query, page: int, per_page: int):
     return query.paginate(page=page, per_page=per_page, error_out=False)
 
 
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def keyset_paginate(query: Query, model, cursor, per_page: int):
+    """
+    Newest-first page of query keyed on (created_at, id), without a COUNT.
+
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id)
+        ))
+
+    items = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return items, next_cursor
+
+
+def cached_count(query: Query, key, ttl):
+    """COUNT(*) of query, reused for ttl seconds under key."""
+    return _count_cache.get_or_set(key, lambda: query.order_by(None).count(), ttl)
+
+
+def invalidate_cached_counts():
+    _count_cache.clear()
+
+
 
 def is_allowed_file(filename, allowed_extensions):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
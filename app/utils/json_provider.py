@@ -0,0 +1,69 @@
+"""
+Pluggable JSON provider.
+
+Flask encodes every jsonify() response with the stdlib json module. When
+orjson is installed, FastJSONProvider encodes with it instead, writing bytes
+straight into the response. When orjson is missing, or JSON_BACKEND is
+'stdlib', it falls back to Flask's own encoder.
+
+The wire format stays the same as Flask's: keys are sorted, datetimes are
+HTTP dates and Decimals and UUIDs are strings. The one difference is that
+orjson writes non-ASCII characters as UTF-8 rather than \\u escapes.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def resolve_backend(name=None):
+    """Backend to use for a JSON_BACKEND setting of 'auto', 'orjson' or 'stdlib'."""
+    name = (name or 'auto').lower()
+    if name == 'stdlib' or orjson is None:
+        return 'stdlib'
+    return 'orjson'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that uses orjson when it is available."""
+
+    def __init__(self, app, backend=None):
+        super().__init__(app)
+        self.backend = resolve_backend(backend or app.config.get('JSON_BACKEND'))
+
+    def _options(self, indent=False):
+        # Datetimes go through default() so they keep Flask's HTTP date format
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumpb(self, obj, indent=False):
+        """Serialize to UTF-8 bytes."""
+        if self.backend == 'orjson':
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._options(indent))
+            except TypeError:
+                # e.g. integers wider than 64 bits; the stdlib copes or raises the real error
+                pass
+        return super().dumps(obj, indent=2 if indent else None,
+                             separators=None if indent else (',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if self.backend != 'orjson' or set(kwargs) - {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self.dumpb(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if self.backend != 'orjson' or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumpb(obj, indent=indent) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,413 @@
+"""
+Prometheus metrics shared by every gunicorn worker on a host.
+
+Each process writes its samples to its own memory-mapped files in
+METRICS_MULTIPROC_DIR (or PROMETHEUS_MULTIPROC_DIR), one file per metric
+kind and pid. Whichever worker serves /metrics reads all of them and merges:
+counters and histograms are summed over every process, including workers
+that have exited, and gauges over live processes only.
+
+The directory should be emptied when the server starts, which the gunicorn
+on_starting hook does.
+"""
+import glob
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_INITIAL_FILE_SIZE = 1 << 16
+_HEADER_SIZE = 8
+
+_registry = {}
+
+
+def metrics_directory():
+    return (
+        os.environ.get('METRICS_MULTIPROC_DIR')
+        or os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+        or os.path.join(tempfile.gettempdir(), 'makeja_metrics')
+    )
+
+
+def _entry_size(encoded_key):
+    # 4-byte key length, the key padded to 8 bytes, then an 8-byte double
+    return (4 + len(encoded_key) + 7) // 8 * 8 + 8
+
+
+def _read_entries(data):
+    """Yield (key, value, value offset) from the bytes of a metrics file."""
+    if len(data) < _HEADER_SIZE:
+        return
+    used = min(struct.unpack_from('i', data, 0)[0], len(data))
+    position = _HEADER_SIZE
+    while position < used:
+        (length,) = struct.unpack_from('i', data, position)
+        encoded_key = bytes(data[position + 4:position + 4 + length])
+        value_offset = position + _entry_size(encoded_key) - 8
+        (value,) = struct.unpack_from('d', data, value_offset)
+        yield encoded_key.decode('utf-8'), value, value_offset
+        position = value_offset + 8
+
+
+class MmapedDict:
+    """
+    Append-only key -> float store in a memory-mapped file.
+
+    Values are updated in place, so readers in other processes see them
+    without any locking. Only the owning process writes to the file.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._file.truncate(_INITIAL_FILE_SIZE)
+            size = _INITIAL_FILE_SIZE
+        self._capacity = size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = struct.unpack_from('i', self._map, 0)[0]
+        if self._used == 0:
+            self._used = _HEADER_SIZE
+            struct.pack_into('i', self._map, 0, self._used)
+        self._offsets = {key: offset for key, _, offset in _read_entries(self._map)}
+
+    def read_value(self, key):
+        offset = self._offsets.get(key)
+        if offset is None:
+            return 0.0
+        return struct.unpack_from('d', self._map, offset)[0]
+
+    def write_value(self, key, value):
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._append(key)
+        struct.pack_into('d', self._map, offset, value)
+
+    def _append(self, key):
+        encoded_key = key.encode('utf-8')
+        size = _entry_size(encoded_key)
+        if self._used + size > self._capacity:
+            while self._used + size > self._capacity:
+                self._capacity *= 2
+            self._file.truncate(self._capacity)
+            old_map, self._map = self._map, mmap.mmap(self._file.fileno(), self._capacity)
+            old_map.close()
+
+        struct.pack_into(f'i{len(encoded_key)}s', self._map, self._used, len(encoded_key), encoded_key)
+        offset = self._used + size - 8
+        struct.pack_into('d', self._map, offset, 0.0)
+        self._used += size
+        # Publish the entry to readers only once it is complete
+        struct.pack_into('i', self._map, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class _ProcessStore:
+    """This process's metric files, reopened under the new pid after a fork."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._files = {}
+
+    def _file(self, kind):
+        pid = os.getpid()
+        if pid != self._pid:
+            # Inherited from the parent; its files stay with the parent
+            self._files = {}
+            self._pid = pid
+        store = self._files.get(kind)
+        if store is None:
+            directory = metrics_directory()
+            os.makedirs(directory, exist_ok=True)
+            store = self._files[kind] = MmapedDict(os.path.join(directory, f"{kind}_{pid}.db"))
+        return store
+
+    def increment(self, kind, key, amount):
+        with self._lock:
+            store = self._file(kind)
+            store.write_value(key, store.read_value(key) + amount)
+
+    def set(self, kind, key, value):
+        with self._lock:
+            self._file(kind).write_value(key, value)
+
+    def close(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                for store in self._files.values():
+                    store.close()
+            self._files = {}
+            self._pid = None
+
+
+_store = _ProcessStore()
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._keys = {}
+        _registry[name] = self
+
+    def _label_values(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return [str(labels[name]) for name in self.labelnames]
+
+    def _key(self, sample_name, label_values, extra=None):
+        cache_key = (sample_name, tuple(label_values), tuple(extra.items()) if extra else None)
+        key = self._keys.get(cache_key)
+        if key is None:
+            labels = dict(zip(self.labelnames, label_values))
+            if extra:
+                labels.update(extra)
+            key = self._keys[cache_key] = json.dumps([self.name, sample_name, labels], sort_keys=True)
+        return key
+
+
+class Counter(_Metric):
+    """Monotonic count, exported as <name>_total."""
+
+    type_name = 'counter'
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError('Counters can only increase')
+        _store.increment(self.kind, self._key(f"{self.name}_total", self._label_values(labels)), amount)
+
+
+class Gauge(_Metric):
+    """
+    Current value, merged across live processes.
+
+    mode 'sum' adds the processes' values, 'max' takes the largest and 'all'
+    exports each process separately with a pid label.
+    """
+
+    type_name = 'gauge'
+    MODES = ('sum', 'max', 'all')
+
+    def __init__(self, name, documentation, labelnames=(), mode='sum'):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown gauge mode '{mode}'")
+        super().__init__(name, documentation, labelnames)
+        self.kind = f"gauge{mode}"
+
+    def set(self, value, **labels):
+        _store.set(self.kind, self._key(self.name, self._label_values(labels)), value)
+
+    def inc(self, amount=1, **labels):
+        _store.increment(self.kind, self._key(self.name, self._label_values(labels)), amount)
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets plus sum and count."""
+
+    type_name = 'histogram'
+    kind = 'histogram'
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        label_values = self._label_values(labels)
+        # Each observation lands in one bucket; buckets are made cumulative on export
+        bound = next(bound for bound in self.buckets if value <= bound)
+        _store.increment(self.kind, self._key(f"{self.name}_bucket", label_values, {'le': _format_bound(bound)}), 1)
+        _store.increment(self.kind, self._key(f"{self.name}_sum", label_values), value)
+        _store.increment(self.kind, self._key(f"{self.name}_count", label_values), 1)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def _format_value(value):
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merged_samples():
+    """{(metric, sample, labels): value} merged over every process's files."""
+    samples = defaultdict(float)
+    maxima = {}
+    for path in glob.glob(os.path.join(metrics_directory(), '*.db')):
+        kind, _, pid = os.path.basename(path)[:-3].rpartition('_')
+        if not pid.isdigit():
+            continue
+        if kind.startswith('gauge') and not _pid_alive(int(pid)):
+            continue
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            continue
+
+        for key, value, _ in _read_entries(data):
+            metric_name, sample_name, labels = json.loads(key)
+            if kind == 'gaugeall':
+                labels['pid'] = pid
+            sample_key = (metric_name, sample_name, tuple(sorted(labels.items())))
+            if kind == 'gaugemax':
+                maxima[sample_key] = max(maxima.get(sample_key, value), value)
+            else:
+                samples[sample_key] += value
+    samples.update(maxima)
+    return samples
+
+
+def _histogram_lines(metric, samples):
+    lines = []
+    series = defaultdict(dict)
+    for (_, sample_name, labels), value in samples:
+        base = tuple((name, label) for name, label in labels if name != 'le')
+        if sample_name.endswith('_bucket'):
+            series[base].setdefault('buckets', {})[dict(labels)['le']] = value
+        else:
+            series[base][sample_name] = value
+
+    for base, values in sorted(series.items()):
+        cumulative = 0.0
+        for bound in metric.buckets:
+            cumulative += values.get('buckets', {}).get(_format_bound(bound), 0.0)
+            lines.append((f"{metric.name}_bucket", base + (('le', _format_bound(bound)),), cumulative))
+        lines.append((f"{metric.name}_sum", base, values.get(f"{metric.name}_sum", 0.0)))
+        lines.append((f"{metric.name}_count", base, values.get(f"{metric.name}_count", 0.0)))
+    return lines
+
+
+def generate_latest():
+    """Render every registered metric in the Prometheus text format."""
+    by_metric = defaultdict(list)
+    for (metric_name, sample_name, labels), value in _merged_samples().items():
+        by_metric[metric_name].append(((metric_name, sample_name, labels), value))
+
+    output = []
+    for name in sorted(_registry):
+        metric = _registry[name]
+        output.append(f"# HELP {name} {metric.documentation}")
+        output.append(f"# TYPE {name} {metric.type_name}")
+        samples = sorted(by_metric.get(name, []))
+        if metric.type_name == 'histogram':
+            lines = _histogram_lines(metric, samples)
+        else:
+            lines = [(sample_name, labels, value) for (_, sample_name, labels), value in samples]
+        for sample_name, labels, value in lines:
+            label_text = ','.join(f'{label}="{_escape(str(label_value))}"' for label, label_value in labels)
+            output.append(f"{sample_name}{{{label_text}}} {_format_value(value)}" if label_text
+                          else f"{sample_name} {_format_value(value)}")
+    return '\n'.join(output) + '\n'
+
+
+def mark_process_dead(pid):
+    """Drop the gauges of an exited worker; its counters keep counting."""
+    for path in glob.glob(os.path.join(metrics_directory(), f"gauge*_{pid}.db")):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def reset_directory():
+    """Remove every metrics file, e.g. when the server starts."""
+    _store.close()
+    for path in glob.glob(os.path.join(metrics_directory(), '*.db')):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# Application metrics
+
+HTTP_REQUESTS = Counter('makeja_http_requests', 'HTTP requests served', ('method', 'endpoint', 'status'))
+HTTP_REQUEST_DURATION = Histogram(
+    'makeja_http_request_duration_seconds', 'HTTP request latency', ('method', 'endpoint')
+)
+
+DB_POOL_SIZE = Gauge('makeja_db_pool_size', 'Connections kept open by the pool', ('bind',))
+DB_POOL_CHECKED_OUT = Gauge('makeja_db_pool_checked_out', 'Connections in use', ('bind',))
+DB_POOL_OVERFLOW = Gauge('makeja_db_pool_overflow', 'Connections open beyond pool_size', ('bind',))
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'makeja_db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+)
+DB_POOL_TIMEOUTS = Counter('makeja_db_pool_timeouts', 'Checkouts that gave up waiting for a connection')
+
+BCRYPT_DURATION = Histogram(
+    'makeja_bcrypt_duration_seconds', 'Time spent hashing and checking passwords', ('operation',),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0)
+)
+
+EMAILS_IN_FLIGHT = Gauge('makeja_email_in_flight', 'Emails currently being handed to the mail server')
+EMAILS_SENT = Counter('makeja_emails', 'Emails attempted', ('kind', 'outcome'))
+
+RESPONSE_CACHE_LOOKUPS = Counter(
+    'makeja_response_cache_lookups', 'Cached endpoint lookups by outcome (hit or miss)', ('endpoint', 'outcome')
+)
+
+SINGLE_FLIGHT_REQUESTS = Counter(
+    'makeja_single_flight_requests', 'Requests that waited on an identical in-flight request, by outcome',
+    ('endpoint', 'outcome')
+)
+
+MPESA_CALLS = Counter('makeja_mpesa_calls', 'M-Pesa API calls and callbacks', ('operation', 'outcome'))
+MPESA_CALL_DURATION = Histogram(
+    'makeja_mpesa_call_duration_seconds', 'M-Pesa API call latency', ('operation',),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
@@ -0,0 +1,71 @@
+"""
+Column projections for list endpoints.
+
+A Projection selects only the columns a response needs and gets them back
+as plain rows. Listing N records therefore builds no ORM instances,
+identity-map entries or relationship loads, such as Review.user being
+joined on every review query. Rows are turned into dicts by the model's
+generated serializer (app/utils/serializers.py), so the output matches
+Model.serialize()/to_dict() for the same fields.
+
+Fields that are read-only properties on the model (e.g. User.full_name) are
+computed by copying the property onto a small __slots__ row class. Such a
+property may only read other fields of the projection.
+"""
+from app.utils.serializers import serializer_for
+
+
+def _row_class(model, columns, properties):
+    """__slots__ class holding one row's columns plus the model's properties."""
+    arguments = ", ".join(columns)
+    body = "\n".join(f"    self.{column} = {column}" for column in columns)
+    namespace = {}
+    exec(compile(f"def __init__(self, {arguments}):\n{body}\n", f"<row {model.__name__}>", "exec"), namespace)
+    return type(f"{model.__name__}Row", (), {'__slots__': columns, '__init__': namespace['__init__'], **properties})
+
+
+class Projection:
+    """
+    Select a subset of a model's columns as rows and serialize them.
+
+    Usage:
+        USER_LIST = Projection(User, USER_FIELDS)
+        rows = USER_LIST.query(User.query.filter(User.is_active == True)).all()
+        return jsonify(USER_LIST.dump(rows))
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = tuple(fields)
+        table_columns = model.__table__.columns
+        self.columns = tuple(field for field in self.fields if field in table_columns)
+
+        properties = {}
+        for field in self.fields:
+            if field in table_columns:
+                continue
+            attribute = getattr(model, field, None)
+            if not isinstance(attribute, property):
+                raise ValueError(f"{model.__name__}.{field} is neither a column nor a property")
+            properties[field] = attribute
+
+        self._row_class = _row_class(model, self.columns, properties) if properties else None
+        self.serialize = serializer_for(model, self.fields)
+
+    def entities(self):
+        """Column attributes to select."""
+        return [getattr(self.model, column) for column in self.columns]
+
+    def query(self, query=None):
+        """query (default Model.query) narrowed to the projected columns; filters and ordering are kept."""
+        if query is None:
+            query = self.model.query
+        return query.with_entities(*self.entities())
+
+    def dump(self, rows):
+        """Serialize rows selected through query() to a list of dicts."""
+        serialize = self.serialize
+        row_class = self._row_class
+        if row_class is None:
+            return [serialize(row) for row in rows]
+        return [serialize(row_class(*row)) for row in rows]
@@ -0,0 +1,226 @@
+"""
+Tag-invalidated cache for read-heavy GET endpoints.
+
+@cached_response(tags) keeps a view's 200 responses in an in-process LRU,
+keyed by endpoint and full path. Each entry is also keyed by the current
+version of each of its tags, e.g. ``hostel:42`` or ``rooms``. Write paths
+call invalidate_tags() after committing. That bumps the versions, so later
+lookups use new keys and the stale entries are never read again; the LRU
+drops them in time.
+
+Tag versions are read before the view runs. A response computed from data
+that a concurrent write then replaces is stored under the old versions,
+where nobody will look for it.
+
+Without RESPONSE_CACHE_URL each worker keeps its own entries and tag
+versions, so an invalidation only reaches the worker that made the write.
+Entries are then kept for at most RESPONSE_CACHE_LOCAL_TTL seconds, which
+bounds how long other workers serve the old response, and starting several
+workers (WEB_CONCURRENCY > 1) this way logs a warning. Setting RESPONSE_CACHE_URL=redis://host:port/db (requires the
+redis package) shares the tag versions and entries between all workers and
+hosts. The in-process LRU still answers repeat hits without a round trip
+for the body.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from functools import wraps
+from flask import current_app, has_app_context, make_response, request
+from app.utils.cache import LRUCache
+from app.utils.metrics import RESPONSE_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'makeja:response-cache:'
+
+# Headers stored with a cached body; anything else is recomputed per request
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Cache-Control')
+
+
+class RedisBackend:
+    """Entries and tag versions shared through Redis."""
+
+    def __init__(self, url=None, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self._client = client
+
+    def get(self, key):
+        return self._client.get(KEY_PREFIX + key)
+
+    def set(self, key, value, ttl):
+        self._client.set(KEY_PREFIX + key, value, ex=ttl)
+
+    def tag_versions(self, tags):
+        values = self._client.mget([f"{KEY_PREFIX}tag:{tag}" for tag in tags])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tags):
+        pipeline = self._client.pipeline(transaction=False)
+        for tag in tags:
+            pipeline.incr(f"{KEY_PREFIX}tag:{tag}")
+        pipeline.execute()
+
+
+def _encode(entry):
+    status, headers, body = entry
+    return json.dumps([status, headers]).encode('utf-8') + b'\n' + body
+
+
+def _decode(data):
+    head, body = data.split(b'\n', 1)
+    status, headers = json.loads(head)
+    return status, headers, body
+
+
+class ResponseCache:
+    """In-process LRU of responses, optionally backed by a shared store."""
+
+    def __init__(self, max_entries=1024, default_ttl=30, backend=None, max_ttl=None):
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self.backend = backend
+        self._entries = LRUCache(default_ttl=default_ttl, max_entries=max_entries)
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def tag_versions(self, tags):
+        if self.backend is not None:
+            return self.backend.tag_versions(tags)
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def make_key(self, endpoint, path, tags):
+        tags = sorted(set(tags))
+        versions = self.tag_versions(tags) if tags else []
+        seed = repr((endpoint, path, list(zip(tags, versions)))).encode('utf-8')
+        return hashlib.blake2b(seed, digest_size=16).hexdigest()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None and self.backend is not None:
+            data = self.backend.get(key)
+            if data is not None:
+                entry = _decode(data)
+                self._entries.set(key, entry)
+        return entry
+
+    def set(self, key, entry, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        if self.max_ttl is not None:
+            ttl = min(ttl, self.max_ttl)
+        self._entries.set(key, entry, ttl)
+        if self.backend is not None:
+            self.backend.set(key, _encode(entry), ttl)
+
+    def invalidate(self, *tags):
+        if self.backend is not None:
+            self.backend.bump(tags)
+            return
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+        with self._lock:
+            self._versions.clear()
+
+
+def init_response_cache(app):
+    """Create the app's response cache from config, unless disabled."""
+    if not app.config.get('RESPONSE_CACHE_ENABLED', True):
+        return None
+
+    backend = None
+    url = app.config.get('RESPONSE_CACHE_URL')
+    if url:
+        try:
+            backend = RedisBackend(url)
+        except ImportError:
+            app.logger.warning("RESPONSE_CACHE_URL is set but the redis package is not installed; caching per worker")
+
+    max_ttl = None
+    if backend is None:
+        # Other workers never see this worker's invalidations, so keep entries briefly
+        max_ttl = app.config.get('RESPONSE_CACHE_LOCAL_TTL', 5)
+        # gunicorn reads WEB_CONCURRENCY for its worker count
+        if int(os.environ.get('WEB_CONCURRENCY', 1)) > 1:
+            app.logger.warning(
+                "Response cache has no RESPONSE_CACHE_URL with several workers; "
+                "other workers may serve stale responses for up to %s seconds", max_ttl
+            )
+
+    cache = ResponseCache(
+        max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1024),
+        default_ttl=app.config.get('RESPONSE_CACHE_TTL', 30),
+        backend=backend,
+        max_ttl=max_ttl
+    )
+    app.extensions['response_cache'] = cache
+    return cache
+
+
+def invalidate_tags(*tags):
+    """
+    Drop cached responses carrying any of tags. Call after committing the write.
+
+    Failures are logged, not raised: the write has already happened and the
+    entries still expire after their TTL.
+    """
+    if not has_app_context():
+        return
+    cache = current_app.extensions.get('response_cache')
+    if cache is None or not tags:
+        return
+    try:
+        cache.invalidate(*tags)
+    except Exception:
+        logger.exception("Response cache invalidation failed", extra={'event': 'response_cache_error', 'tags': tags})
+
+
+def cached_response(tags=(), ttl=None):
+    """
+    Serve a GET view's 200 responses from the response cache.
+
+    Hits are answered with 304 when If-None-Match matches the stored ETag.
+
+    Args:
+        tags: Tags for the entry, or a callable taking the view's URL
+            arguments and returning them
+        ttl: Seconds an entry is kept, default RESPONSE_CACHE_TTL
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('response_cache')
+            if cache is None or request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            try:
+                key = cache.make_key(request.endpoint, request.full_path, tags(**kwargs) if callable(tags) else tags)
+                entry = cache.get(key)
+            except Exception:
+                logger.exception("Response cache lookup failed", extra={'event': 'response_cache_error'})
+                return view(*args, **kwargs)
+
+            if entry is not None:
+                RESPONSE_CACHE_LOOKUPS.inc(endpoint=request.endpoint, outcome='hit')
+                status, headers, body = entry
+                response = current_app.response_class(body, status=status, headers=headers)
+                return response.make_conditional(request)
+
+            RESPONSE_CACHE_LOOKUPS.inc(endpoint=request.endpoint, outcome='miss')
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.direct_passthrough and not response.is_streamed:
+                headers = [(name, response.headers[name]) for name in CACHED_HEADERS if name in response.headers]
+                try:
+                    cache.set(key, (response.status_code, headers, response.get_data()), ttl)
+                except Exception:
+                    logger.exception("Response cache store failed", extra={'event': 'response_cache_error'})
+            return response
+        return wrapper
+    return decorator
@@ -2,11 +2,14 @@ import jwt
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import current_app, request, jsonify, g
-from models.user import User, TokenBlacklist
+from limits.storage import storage_from_string
+from app.models.user import User, TokenBlacklist
 import uuid
 import os
+import math
 import secrets
 import string
+import time
 
 class SecurityUtils:
     """Utility class for security operations"""
@@ -216,18 +219,88 @@ def optional_token(f):
     return decorated
 
 
+class SlidingWindowLimiter:
+    """
+    Approximate sliding-window rate limiter with O(1) state per key.
+
+    Each key keeps only two fixed-window counters, the current and the
+    previous one, in a limits storage shared by every worker (memory://,
+    sqlite:// or redis://). The previous count is weighted by how much of
+    it still overlaps the sliding window. Counters expire from the storage
+    two windows after they start.
+    """
+
+    def __init__(self, storage, max_requests, window, prefix='makeja/ip'):
+        self.storage = storage
+        self.max_requests = max_requests
+        self.window = window
+        self.prefix = prefix
+
+    def hit(self, key, now=None):
+        """Record a request for key; return (allowed, retry_after_seconds)."""
+        now = time.time() if now is None else now
+        window_start = now - (now % self.window)
+        current_key = f"{self.prefix}/{key}/{int(window_start)}"
+        previous_key = f"{self.prefix}/{key}/{int(window_start - self.window)}"
+
+        # Counting first makes admission atomic per counter across workers
+        current = self.storage.incr(current_key, 2 * self.window)
+        previous = self.storage.get(previous_key)
+        overlap = 1 - (now - window_start) / self.window
+        estimated = previous * overlap + current
+        if estimated <= self.max_requests:
+            return True, 0
+
+        # Rejected requests do not use up the budget
+        self.storage.incr(current_key, 2 * self.window, amount=-1)
+        if previous:
+            # Time until enough of the previous window slides out
+            excess = estimated - self.max_requests
+            retry_after = min(excess / previous * self.window, window_start + self.window - now)
+        else:
+            retry_after = window_start + self.window - now
+        return False, max(1, math.ceil(retry_after))
+
+
+def shared_rate_limit_storage():
+    """
+    The limits storage rate_limit_by_ip() counts in.
+
+    init_rate_limiter() registers Flask-Limiter's; apps without it get one
+    for RATELIMIT_STORAGE_URI on first use.
+    """
+    storage = current_app.extensions.get('rate_limit_storage')
+    if storage is None:
+        from app.middleware import rate_limit_storage  # noqa: F401 - registers sqlite://
+        storage = current_app.extensions.setdefault('rate_limit_storage', storage_from_string(
+            current_app.config.get('RATELIMIT_STORAGE_URI', 'memory://'),
+            **current_app.config.get('RATELIMIT_STORAGE_OPTIONS', {})
+        ))
+    return storage
+
+
 def rate_limit_by_ip(max_requests=100, window=3600):
     """Decorator for rate limiting by IP address"""
+
     def decorator(f):
         @wraps(f)
         def decorated(*args, **kwargs):
-            # Simple in-memory rate limiting (use Redis in production)
-            client_ip = request.remote_addr
-            
-            # You can implement more sophisticated rate limiting here
-            # For now, we'll just pass through
+            # Rejects floods before any DB or bcrypt work; counts are shared
+            # by every worker using the same RATELIMIT_STORAGE_URI
+            if not current_app.config.get('RATELIMIT_ENABLED', True):
+                return f(*args, **kwargs)
+
+            limiter = SlidingWindowLimiter(shared_rate_limit_storage(), max_requests, window)
+            # remote_addr is the client's address once ProxyFix has read X-Forwarded-For
+            allowed, retry_after = limiter.hit(f"{request.endpoint or f.__name__}/{request.remote_addr or ''}")
+            if not allowed:
+                response = jsonify({'status': 'error', 'message': 'Rate limit exceeded'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(retry_after)
+                return response
+
             return f(*args, **kwargs)
-        
+
         return decorated
     return decorator
 
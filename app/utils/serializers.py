@@ -0,0 +1,81 @@
+"""
+Generated serializer functions for models.
+
+serializer_for(Model, fields) builds, once per model and field list, a plain
+function that reads each attribute and returns a dict. The conversion each
+field needs (isoformat for dates, float for Numeric) is decided from the
+column type when the function is built, rather than on every call as
+marshmallow does. The result is cached, so calling serializer_for again is
+cheap.
+
+The functions only use attribute access, so they work on ORM instances and
+on result rows selected with the same column names alike.
+"""
+import threading
+from sqlalchemy import Date, DateTime, Float, Numeric, Time
+
+_serializers = {}
+_lock = threading.Lock()
+
+
+def _converter(model, field):
+    table = getattr(model, '__table__', None)
+    column = table.columns.get(field) if table is not None else None
+    if column is None:
+        return None
+    if isinstance(column.type, (DateTime, Date, Time)):
+        return '{0}.isoformat()'
+    # Float columns already load as float; Numeric ones load as Decimal
+    if isinstance(column.type, Numeric) and not isinstance(column.type, Float):
+        return 'float({0})'
+    return None
+
+
+def compile_serializer(model, fields, name=None):
+    """
+    Build a function that turns an instance of model into a dict.
+
+    Args:
+        model: Mapped model class; column types decide per-field conversion
+        fields: Attribute names, in output order. Non-column attributes such
+            as properties are copied as they are.
+        name: Function name, for tracebacks and profiles
+
+    Returns:
+        function(obj) -> dict
+    """
+    fields = tuple(fields)
+    for field in fields:
+        if not field.isidentifier():
+            raise ValueError(f"Invalid field name: {field!r}")
+
+    name = name or f"serialize_{model.__name__.lower()}"
+    lines = [f"def {name}(obj):"]
+    items = []
+    for index, field in enumerate(fields):
+        converter = _converter(model, field)
+        if converter is None:
+            items.append(f"        {field!r}: obj.{field},")
+            continue
+        lines.append(f"    v{index} = obj.{field}")
+        value = converter.format(f"v{index}")
+        items.append(f"        {field!r}: {value} if v{index} is not None else None,")
+    lines.append("    return {")
+    lines.extend(items)
+    lines.append("    }")
+
+    namespace = {}
+    exec(compile("\n".join(lines), f"<serializer {model.__name__}>", "exec"), namespace)
+    return namespace[name]
+
+
+def serializer_for(model, fields):
+    """Cached compile_serializer(model, fields)."""
+    key = (model, tuple(fields))
+    serializer = _serializers.get(key)
+    if serializer is None:
+        with _lock:
+            serializer = _serializers.get(key)
+            if serializer is None:
+                serializer = _serializers[key] = compile_serializer(model, key[1])
+    return serializer
@@ -0,0 +1,114 @@
+"""
+Request coalescing for idempotent GET views.
+
+When identical requests arrive at a worker while the first one is still
+being computed, @single_flight makes the later ones wait for it and share
+its response instead of running the same queries again. Only the body,
+status and headers are shared. Each request gets its own response object,
+so after_request hooks (compression, metrics) still run on each one
+separately.
+
+Coalescing is per worker process. Followers wait at most timeout seconds,
+then compute their own response. If the first request raises, they also
+compute their own, so an error is never handed to a request that did not
+cause it.
+"""
+import threading
+from functools import wraps
+from flask import current_app, make_response, request
+from app.utils.metrics import SINGLE_FLIGHT_REQUESTS
+
+
+class _Call:
+    __slots__ = ('done', 'result')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """Runs one function per key at a time, sharing its result with concurrent callers."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, timeout=None):
+        """
+        Return fn()'s result, or the result of a call already running for key.
+
+        Args:
+            key: Hashable identifying equivalent calls
+            fn: Function to run when no call for key is in flight. Returning
+                None marks the result as not shareable
+            timeout: Seconds to wait for an in-flight call before running fn
+
+        Returns:
+            (result, outcome): outcome is 'leader' when this caller ran fn
+            first, 'shared' when it got another call's result and
+            'fallback' when it ran fn itself after waiting in vain
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(timeout) and call.result is not None:
+                return call.result, 'shared'
+            return fn(), 'fallback'
+
+        try:
+            call.result = fn()
+            return call.result, 'leader'
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+_flights = SingleFlight()
+
+
+def single_flight(key=None, timeout=None):
+    """
+    Coalesce concurrent identical GET/HEAD requests to a view.
+
+    Args:
+        key: Callable taking the view's URL arguments and returning a
+            hashable key; requests with equal keys share one computation.
+            Defaults to the full path and query string. Views whose
+            response depends on the caller must include it in the key.
+        timeout: Seconds a follower waits, default SINGLE_FLIGHT_TIMEOUT
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            if request.method not in ('GET', 'HEAD') or not config.get('SINGLE_FLIGHT_ENABLED', True):
+                return view(*args, **kwargs)
+
+            own = []
+
+            def compute():
+                response = make_response(view(*args, **kwargs))
+                own.append(response)
+                # Files and streams can only be read once, so they are not shared
+                if response.direct_passthrough or response.is_streamed:
+                    return None
+                return response.status_code, list(response.headers.items()), response.get_data()
+
+            flight_key = (request.endpoint, key(**kwargs) if key is not None else request.full_path)
+            wait = config.get('SINGLE_FLIGHT_TIMEOUT', 5) if timeout is None else timeout
+            result, outcome = _flights.do(flight_key, compute, wait)
+
+            if outcome != 'leader':
+                SINGLE_FLIGHT_REQUESTS.inc(endpoint=request.endpoint, outcome=outcome)
+            if own:
+                return own[0]
+            status, headers, body = result
+            return current_app.response_class(body, status=status, headers=headers)
+        return wrapper
+    return decorator
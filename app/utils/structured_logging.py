@@ -0,0 +1,215 @@
+"""
+Structured, non-blocking logging.
+
+Log calls only put the record on a bounded in-memory queue. A QueueListener
+thread formats records as JSON lines and writes them to stdout, so slow I/O
+never blocks a request. When the queue is full records are dropped and
+counted rather than waited on.
+
+Every record carries the same fields: ts, level, logger, message and, inside
+a request, request_id, method and path, plus anything passed in ``extra``.
+The request id comes from the X-Request-ID header when the caller sent one
+and is echoed back in the response.
+
+Records with an ``event`` listed in LOG_SAMPLE_RATES are kept with that
+probability, e.g. ``{'request': 0.1}`` keeps one access log line in ten.
+Warnings and errors are never sampled out.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+# Attributes every LogRecord has; anything else on a record came from extra
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the correlation id and route of the current request."""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.method = request.method
+            record.path = request.path
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records for high-volume events."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates or {})
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, 'event', None))
+        return rate is None or random.random() < rate
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Shutdown may wait for room in a full queue; logging calls never do
+        self.queue.put(self._sentinel)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks and survives forks.
+
+    Each process drains its own queue with its own listener thread, started
+    on first use, so workers forked from a preloaded master log normally.
+    """
+
+    def __init__(self, target, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+
+    def _ensure_listener(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        # The parent's listener thread does not exist in a forked child
+        self.queue = queue.Queue(self.maxsize)
+        self._listener = _Listener(self.queue, self.target, respect_handler_level=True)
+        self._listener.start()
+        self._pid = pid
+
+    def prepare(self, record):
+        # Unlike the default, keep the message and traceback apart so the
+        # listener can render them as separate JSON fields
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+        self._listener = None
+        self._pid = None
+
+
+_handler = None
+
+
+def configure_logging(level='INFO', log_format='json', sample_rates=None, queue_size=10000, stream=None):
+    """Route the root logger through the queue to stdout."""
+    global _handler
+
+    target = logging.StreamHandler(stream or sys.stdout)
+    target.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(
+        '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s', defaults={'request_id': '-'}
+    ))
+
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+        _handler.stop()
+
+    _handler = AsyncQueueHandler(target, maxsize=queue_size)
+    _handler.addFilter(SamplingFilter(sample_rates))
+    # Handler filters run on the calling thread, where the request context is available
+    _handler.addFilter(RequestContextFilter())
+    root.addHandler(_handler)
+    root.setLevel(level)
+    return _handler
+
+
+def shutdown_logging():
+    """Flush queued records; registered to run at exit."""
+    if _handler is not None:
+        _handler.stop()
+
+
+atexit.register(shutdown_logging)
+
+
+def parse_sample_rates(value):
+    """Parse 'request=0.1,login_attempt=0.5' into a dict of rates."""
+    rates = {}
+    for item in (value or '').split(','):
+        event, _, rate = item.partition('=')
+        if event.strip() and rate.strip():
+            rates[event.strip()] = float(rate)
+    return rates
+
+
+def init_logging(app):
+    """Configure structured logging and request correlation ids for the app."""
+    configure_logging(
+        level=app.config.get('LOG_LEVEL', 'INFO'),
+        log_format=app.config.get('LOG_FORMAT', 'json'),
+        sample_rates=app.config.get('LOG_SAMPLE_RATES'),
+        queue_size=app.config.get('LOG_QUEUE_SIZE', 10000)
+    )
+    # Flask's own stderr handler would write synchronously alongside ours
+    app.logger.removeHandler(default_handler)
+    access_logger = logging.getLogger('app.access')
+
+    @app.before_request
+    def assign_request_id():
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        g.request_id = incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+        g._log_started = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+            access_logger.info('request', extra={
+                'event': 'request',
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - g._log_started) * 1000, 3)
+            })
+        return response
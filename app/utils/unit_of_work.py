@@ -0,0 +1,74 @@
+"""
+Request-scoped unit of work.
+
+Model helpers such as User.save() and User.update() call commit() instead
+of db.session.commit(). During a request, commit() only flushes, so ids
+are assigned and constraint errors still surface at the call site. The
+request's changes are then committed once, after the view returns and
+before the response is sent. Outside a request (CLI commands, scripts,
+background threads) commit() commits immediately.
+
+Code about to call an external service (M-Pesa, SMTP) calls commit_now()
+first. That way the other side never learns about rows that could still
+be rolled back, and no transaction is left open during a slow network
+call.
+
+Neither commit expires the loaded objects. The request wrote them itself,
+so reloading every attribute on the next access would only cost round
+trips. Only 2xx and 3xx responses commit: error responses (4xx and 5xx),
+and exceptions escaping the view, roll the pending changes back instead.
+Writes that must survive an error response call commit_now().
+"""
+from flask import g, has_request_context
+from app.db import db
+
+
+def _commit():
+    session = db.session()
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        session.commit()
+    finally:
+        session.expire_on_commit = expire_on_commit
+
+
+def commit():
+    """Commit the session's changes, deferred to the end of the request when one is open."""
+    if has_request_context() and g.get('unit_of_work_open', False):
+        db.session.flush()
+        g.unit_of_work_pending = True
+        return
+    db.session.commit()
+
+
+def commit_now():
+    """Commit everything pending right away, e.g. before calling an external service."""
+    _commit()
+    if has_request_context():
+        g.unit_of_work_pending = False
+
+
+def init_unit_of_work(app):
+    """Commit each request's deferred changes once, after its view returns."""
+    if not app.config.get('UNIT_OF_WORK_ENABLED', True):
+        return
+
+    @app.before_request
+    def open_unit_of_work():
+        g.unit_of_work_open = True
+
+    @app.after_request
+    def close_unit_of_work(response):
+        if not g.pop('unit_of_work_pending', False):
+            return response
+        if response.status_code >= 400:
+            db.session.rollback()
+            return response
+        try:
+            _commit()
+        except Exception:
+            # Flask turns this into a 500, so the client never sees a success that was not saved
+            db.session.rollback()
+            raise
+        return response
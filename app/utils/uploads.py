@@ -0,0 +1,119 @@
+"""
+Streaming multipart uploads.
+
+Touching request.files makes Werkzeug read and buffer the whole request
+body before any check can run. receive_upload() instead parses the body
+incrementally with Werkzeug's sans-IO MultipartDecoder as it is read from
+the socket:
+
+- a Content-Length above MAX_CONTENT_LENGTH is rejected before any of
+  the body is read
+- the filename extension is checked from the part headers, before any
+  file content
+- the magic bytes are checked from the first chunk
+- the size is checked after every chunk
+
+Accepted content goes to disk one chunk at a time through FileService, so
+memory use stays flat however large the upload. Views using it must not
+touch request.files, request.form or request.get_data().
+"""
+from dataclasses import dataclass
+from flask import current_app, request
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import Data, Epilogue, File, MultipartDecoder, NeedData
+from app.services.file_service import FileService
+from app.utils.exceptions import BadRequestError, FileTooLargeError
+from app.utils.helpers import is_allowed_file
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Form parts (fields and files) accepted in one upload request
+MAX_PARTS = 10
+
+
+@dataclass
+class UploadedFile:
+    key: str
+    size: int
+    filename: str
+
+
+def _events(decoder, stream):
+    """Decoder events, reading the body as the decoder asks for more."""
+    finished = False
+    while True:
+        event = decoder.next_event()
+        if isinstance(event, NeedData):
+            if finished:
+                raise ValueError("Unexpected end of multipart data")
+            chunk = stream.read(READ_CHUNK_SIZE)
+            finished = not chunk
+            decoder.receive_data(chunk or None)
+            continue
+        yield event
+        if isinstance(event, Epilogue):
+            return
+
+
+def _file_data(events):
+    """Content chunks of the file part that was just announced."""
+    for event in events:
+        if isinstance(event, Data):
+            if event.data:
+                yield event.data
+            if not event.more_data:
+                return
+
+
+def receive_upload(field_name='file', allowed_extensions=None, allowed_types=None, max_bytes=None):
+    """
+    Stream one file from a multipart request into FileService storage.
+
+    Parts other than field_name are skipped.
+
+    Args:
+        field_name: Form field holding the file
+        allowed_extensions: Filename extensions accepted, checked before the content
+        allowed_types: Content types (by magic bytes) accepted, e.g. {'png', 'jpg'}
+        max_bytes: Largest file accepted
+
+    Returns:
+        UploadedFile with the storage key, size and client filename
+
+    Raises:
+        BadRequestError: Not multipart, no file, or a disallowed name or content
+        FileTooLargeError: The request or the file is over its limit
+    """
+    mimetype, options = parse_options_header(request.headers.get('Content-Type', ''))
+    if mimetype != 'multipart/form-data' or not options.get('boundary'):
+        raise BadRequestError("Content-Type must be multipart/form-data")
+
+    max_content_length = current_app.config.get('MAX_CONTENT_LENGTH')
+    if max_content_length is not None and (request.content_length or 0) > max_content_length:
+        raise FileTooLargeError(f"Request exceeds {max_content_length} bytes", max_content_length)
+
+    decoder = MultipartDecoder(options['boundary'].encode('latin-1'), max_parts=MAX_PARTS)
+    events = _events(decoder, request.stream)
+    try:
+        for event in events:
+            if not isinstance(event, File) or event.name != field_name:
+                continue
+            if not event.filename:
+                break
+            if allowed_extensions is not None and not is_allowed_file(event.filename, allowed_extensions):
+                raise BadRequestError(f"File type not allowed: {event.filename}")
+            try:
+                key, size = FileService.save_chunks(
+                    _file_data(events), max_bytes=max_bytes, allowed_types=allowed_types
+                )
+            except ValueError as e:
+                raise BadRequestError("File content is not an allowed type") from e
+            return UploadedFile(key=key, size=size, filename=event.filename)
+    except RequestEntityTooLarge as e:
+        # A chunked body ran past MAX_CONTENT_LENGTH while being read
+        raise FileTooLargeError(str(e), max_content_length) from e
+    except ValueError as e:
+        # Malformed multipart data or too many parts
+        raise BadRequestError(str(e)) from e
+    raise BadRequestError(f"No file in field '{field_name}'")
@@ -0,0 +1,75 @@
+"""
+Rate limiter overhead per request for each storage backend.
+
+Usage:
+    python benchmarks/bench_rate_limit.py [iterations]
+
+Reports the cost of one limiter hit against the storage directly and the
+added latency of a limited route over an unlimited one through the Flask
+test client.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from app.middleware.rate_limiting import init_rate_limiter
+
+
+def bench_storage(uri, iterations):
+    limiter = FixedWindowRateLimiter(storage_from_string(uri))
+    limit = parse(f"{iterations * 2}/hour")
+    started = time.perf_counter()
+    for i in range(iterations):
+        limiter.hit(limit, "bench", str(i % 100))
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def bench_requests(uri, iterations):
+    app = Flask(__name__)
+    app.config["RATE_LIMIT_DEFAULT"] = f"{iterations * 2} per hour"
+    app.config["RATELIMIT_STORAGE_URI"] = uri
+    limiter = init_rate_limiter(app)
+
+    @app.route("/limited")
+    def limited():
+        return "ok"
+
+    @app.route("/unlimited")
+    @limiter.exempt
+    def unlimited():
+        return "ok"
+
+    client = app.test_client()
+    timings = {}
+    for path in ("/unlimited", "/limited"):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            client.get(path)
+        timings[path] = (time.perf_counter() - started) / iterations * 1e6
+    return timings["/limited"] - timings["/unlimited"]
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as directory:
+        backends = {
+            "memory": "memory://",
+            "sqlite-wal": f"sqlite:///{directory}/ratelimit.db",
+        }
+        if os.environ.get("REDIS_URL"):
+            backends["redis"] = os.environ["REDIS_URL"]
+
+        print(f"{'backend':<12} {'hit (us)':>10} {'per request (us)':>18}")
+        for name, uri in backends.items():
+            print(f"{name:<12} {bench_storage(uri, iterations):>10.1f} {bench_requests(uri, iterations):>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
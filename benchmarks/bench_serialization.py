@@ -0,0 +1,95 @@
+"""
+Throughput of turning model lists into a JSON response body.
+
+Usage:
+    python benchmarks/bench_serialization.py [count]
+
+For users, bookings and payments, compares a marshmallow schema dump to
+the generated serializers in app/utils/serializers.py (User.serialize,
+Booking.to_dict, Payment.to_dict). Each is then encoded with the stdlib
+encoder and with orjson through FastJSONProvider.
+"""
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
+from app.models.booking import Booking
+from app.models.payment import Payment
+from app.models.user import User
+from app.schemas.booking_schema import BookingSchema
+from app.schemas.user_schema import UserResponseSchema
+from app.utils.json_provider import FastJSONProvider, orjson
+
+
+class PaymentSchema(SQLAlchemyAutoSchema):
+    class Meta:
+        model = Payment
+
+
+def make_objects(count):
+    now = datetime(2024, 1, 1, 9, 0, 0, 123456)
+    users = [
+        User(id=i, email=f"user{i}@example.com", first_name="Wanjiru", last_name=f"Kamau{i}",
+             phone_number="+254700000000", role="user", is_active=True, is_verified=True,
+             is_email_verified=True, is_admin=False, created_at=now, updated_at=now)
+        for i in range(count)
+    ]
+    bookings = [
+        Booking(id=i, user_id=i, room_id=i % 50, check_in=date(2024, 2, 1),
+                check_out=date(2024, 2, 1) + timedelta(days=3), total_price=4500.0,
+                status="confirmed", created_at=now)
+        for i in range(count)
+    ]
+    payments = [
+        Payment(id=f"{i:08d}-0000-0000-0000-000000000000", user_id=i, amount=Decimal("4500.00"),
+                currency="KES", payment_method="mpesa", status="completed", phone_number="254700000000",
+                mpesa_checkout_request_id=f"ws_CO_{i}", mpesa_receipt_number=f"QK{i}", created_at=now,
+                completed_at=now, description="Room booking", reference=f"BK{i}")
+        for i in range(count)
+    ]
+    return users, bookings, payments
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    users, bookings, payments = make_objects(count)
+
+    app = Flask(__name__)
+    stdlib = FastJSONProvider(app, backend="stdlib")
+    fast = FastJSONProvider(app, backend="auto")
+    if orjson is None:
+        print("orjson is not installed; the orjson column uses the stdlib encoder")
+
+    cases = {
+        "users": (users, UserResponseSchema(many=True).dump, User.serialize),
+        "bookings": (bookings, BookingSchema(many=True).dump, Booking.to_dict),
+        "payments": (payments, PaymentSchema(many=True).dump, Payment.to_dict),
+    }
+
+    print(f"{count} objects per run, objects/second")
+    print(f"{'model':<10} {'schema+json':>12} {'generated+json':>15} {'generated+orjson':>17} {'speedup':>8}")
+    with app.app_context():
+        for name, (objects, schema_dump, serialize) in cases.items():
+            baseline, _ = timed(lambda: stdlib.dumpb(schema_dump(objects)))
+            generated, _ = timed(lambda: stdlib.dumpb([serialize(o) for o in objects]))
+            fastest, _ = timed(lambda: fast.dumpb([serialize(o) for o in objects]))
+            print(
+                f"{name:<10} {count / baseline:>12,.0f} {count / generated:>15,.0f}"
+                f" {count / fastest:>17,.0f} {baseline / fastest:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
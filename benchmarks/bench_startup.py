@@ -0,0 +1,66 @@
+"""
+Cold start time of the app factory, as paid by every gunicorn worker boot.
+
+Usage:
+    python benchmarks/bench_startup.py [runs] [config]
+
+Each run starts a fresh interpreter, imports run.py and calls create_app().
+The "boot-time schema" row enables the old behaviour of creating tables and
+warming the search indexes inside the factory, for comparison.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+import run
+imported = time.perf_counter()
+run.create_app(sys.argv[1])
+created = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def measure(config_name, env):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE, config_name],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    config_name = sys.argv[2] if len(sys.argv) > 2 else "development"
+
+    with tempfile.TemporaryDirectory() as directory:
+        base_env = dict(os.environ, DEV_DATABASE_URL=f"sqlite:///{directory}/startup.db")
+        scenarios = {
+            "default": dict(base_env, AUTO_CREATE_TABLES="false"),
+            "boot-time schema": dict(base_env, AUTO_CREATE_TABLES="true", USER_SEARCH_WARM_ON_START="true"),
+        }
+
+        print(f"{'scenario':<18} {'import (ms)':>12} {'create_app (ms)':>16} {'max rss (MB)':>13}")
+        for name, env in scenarios.items():
+            samples = [measure(config_name, env) for _ in range(runs)]
+            print(
+                f"{name:<18}"
+                f" {statistics.median(s['import_ms'] for s in samples):>12.1f}"
+                f" {statistics.median(s['create_app_ms'] for s in samples):>16.1f}"
+                f" {statistics.median(s['max_rss_mb'] for s in samples):>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
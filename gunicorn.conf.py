@@ -0,0 +1,83 @@
+"""
+Gunicorn settings for production.
+
+The app and every model are imported once in the master (preload_app), so
+workers share that memory copy-on-write instead of each importing it again.
+Anything the master connected to (e.g. AUTO_CREATE_TABLES) is dropped in
+each worker after fork so no two processes share a database socket.
+
+Worker class, threads and worker count come from the environment so the
+SQLAlchemy pool profile (DB_POOL_PROFILE, see app/utils/db_pool.py) can be
+kept in step with them.
+
+The user search indexes are built before the first request: in the master
+when the app is preloaded, so every worker inherits them, otherwise in each
+worker after fork. USER_SEARCH_WARM_ON_START=False leaves them to be built
+on first use.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+# Recycle workers now and then to bound slow leaks; jitter avoids restarting all at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    from app.utils.metrics import reset_directory
+    # Counters from the previous run would otherwise be added to this one's
+    reset_directory()
+
+
+def warm_search_indexes():
+    from wsgi import app
+    if app.config.get('USER_SEARCH_WARM_ON_START', True):
+        from app.services.search_service import init_search_indexes
+        init_search_indexes(app)
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from sqlalchemy.orm import configure_mappers
+    # Resolve relationships once in the master rather than on each worker's first query
+    configure_mappers()
+    # Built before pre_fork's gc.freeze, so workers share the index pages too
+    warm_search_indexes()
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's reach, so GC
+    # passes in the workers do not write to (and un-share) the master's pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        warm_search_indexes()
+        return
+    from wsgi import app
+    from app.db import db
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False leaves the master's connections alone and just
+            # forgets them in this worker
+            engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from app.utils.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -1,12 +1,12 @@
+from flask_migrate import upgrade
 from app import create_app
 
 def deploy():
     app = create_app()
     with app.app_context():
-        print("Creating all tables...")
-        from app.db import db
-        db.create_all()
-        print("Tables created!")
+        print("Applying migrations...")
+        upgrade()
+        print("Database is up to date!")
 
 if __name__ == '__main__':
-    deploy()
\ No newline at end of file
+    deploy()
@@ -0,0 +1,42 @@
+"""login attempts
+
+Failed-login counters used by LoginAttemptService for throttling. Databases
+built with create_all after the table was added already have it, so it is
+only created when missing.
+
+Revision ID: 3f2a9c41d7e8
+Revises: 7c0dbafbbf3c
+Create Date: 2026-10-19 09:12:40.218311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c41d7e8'
+down_revision = '7c0dbafbbf3c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('login_attempts'):
+        return
+    op.create_table('login_attempts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=320), nullable=False),
+    sa.Column('failures', sa.Integer(), nullable=False),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('last_failure_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('login_attempts', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_login_attempts_key'), ['key'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('login_attempts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_login_attempts_key'))
+
+    op.drop_table('login_attempts')
@@ -0,0 +1,37 @@
+"""user search trigram index
+
+Trigram GIN index serving substring user search on PostgreSQL. The indexed
+expression must match UserSearchService.search_expression. Built
+concurrently so existing databases keep accepting writes to users.
+
+Revision ID: 7c0dbafbbf3c
+Revises: 69bf853312b5
+Create Date: 2026-10-19 05:24:04.432056
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7c0dbafbbf3c'
+down_revision = '69bf853312b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_search_trgm ON users "
+            "USING gin (lower(first_name || ' ' || last_name || ' ' || email) gin_trgm_ops)"
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_user_search_trgm")
@@ -0,0 +1,47 @@
+import importlib
+
+import pytest
+from flask import Flask
+
+import app.routes
+from app.routes import register_blueprints
+
+
+def test_only_enabled_blueprints_are_registered():
+    app = Flask(__name__)
+    app.config['ENABLED_BLUEPRINTS'] = ('reviews', 'payments')
+
+    assert register_blueprints(app) == ['payments', 'reviews']
+    assert set(app.blueprints) == {'payment', 'reviews'}
+    assert any(rule.rule == '/api/payments/history' for rule in app.url_map.iter_rules())
+
+
+def test_missing_optional_blueprints_are_skipped(monkeypatch):
+    monkeypatch.setattr(app.routes, 'BLUEPRINTS', (
+        ('ghost', 'app.routes.does_not_exist', 'ghost_bp', '/api/ghost', False),
+        ('payments', 'app.routes.payment', 'payment_bp', '/api/payments', False),
+    ))
+    flask_app = Flask(__name__)
+
+    assert register_blueprints(flask_app) == ['payments']
+
+
+def test_missing_required_blueprint_stops_startup(monkeypatch):
+    monkeypatch.setattr(app.routes, 'BLUEPRINTS', (
+        ('ghost', 'app.routes.does_not_exist', 'ghost_bp', '/api/ghost', True),
+    ))
+
+    with pytest.raises(ImportError):
+        register_blueprints(Flask(__name__))
+
+
+def test_broken_optional_blueprint_is_not_swallowed(monkeypatch):
+    def broken(name):
+        raise NameError('undefined_helper')
+
+    monkeypatch.setattr(importlib, 'import_module', broken)
+    flask_app = Flask(__name__)
+    flask_app.config['ENABLED_BLUEPRINTS'] = ('reviews',)
+
+    with pytest.raises(NameError):
+        register_blueprints(flask_app)
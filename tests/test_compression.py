@@ -0,0 +1,50 @@
+import gzip
+import pytest
+from flask import Flask, jsonify, send_file
+from app.middleware.compression import init_compression
+
+ROWS = [{'id': i, 'name': f"Room {i}", 'status': 'available'} for i in range(200)]
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = Flask(__name__)
+    init_compression(app)
+    image = tmp_path / 'photo.jpg'
+    image.write_bytes(b'\xff\xd8\xff' + b'\x00' * 4096)
+
+    @app.route('/rooms')
+    def rooms():
+        response = jsonify(ROWS)
+        response.set_etag('rooms-v1')
+        return response
+
+    @app.route('/small')
+    def small():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/photo')
+    def photo():
+        return send_file(image)
+
+    return app.test_client()
+
+
+def test_large_json_is_gzipped(client):
+    plain = client.get('/rooms')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+
+    response = client.get('/rooms', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert int(response.headers['Content-Length']) < len(plain.data) / 5
+    assert gzip.decompress(response.data) == plain.data
+    # The compressed body is a different representation, so its strong ETag differs
+    assert response.get_etag() == ('rooms-v1-gzip', False)
+
+
+def test_small_and_binary_responses_are_left_alone(client):
+    for path in ('/small', '/photo'):
+        response = client.get(path, headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+        response.close()
@@ -0,0 +1,61 @@
+from datetime import datetime
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import func
+from app.db import db
+from app.middleware.conditional_get import conditional_get, query_version
+from app.models.user import User
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path}/conditional.db"
+    db.init_app(app)
+    app.view_calls = 0
+
+    @app.route('/users')
+    @conditional_get(lambda: query_version(User.query, func.max(User.updated_at), func.count()))
+    def users():
+        app.view_calls += 1
+        return jsonify([user.email for user in User.query.order_by(User.id)])
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.add(User(email='wanjiru@example.com', first_name='Wanjiru', last_name='Kamau',
+                            password_hash='x', updated_at=datetime(2024, 1, 1)))
+        db.session.commit()
+        db.session.remove()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_unchanged_list_is_answered_with_304(app):
+    client = app.test_client()
+    first = client.get('/users')
+    etag, weak = first.get_etag()
+    assert first.status_code == 200 and weak
+    assert first.cache_control.no_cache
+
+    again = client.get('/users', headers={'If-None-Match': f'W/"{etag}"'})
+    assert again.status_code == 304
+    assert again.data == b''
+    # The list was neither queried nor serialized the second time
+    assert app.view_calls == 1
+
+    # Other query strings are other representations
+    assert client.get('/users?page=2', headers={'If-None-Match': f'W/"{etag}"'}).status_code == 200
+
+
+def test_changed_list_gets_new_etag(app):
+    client = app.test_client()
+    etag, _ = client.get('/users').get_etag()
+    with app.app_context():
+        user = User.query.first()
+        user.updated_at = datetime(2024, 6, 1)
+        db.session.commit()
+
+    response = client.get('/users', headers={'If-None-Match': f'W/"{etag}"'})
+    assert response.status_code == 200
+    assert response.get_etag()[0] != etag
@@ -0,0 +1,69 @@
+import pytest
+from flask import Flask, g
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+from app.db import db
+from app.utils.db_routing import replica_binds, replica_health, use_read_replica
+
+source = Table('routing_source', MetaData(), Column('id', Integer, primary_key=True), Column('name', String(20)))
+
+
+@pytest.fixture
+def app(tmp_path):
+    for name in ('primary', 'replica'):
+        engine = create_engine(f"sqlite:///{tmp_path}/{name}.db")
+        with engine.begin() as connection:
+            source.create(connection)
+            connection.execute(insert(source).values(id=1, name=name))
+        engine.dispose()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path}/primary.db"
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(f"sqlite:///{tmp_path}/replica.db")
+    db.init_app(app)
+    replica_health.reset()
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def read_source():
+    return db.session.execute(select(source.c.name).where(source.c.id == 1)).scalar()
+
+
+def test_replica_binds_are_numbered():
+    assert replica_binds(' a://1 , b://2,') == {'replica_0': 'a://1', 'replica_1': 'b://2'}
+    assert replica_binds(None) == {}
+
+
+def test_marked_get_requests_read_from_replica(app):
+    with app.test_request_context('/', method='GET'):
+        assert use_read_replica(read_source)() == 'replica'
+        db.session.remove()
+
+    with app.test_request_context('/', method='GET'):
+        assert read_source() == 'primary'
+        db.session.remove()
+
+    with app.test_request_context('/', method='POST'):
+        assert use_read_replica(read_source)() == 'primary'
+        db.session.remove()
+
+
+def test_reads_after_a_write_stay_on_primary(app):
+    with app.test_request_context('/', method='GET'):
+        g.db_read_replica = True
+        assert read_source() == 'replica'
+        db.session.execute(insert(source).values(id=2, name='new'))
+        assert read_source() == 'primary'
+        db.session.rollback()
+        db.session.remove()
+
+
+def test_lagging_replica_falls_back_to_primary(app):
+    # SQLite replicas report no lag, so a negative allowance marks them as lagging
+    app.config['DB_REPLICA_MAX_LAG_SECONDS'] = -1
+    with app.test_request_context('/', method='GET'):
+        assert use_read_replica(read_source)() == 'primary'
+        assert replica_health.status('replica_0') == {'healthy': False, 'lag_seconds': 0.0, 'error': None}
+        db.session.remove()
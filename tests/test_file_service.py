@@ -0,0 +1,97 @@
+import base64
+import io
+import os
+from datetime import datetime
+import pytest
+from flask import Flask
+from app.db import db
+from app.models.user import User
+from app.routes.files import files_bp
+from app.services.file_service import FileService, decode_inline_image, detect_image_type
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+JPEG = b'\xff\xd8\xff\xe0' + b'\x01' * 64
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path}/files.db"
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    db.init_app(app)
+    app.register_blueprint(files_bp, url_prefix='/api/files')
+    with app.app_context():
+        db.create_all(bind_key=None)
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_detect_image_type_uses_magic_bytes():
+    assert detect_image_type(PNG) == 'png'
+    assert detect_image_type(JPEG) == 'jpg'
+    assert detect_image_type(b'RIFF\x00\x00\x00\x00WEBPVP8 ') == 'webp'
+    assert detect_image_type(b'<?php echo 1;') is None
+
+
+def test_identical_content_is_stored_once(app):
+    with app.app_context():
+        first = FileService.save_bytes(PNG)
+        second, size = FileService.save_stream(io.BytesIO(PNG))
+
+        assert first == second
+        assert size == len(PNG)
+        assert first.endswith('.png')
+        files = [name for _, _, names in os.walk(app.config['UPLOAD_FOLDER']) for name in names]
+        assert files == [first]
+
+        with pytest.raises(ValueError):
+            FileService.save_stream(io.BytesIO(b'not an image'))
+        with pytest.raises(ValueError):
+            FileService.path_for('../../etc/passwd')
+
+
+def test_files_are_served_with_immutable_caching(app):
+    with app.app_context():
+        key = FileService.save_bytes(JPEG)
+    client = app.test_client()
+
+    response = client.get(f"/api/files/{key}")
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert response.data == JPEG
+
+    assert client.get(f"/api/files/{key}", headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get('/api/files/' + '0' * 64 + '.png').status_code == 404
+
+
+def test_inline_pictures_are_migrated_in_batches(app):
+    inline = 'data:image/png;base64,' + base64.b64encode(PNG).decode()
+    with app.app_context():
+        stale = datetime(2020, 1, 1)
+        for i, picture in enumerate([inline, inline, 'https://cdn.example.com/' + 'a' * 80 + '.png', None]):
+            db.session.add(User(email=f"u{i}@example.com", first_name='A', last_name='B',
+                                password_hash='x', profile_picture=picture, updated_at=stale))
+        db.session.commit()
+
+        assert FileService.migrate_inline_profile_pictures(batch_size=1, dry_run=True)['migrated'] == 2
+        stats = FileService.migrate_inline_profile_pictures(batch_size=1)
+        assert stats['migrated'] == 2
+        assert stats['skipped'] == 1
+
+        users = User.query.order_by(User.id).all()
+        assert users[0].profile_picture == users[1].profile_picture
+        assert users[0].profile_picture_url == f"/api/files/{users[0].profile_picture}"
+        assert users[2].profile_picture_url.startswith('https://cdn.example.com/')
+        # Migrated rows get a new updated_at so the users list ETag changes
+        assert users[0].updated_at > stale and users[1].updated_at > stale
+        assert users[2].updated_at == stale
+        # Already migrated rows are left alone on a rerun
+        assert FileService.migrate_inline_profile_pictures()['migrated'] == 0
+
+
+def test_decode_inline_image_ignores_urls_and_garbage():
+    assert decode_inline_image(base64.b64encode(PNG).decode()) == PNG
+    assert decode_inline_image('https://example.com/a.png') is None
+    assert decode_inline_image('not base64 at all!') is None
@@ -0,0 +1,39 @@
+import pytest
+from datetime import datetime
+from app.utils.cache import TTLCache
+from app.utils.helpers import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 9, 30, 12, 345)
+    cursor = encode_cursor(created_at, 42)
+
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(default_ttl=60)
+    cache.set('fresh', 1)
+    cache.set('stale', 2, ttl=0)
+
+    assert cache.get('fresh') == 1
+    assert cache.get('stale') is None
+    assert cache.get_or_set('stale', lambda: 3) == 3
+    assert cache.get('stale') == 3
+
+
+def test_ttl_cache_bounds_its_size():
+    cache = TTLCache(default_ttl=60, max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.set('c', 3)
+
+    assert len(cache) == 2
+    assert cache.get('a') is None
+    assert cache.get('c') == 3
@@ -0,0 +1,101 @@
+import io
+import pytest
+from flask import Flask
+from PIL import Image
+from app.routes.files import files_bp
+from app.services.file_service import FileService, thumbnail_key
+from app.services.image_service import ImageService
+from app.utils.exceptions import FileTooLargeError
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    app.config['THUMBNAIL_SIZES'] = (64, 256)
+    app.register_blueprint(files_bp, url_prefix='/api/files')
+    return app
+
+
+def encode(image, pillow_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, pillow_format, **options)
+    return buffer.getvalue()
+
+
+def test_thumbnails_are_upright_and_stripped(app):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees
+    exif[0x010F] = 'PhoneMaker'
+    photo = encode(Image.new('RGB', (1200, 600), 'red'), 'JPEG', exif=exif.tobytes())
+
+    with app.app_context():
+        key = FileService.save_bytes(photo)
+        info = ImageService.process(key)
+
+        assert info['width'] == 600 and info['height'] == 1200
+        assert info['thumbnails'] == {'256': {'width': 128, 'height': 256}, '64': {'width': 32, 'height': 64}}
+        assert ImageService.info(key) == info
+
+        for extension in ('webp', 'jpg'):
+            with Image.open(FileService.path_for(thumbnail_key(key, 256, extension))) as thumb:
+                assert thumb.size == (128, 256)
+                assert not thumb.getexif()
+
+
+def test_transparent_png_gets_jpeg_thumbnail(app):
+    logo = encode(Image.new('RGBA', (100, 50), (0, 0, 255, 0)), 'PNG')
+    with app.app_context():
+        key = FileService.save_bytes(logo)
+        ImageService.process(key)
+        with Image.open(FileService.path_for(thumbnail_key(key, 64, 'jpg'))) as thumb:
+            assert thumb.mode == 'RGB'
+            assert thumb.size == (64, 32)
+
+
+def test_missing_thumbnail_is_made_on_request(app):
+    with app.app_context():
+        key = FileService.save_bytes(encode(Image.new('RGB', (300, 300)), 'PNG'))
+    client = app.test_client()
+
+    response = client.get(f"/api/files/{thumbnail_key(key, 64)}")
+    assert response.status_code == 200
+    assert response.mimetype == 'image/webp'
+    assert client.get(f"/api/files/{key}/info").get_json()['width'] == 300
+    # Only the configured sizes exist
+    assert client.get(f"/api/files/{thumbnail_key(key, 65)}").status_code == 404
+
+
+def test_background_processing_and_size_limit(app):
+    with app.app_context():
+        key = FileService.save_bytes(encode(Image.new('RGB', (80, 80)), 'JPEG'))
+        assert ImageService.process_async(key).result(timeout=10)['thumbnails']['64'] == {'width': 64, 'height': 64}
+
+        with pytest.raises(FileTooLargeError):
+            FileService.save_stream(io.BytesIO(b'\xff\xd8\xff' + b'0' * 1000), max_bytes=100)
+
+
+def test_oversized_image_is_refused_once(app, monkeypatch):
+    app.config['IMAGE_MAX_PIXELS'] = 100 * 100
+    with app.app_context():
+        key = FileService.save_bytes(encode(Image.new('RGB', (200, 100)), 'PNG'))
+        with pytest.raises(OSError, match='pixels'):
+            ImageService.process(key)
+        assert ImageService.info(key) is None
+
+    # Later requests are answered from the recorded failure without opening the image
+    def fail_open(*args, **kwargs):
+        raise AssertionError('image decoded again')
+    monkeypatch.setattr(Image, 'open', fail_open)
+    client = app.test_client()
+    assert client.get(f"/api/files/{thumbnail_key(key, 64)}").status_code == 404
+    assert client.get(f"/api/files/{key}/info").status_code == 404
+
+
+@pytest.mark.filterwarnings('ignore::PIL.Image.DecompressionBombWarning')
+def test_images_over_pillows_warning_limit_are_refused(app, monkeypatch):
+    monkeypatch.setattr(Image, 'MAX_IMAGE_PIXELS', 100 * 100)
+    with app.app_context():
+        key = FileService.save_bytes(encode(Image.new('RGB', (150, 100)), 'PNG'))
+        with pytest.raises(OSError, match='15000 pixels'):
+            ImageService.process(key)
@@ -0,0 +1,93 @@
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from flask import Flask, jsonify
+from app.models.booking import Booking
+from app.models.payment import Payment
+from app.models.user import User
+from app.utils.json_provider import FastJSONProvider, orjson
+from app.utils.serializers import compile_serializer, serializer_for
+
+PAYLOAD = {
+    'b': [1, 2.5, None, True],
+    'a': 'Nairobi café',
+    'when': datetime(2024, 5, 1, 12, 30),
+    'amount': Decimal('1500.00'),
+    'ref': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    3: 'int key',
+}
+
+
+def make_app(backend):
+    app = Flask(__name__)
+    app.config['JSON_BACKEND'] = backend
+    app.json = FastJSONProvider(app)
+
+    @app.route('/payload')
+    def payload():
+        return jsonify({key: value for key, value in PAYLOAD.items() if key != 3})
+
+    return app
+
+
+@pytest.mark.skipif(orjson is None, reason='orjson not installed')
+def test_orjson_matches_stdlib_output():
+    fast = make_app('auto')
+    stdlib = make_app('stdlib')
+    assert fast.json.backend == 'orjson'
+    assert stdlib.json.backend == 'stdlib'
+
+    fast_body = fast.test_client().get('/payload')
+    stdlib_body = stdlib.test_client().get('/payload')
+
+    assert fast_body.mimetype == 'application/json'
+    assert fast_body.get_json() == stdlib_body.get_json()
+    assert fast_body.get_json()['when'] == 'Wed, 01 May 2024 12:30:00 GMT'
+    assert fast_body.get_json()['amount'] == '1500.00'
+    # Keys stay sorted, as with Flask's encoder
+    assert list(json.loads(fast_body.data)) == sorted(json.loads(fast_body.data))
+
+
+@pytest.mark.skipif(orjson is None, reason='orjson not installed')
+def test_dumps_and_loads_round_trip():
+    app = make_app('auto')
+    with app.app_context():
+        text = app.json.dumps(PAYLOAD)
+        assert isinstance(text, str)
+        assert app.json.loads(text)['3'] == 'int key'
+        # Integers orjson cannot represent fall back to the stdlib
+        assert app.json.loads(app.json.dumps({'big': 2 ** 70}))['big'] == 2 ** 70
+        with pytest.raises(TypeError):
+            app.json.dumps({'bad': object()})
+
+
+def test_generated_serializers_match_model_fields():
+    created = datetime(2024, 1, 2, 3, 4, 5, 600000)
+    user = User(id=1, email='a@b.co', first_name='Amina', last_name='Otieno', role='user',
+                is_active=True, is_verified=False, is_email_verified=True, is_admin=False,
+                created_at=created, updated_at=None)
+    data = user.serialize()
+    assert list(data) == [
+        'id', 'email', 'first_name', 'last_name', 'phone_number',
+        'profile_picture', 'profile_picture_url', 'profile_picture_thumbnail_url',
+        'is_active', 'is_verified', 'is_email_verified', 'role', 'is_admin',
+        'created_at', 'updated_at', 'full_name'
+    ]
+    assert data['created_at'] == created.isoformat()
+    assert data['updated_at'] is None
+    assert data['full_name'] == 'Amina Otieno'
+
+    payment = Payment(id='p1', user_id=1, amount=Decimal('99.50'), payment_method='mpesa')
+    assert payment.to_dict()['amount'] == 99.5
+
+    booking = Booking(id=4, user_id=1, room_id=2, check_in=date(2024, 6, 1),
+                      check_out=date(2024, 6, 3), total_price=300.0, status='pending')
+    assert booking.to_dict()['check_in'] == '2024-06-01'
+
+
+def test_serializer_for_caches_and_rejects_bad_fields():
+    assert serializer_for(User, ('id', 'email')) is serializer_for(User, ['id', 'email'])
+    with pytest.raises(ValueError):
+        compile_serializer(User, ('id', 'email); import os'))
@@ -0,0 +1,104 @@
+import threading
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask
+from app.db import db
+from app.models.user import LoginAttempt
+from app.services.login_attempt_service import LoginAttemptService
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config['LOGIN_THROTTLE_BASE_DELAY_SECONDS'] = 2
+    app.config['LOGIN_THROTTLE_MAX_DELAY_SECONDS'] = 60
+    return app
+
+
+def test_backoff_doubles_after_free_attempts_and_caps():
+    with make_app().app_context():
+        delays = [LoginAttemptService.backoff_seconds(failures, free_attempts=3) for failures in range(1, 10)]
+
+    assert delays == [0, 0, 2, 4, 8, 16, 32, 60, 60]
+
+
+def test_locked_keys_are_rejected_from_memory():
+    LoginAttemptService.reset()
+    with make_app().app_context():
+        locked_until = datetime.utcnow() + timedelta(seconds=30)
+        LoginAttemptService._remember(LoginAttemptService.email_key('A@x.com'), 9, locked_until)
+        LoginAttemptService._remember(LoginAttemptService.ip_key('10.0.0.1'), 0, None)
+
+        # Served from the in-memory state; no database is configured here
+        assert 29 <= LoginAttemptService.retry_after('a@x.com ', '10.0.0.1') <= 31
+    LoginAttemptService.reset()
+
+
+@pytest.fixture
+def db_app(tmp_path):
+    app = make_app()
+    # A file, so threads use separate connections to the same database
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path}/throttle.db"
+    app.config['LOGIN_THROTTLE_FREE_ATTEMPTS_EMAIL'] = 3
+    db.init_app(app)
+    LoginAttemptService.reset()
+    with app.app_context():
+        db.create_all(bind_key=None)
+        yield app
+        db.session.remove()
+    LoginAttemptService.reset()
+
+
+def failures(key):
+    db.session.expire_all()
+    return LoginAttempt.find_by_key(key).failures
+
+
+def test_failures_lock_out_after_free_attempts(db_app):
+    for _ in range(3):
+        LoginAttemptService.record_failure('a@x.com', '10.0.0.1')
+
+    attempt = LoginAttempt.find_by_key('email:a@x.com')
+    assert attempt.failures == 3
+    assert attempt.locked_until > datetime.utcnow()
+    assert failures('ip:10.0.0.1') == 3
+    LoginAttemptService.reset()
+    assert LoginAttemptService.retry_after('a@x.com') >= 1
+
+
+def test_concurrent_failures_are_all_counted(db_app):
+    def fail():
+        with db_app.app_context():
+            for _ in range(10):
+                LoginAttemptService.record_failure('race@x.com')
+            db.session.remove()
+
+    threads = [threading.Thread(target=fail) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert failures('email:race@x.com') == 40
+    assert LoginAttempt.query.filter_by(key='email:race@x.com').count() == 1
+
+
+def test_failures_outside_the_window_start_over(db_app):
+    old = datetime.utcnow() - timedelta(hours=2)
+    db.session.add(LoginAttempt(key='email:a@x.com', failures=9, last_failure_at=old, locked_until=old))
+    db.session.commit()
+
+    LoginAttemptService.record_failure('a@x.com')
+    assert failures('email:a@x.com') == 1
+    LoginAttemptService.record_failure('a@x.com')
+    assert failures('email:a@x.com') == 2
+
+
+def test_stale_rows_are_cleaned_up_on_schedule(db_app):
+    old = datetime.utcnow() - timedelta(hours=2)
+    db.session.add(LoginAttempt(key='email:old@x.com', failures=2, last_failure_at=old))
+    db.session.commit()
+
+    LoginAttemptService.record_failure('new@x.com')
+
+    assert LoginAttempt.find_by_key('email:old@x.com') is None
+    assert LoginAttemptService._next_cleanup > 0
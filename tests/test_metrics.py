@@ -0,0 +1,153 @@
+import os
+import subprocess
+import sys
+import pytest
+from app.utils import metrics
+from app.utils.metrics import Counter, Gauge, Histogram, MmapedDict, generate_latest, mark_process_dead
+
+
+@pytest.fixture
+def metrics_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('METRICS_MULTIPROC_DIR', str(tmp_path))
+    metrics._store.close()
+    monkeypatch.setattr(metrics, '_registry', {})
+    yield tmp_path
+    metrics._store.close()
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_mmaped_dict_persists_and_grows(tmp_path):
+    path = str(tmp_path / 'values.db')
+    store = MmapedDict(path)
+    for i in range(5000):
+        store.write_value(f"key-{i}", float(i))
+    store.close()
+
+    reopened = MmapedDict(path)
+    assert reopened.read_value('key-4999') == 4999.0
+    assert reopened.read_value('missing') == 0.0
+    reopened.close()
+
+
+def test_counters_and_histograms_are_summed_across_processes(metrics_dir):
+    requests = Counter('test_requests', 'Requests', ('status',))
+    latency = Histogram('test_latency_seconds', 'Latency', buckets=(0.1, 1.0))
+
+    requests.inc(status=200)
+    latency.observe(0.05)
+
+    # Another worker's files, as left behind after it exited
+    pid = exited_pid()
+    other = MmapedDict(str(metrics_dir / f'counter_{pid}.db'))
+    other.write_value(requests._key('test_requests_total', ['200']), 2)
+    other.close()
+    other = MmapedDict(str(metrics_dir / f'histogram_{pid}.db'))
+    other.write_value(latency._key('test_latency_seconds_bucket', [], {'le': '1.0'}), 1)
+    other.write_value(latency._key('test_latency_seconds_sum', []), 0.5)
+    other.write_value(latency._key('test_latency_seconds_count', []), 1)
+    other.close()
+
+    output = generate_latest()
+    assert '# TYPE test_requests counter' in output
+    assert 'test_requests_total{status="200"} 3' in output
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in output
+    assert 'test_latency_seconds_bucket{le="1.0"} 2' in output
+    assert 'test_latency_seconds_bucket{le="+Inf"} 2' in output
+    assert 'test_latency_seconds_count 2' in output
+    assert 'test_latency_seconds_sum 0.55' in output
+
+
+def test_gauges_only_count_live_processes(metrics_dir):
+    in_use = Gauge('test_in_use', 'In use')
+    in_use.set(3)
+
+    dead = MmapedDict(str(metrics_dir / f'gaugesum_{exited_pid()}.db'))
+    dead.write_value(in_use._key('test_in_use', []), 7)
+    dead.close()
+    assert 'test_in_use 3' in generate_latest()
+
+    mark_process_dead(os.getpid())
+    assert not list(metrics_dir.glob(f'gaugesum_{os.getpid()}.db'))
+
+
+def test_labels_must_match(metrics_dir):
+    counter = Counter('test_labelled', 'Labelled', ('kind',))
+    with pytest.raises(ValueError):
+        counter.inc(other='x')
+
+
+def test_gauge_modes_merge_live_processes(metrics_dir):
+    peak = Gauge('test_peak', 'Peak', mode='max')
+    per_worker = Gauge('test_per_worker', 'Per worker', mode='all')
+    peak.set(4)
+    per_worker.set(1)
+
+    # The parent process stands in for a second live worker
+    other_pid = os.getppid()
+    other = MmapedDict(str(metrics_dir / f'gaugemax_{other_pid}.db'))
+    other.write_value(peak._key('test_peak', []), 9)
+    other.close()
+    other = MmapedDict(str(metrics_dir / f'gaugeall_{other_pid}.db'))
+    other.write_value(per_worker._key('test_per_worker', []), 2)
+    other.close()
+
+    output = generate_latest()
+    assert 'test_peak 9' in output
+    assert f'test_per_worker{{pid="{os.getpid()}"}} 1' in output
+    assert f'test_per_worker{{pid="{other_pid}"}} 2' in output
+
+
+def test_mark_process_dead_keeps_counters(metrics_dir):
+    requests = Counter('test_dead_requests', 'Requests')
+    in_use = Gauge('test_dead_in_use', 'In use')
+    requests.inc()
+    in_use.set(1)
+
+    worker_pid = os.getppid()
+    worker = MmapedDict(str(metrics_dir / f'counter_{worker_pid}.db'))
+    worker.write_value(requests._key('test_dead_requests_total', []), 5)
+    worker.close()
+    worker = MmapedDict(str(metrics_dir / f'gaugesum_{worker_pid}.db'))
+    worker.write_value(in_use._key('test_dead_in_use', []), 2)
+    worker.close()
+    assert 'test_dead_in_use 3' in generate_latest()
+
+    mark_process_dead(worker_pid)
+
+    output = generate_latest()
+    assert 'test_dead_in_use 1' in output
+    assert 'test_dead_requests_total 6' in output
+    assert (metrics_dir / f'counter_{worker_pid}.db').exists()
+
+
+def make_metrics_app(**config):
+    from flask import Flask
+    from app.db import db
+    from app.routes.metrics import metrics_bp
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config.update(config)
+    db.init_app(app)
+    app.register_blueprint(metrics_bp, url_prefix='/metrics')
+    return app.test_client()
+
+
+def test_metrics_fail_closed_without_token(metrics_dir):
+    assert make_metrics_app().get('/metrics').status_code == 403
+    assert make_metrics_app(TESTING=True).get('/metrics').status_code == 200
+
+
+def test_metrics_require_the_token(metrics_dir):
+    client = make_metrics_app(METRICS_TOKEN='s3cret')
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer s3cret'})
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
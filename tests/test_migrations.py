@@ -0,0 +1,38 @@
+import os
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from flask import Flask
+from flask_migrate import Migrate, upgrade
+from sqlalchemy import inspect
+from app.db import db
+from app import models  # noqa: F401
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+
+def test_migrations_build_the_model_schema(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path}/migrated.db"
+    db.init_app(app)
+    Migrate(app, db, directory=MIGRATIONS)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        with db.engine.connect() as connection:
+            diff = compare_metadata(MigrationContext.configure(connection), db.metadata)
+        db.engine.dispose()
+    assert diff == []
+
+
+def test_stamped_baseline_gets_later_tables(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path}/existing.db"
+    db.init_app(app)
+    Migrate(app, db, directory=MIGRATIONS)
+    with app.app_context():
+        # The tables an existing deployment has, as of the baseline revision
+        upgrade(directory=MIGRATIONS, revision='69bf853312b5')
+        assert not inspect(db.engine).has_table('login_attempts')
+
+        upgrade(directory=MIGRATIONS)
+        assert inspect(db.engine).has_table('login_attempts')
+        db.engine.dispose()
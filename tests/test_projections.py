@@ -0,0 +1,55 @@
+from datetime import datetime
+import pytest
+from flask import Flask
+from app.db import db
+from app.models.review import Review
+from app.models.user import User, USER_FIELDS
+from app.utils.projections import Projection
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path}/projections.db"
+    db.init_app(app)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        for i in range(3):
+            user = User(email=f"user{i}@example.com", first_name='Akinyi', last_name=f"Odhiambo{i}",
+                        password_hash='x', created_at=datetime(2024, 1, i + 1), updated_at=datetime(2024, 1, i + 1))
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Review(user_id=user.id, hostel_id=7, rating=4, comment='Clean', created_at=datetime(2024, 2, 1)))
+        db.session.commit()
+        db.session.remove()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_projection_matches_model_serialize(app):
+    projection = Projection(User, USER_FIELDS)
+    with app.app_context():
+        rows = projection.query(User.query.order_by(User.id)).all()
+        projected = projection.dump(rows)
+        # Nothing was loaded into the session
+        assert len(db.session.identity_map) == 0
+
+        expected = [user.serialize() for user in User.query.order_by(User.id).all()]
+        assert projected == expected
+        assert projected[0]['full_name'] == 'Akinyi Odhiambo0'
+
+
+def test_projection_skips_relationship_loading(app):
+    projection = Projection(Review, ('id', 'rating', 'created_at'))
+    with app.app_context():
+        statement = str(projection.query(Review.query.filter_by(hostel_id=7)))
+        assert 'users' not in statement
+        assert projection.dump(projection.query().all())[0] == {
+            'id': 1, 'rating': 4, 'created_at': '2024-02-01T00:00:00'
+        }
+
+
+def test_unknown_fields_are_rejected():
+    with pytest.raises(ValueError):
+        Projection(User, ('id', 'reviews'))
@@ -0,0 +1,84 @@
+import time
+import pytest
+from flask import Flask
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import FixedWindowRateLimiter
+from app.middleware.rate_limit_storage import SQLiteStorage
+from app.middleware.rate_limiting import init_rate_limiter
+
+
+def test_sqlite_scheme_is_registered(tmp_path):
+    storage = storage_from_string(f"sqlite:///{tmp_path}/limits.db")
+
+    assert isinstance(storage, SQLiteStorage)
+    assert storage.path == f"{tmp_path}/limits.db"
+    assert storage.check()
+
+
+def test_workers_share_counters(tmp_path):
+    uri = f"sqlite:///{tmp_path}/limits.db"
+    worker_a = FixedWindowRateLimiter(SQLiteStorage(uri))
+    worker_b = FixedWindowRateLimiter(SQLiteStorage(uri))
+    limit = parse("3/minute")
+
+    assert worker_a.hit(limit, "login", "10.0.0.1")
+    assert worker_b.hit(limit, "login", "10.0.0.1")
+    assert worker_a.hit(limit, "login", "10.0.0.1")
+    assert not worker_b.hit(limit, "login", "10.0.0.1")
+    assert worker_b.hit(limit, "login", "10.0.0.2")
+
+
+def test_counters_expire_and_are_evicted(tmp_path):
+    storage = SQLiteStorage(f"sqlite:///{tmp_path}/limits.db")
+
+    assert storage.incr("key", expiry=1) == 1
+    assert storage.incr("key", expiry=1) == 2
+    time.sleep(1.1)
+    assert storage.get("key") == 0
+    assert storage.evict_expired() == 1
+    assert storage.incr("key", expiry=1) == 1
+
+
+def test_limiter_uses_configured_storage(tmp_path):
+    app = Flask(__name__)
+    app.config["RATE_LIMIT_DEFAULT"] = "2 per minute"
+    app.config["RATELIMIT_STORAGE_URI"] = f"sqlite:///{tmp_path}/limits.db"
+    limiter = init_rate_limiter(app)
+
+    @app.route("/ping")
+    def ping():
+        return "pong"
+
+    client = app.test_client()
+    assert [client.get("/ping").status_code for _ in range(3)] == [200, 200, 429]
+    assert isinstance(limiter.storage, SQLiteStorage)
+
+
+def test_redis_storage_is_shared_between_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = pytest.importorskip("redis")
+    pytest.importorskip("lupa")  # limits runs its counters as Lua scripts
+    server = fakeredis.FakeServer()
+    connection_class = getattr(fakeredis, "FakeRedisConnection", None) or fakeredis.FakeConnection
+
+    def worker():
+        app = Flask(__name__)
+        app.config["RATE_LIMIT_DEFAULT"] = "3 per minute"
+        app.config["RATELIMIT_STORAGE_URI"] = "redis://localhost:6379/0"
+        # Stand-in for the Redis server both workers would connect to
+        app.config["RATELIMIT_STORAGE_OPTIONS"] = {
+            "connection_pool": redis.ConnectionPool(connection_class=connection_class, server=server)
+        }
+        init_rate_limiter(app)
+
+        @app.route("/ping")
+        def ping():
+            return "pong"
+
+        return app.test_client()
+
+    worker_a, worker_b = worker(), worker()
+    statuses = [client.get("/ping").status_code for client in (worker_a, worker_b, worker_a, worker_b)]
+    assert statuses == [200, 200, 200, 429]
+
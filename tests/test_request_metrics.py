@@ -0,0 +1,69 @@
+from flask import Flask
+from sqlalchemy import create_engine, text
+from app.middleware.request_metrics import EndpointStats, init_request_metrics, request_metrics
+
+
+def make_app(engine):
+    app = Flask(__name__)
+    app.config['SLOW_REQUEST_MS'] = 10000
+    init_request_metrics(app)
+
+    @app.route('/items/<int:item_id>')
+    def get_item(item_id):
+        with engine.connect() as connection:
+            for _ in range(3):
+                connection.execute(text('SELECT 1'))
+        return {'id': item_id}
+
+    return app
+
+
+def test_requests_are_timed_and_their_queries_counted():
+    engine = create_engine('sqlite://')
+    request_metrics.reset()
+    client = make_app(engine).test_client()
+
+    client.get('/items/1')
+    client.get('/items/2')
+    client.get('/missing')
+
+    snapshot = request_metrics.snapshot()
+    stats = snapshot['GET /items/<int:item_id>']
+    assert stats['count'] == 2
+    assert stats['queries_avg'] == 3
+    assert stats['queries_max'] == 3
+    assert sum(stats['histogram'].values()) == 2
+    assert snapshot['GET <unmatched>']['count'] == 1
+    request_metrics.reset()
+
+
+def test_queries_outside_requests_are_ignored():
+    engine = create_engine('sqlite://')
+    app = make_app(engine)
+    request_metrics.reset()
+
+    # The listeners run without an app context, and with one but no request;
+    # an exception in either would propagate out of execute()
+    with engine.connect() as connection:
+        assert connection.execute(text('SELECT 1')).scalar() == 1
+    with app.app_context(), engine.connect() as connection:
+        assert connection.execute(text('SELECT 1')).scalar() == 1
+    assert request_metrics.snapshot() == {}
+
+    # Nor are they carried over into the next request's count
+    app.test_client().get('/items/1')
+    assert request_metrics.snapshot()['GET /items/<int:item_id>']['queries_max'] == 3
+    request_metrics.reset()
+
+
+def test_percentiles_come_from_histogram_buckets():
+    stats = EndpointStats()
+    for duration in [3] * 90 + [40] * 9 + [7000]:
+        stats.record(duration, 200, 1, 0.5)
+
+    snapshot = stats.snapshot()
+    assert snapshot['p50_ms'] == 5
+    assert snapshot['p95_ms'] == 50
+    assert snapshot['p99_ms'] == 50
+    assert snapshot['max_ms'] == 7000
+    assert snapshot['histogram']['+Inf'] == 1
@@ -0,0 +1,96 @@
+import logging
+import time
+import pytest
+from flask import Flask, jsonify
+from app.utils.cache import LRUCache
+from app.utils.response_cache import (
+    RedisBackend, ResponseCache, cached_response, init_response_cache, invalidate_tags
+)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['RESPONSE_CACHE_MAX_ENTRIES'] = 100
+    init_response_cache(app)
+    app.view_calls = 0
+
+    @app.route('/hostels/<int:hostel_id>/reviews')
+    @cached_response(lambda hostel_id: [f"hostel:{hostel_id}"])
+    def reviews(hostel_id):
+        app.view_calls += 1
+        response = jsonify({'hostel_id': hostel_id, 'calls': app.view_calls})
+        response.set_etag(f"reviews-{app.view_calls}", weak=True)
+        return response
+
+    @app.route('/missing')
+    @cached_response(['rooms'])
+    def missing():
+        app.view_calls += 1
+        return jsonify({'error': 'not found'}), 404
+
+    return app
+
+
+def test_hits_are_served_until_the_tag_is_invalidated(app):
+    client = app.test_client()
+    first = client.get('/hostels/42/reviews')
+    assert client.get('/hostels/42/reviews').get_json() == first.get_json()
+    assert client.get('/hostels/7/reviews').get_json()['calls'] == 2
+    assert app.view_calls == 2
+
+    # A hit still honours If-None-Match
+    assert client.get('/hostels/42/reviews', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    with app.app_context():
+        invalidate_tags('hostel:42')
+    assert client.get('/hostels/42/reviews').get_json()['calls'] == 3
+    # Other hostels keep their entries
+    assert client.get('/hostels/7/reviews').get_json()['calls'] == 2
+
+
+def test_errors_are_not_cached(app):
+    client = app.test_client()
+    client.get('/missing')
+    client.get('/missing')
+    assert app.view_calls == 2
+
+
+def test_lru_keeps_recently_used_entries():
+    cache = LRUCache(default_ttl=60, max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+
+
+def test_per_worker_cache_keeps_entries_briefly(monkeypatch, caplog):
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    app = Flask(__name__)
+    app.config['RESPONSE_CACHE_TTL'] = 300
+    app.config['RESPONSE_CACHE_LOCAL_TTL'] = 5
+
+    with caplog.at_level(logging.WARNING):
+        cache = init_response_cache(app)
+
+    assert cache.max_ttl == 5
+    assert 'RESPONSE_CACHE_URL' in caplog.text
+    cache.set('key', (200, [], b'body'), ttl=300)
+    assert cache._entries._entries['key'][1] <= time.monotonic() + 5
+
+
+def test_redis_backend_shares_invalidations_between_workers():
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    worker_a = ResponseCache(backend=RedisBackend(client=fakeredis.FakeRedis(server=server)))
+    worker_b = ResponseCache(backend=RedisBackend(client=fakeredis.FakeRedis(server=server)))
+
+    key = worker_a.make_key('rooms', '/api/rooms', ['rooms'])
+    worker_a.set(key, (200, [['Content-Type', 'application/json']], b'[]'))
+    assert worker_b.make_key('rooms', '/api/rooms', ['rooms']) == key
+    assert worker_b.get(key) == (200, [['Content-Type', 'application/json']], b'[]')
+
+    worker_b.invalidate('rooms')
+    assert worker_a.make_key('rooms', '/api/rooms', ['rooms']) != key
@@ -0,0 +1,76 @@
+import pytest
+from flask import Flask
+from app.db import db
+from app.models.review import Review
+from app.models.user import User
+from app.services.review_service import ReviewService
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        user = User(email='reviewer@example.com', first_name='Otieno', last_name='Achieng', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        comments = ['Great place', '100% spam offer', 'Spam spam', 'Quiet_room', 'Quiet room']
+        for position, comment in enumerate(comments):
+            db.session.add(Review(user_id=user.id, hostel_id=1 + position % 2, rating=1 + position, comment=comment))
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+def comments(**filters):
+    return sorted(review.comment for review in Review.query.filter_by(**filters))
+
+
+def test_dry_run_counts_without_writing(app):
+    result = ReviewService.bulk_moderate('flag', hostel_id=1, dry_run=True)
+    assert result == {'action': 'flag', 'dry_run': True, 'matched': 3}
+    assert comments(is_flagged=True) == []
+
+
+def test_flag_unflag_and_delete(app):
+    result = ReviewService.bulk_moderate('flag', comment_contains='spam')
+    assert result['matched'] == 2
+    assert comments(is_flagged=True) == ['100% spam offer', 'Spam spam']
+    assert set(result['ratings']) == {1, 2}
+
+    # Already flagged rows are not counted again
+    assert ReviewService.bulk_moderate('flag', comment_contains='spam')['matched'] == 0
+
+    assert ReviewService.bulk_moderate('unflag', review_ids=[2, 3, 4])['matched'] == 2
+    assert comments(is_flagged=True) == []
+
+    result = ReviewService.bulk_moderate('delete', hostel_id=2)
+    assert result['matched'] == 2
+    assert result['ratings'] == {2: {'review_count': 0, 'average_rating': None}}
+    assert comments() == ['Great place', 'Quiet room', 'Spam spam']
+
+
+def test_wildcards_in_comment_filter_are_literal(app):
+    assert ReviewService.bulk_moderate('delete', comment_contains='%', dry_run=True)['matched'] == 1
+    assert ReviewService.bulk_moderate('delete', comment_contains='t_r', dry_run=True)['matched'] == 1
+
+
+def test_refuses_unfiltered_or_unknown_actions(app):
+    with pytest.raises(ValueError):
+        ReviewService.bulk_moderate('delete')
+    with pytest.raises(ValueError):
+        ReviewService.bulk_moderate('purge', hostel_id=1)
+
+
+def test_list_version_tells_flag_sets_apart(app):
+    def flag_only(*ids):
+        Review.query.update({Review.is_flagged: Review.id.in_(ids)}, synchronize_session=False)
+        db.session.commit()
+        return ReviewService.list_version(Review.query)
+
+    # Same count, newest id and sum of flagged ids
+    assert flag_only(5) != flag_only(2, 3)
+    assert flag_only(1, 4) != flag_only(2, 3)
+    assert flag_only(2, 3) == flag_only(3, 2)
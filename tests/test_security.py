@@ -0,0 +1,87 @@
+from flask import Flask
+from limits.storage import MemoryStorage
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app.middleware.rate_limit_storage import SQLiteStorage
+from app.utils.security import SlidingWindowLimiter, rate_limit_by_ip
+
+
+def test_sliding_window_rejects_over_budget():
+    limiter = SlidingWindowLimiter(MemoryStorage(), max_requests=3, window=60)
+
+    assert [limiter.hit('ip', now=0)[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_after = limiter.hit('ip', now=1)
+    assert not allowed
+    assert retry_after == 59
+    assert limiter.hit('other-ip', now=1)[0]
+
+
+def test_previous_window_is_weighted_by_overlap():
+    limiter = SlidingWindowLimiter(MemoryStorage(), max_requests=4, window=60)
+    for _ in range(4):
+        limiter.hit('ip', now=30)
+
+    # At t=75 the previous window still covers 75% of the sliding window:
+    # 4 * 0.75 = 3 estimated requests, so one more fits
+    assert limiter.hit('ip', now=75)[0]
+    assert not limiter.hit('ip', now=75)[0]
+    # At t=105 only 25% remains: 4 * 0.25 + 1 = 2 estimated requests
+    assert limiter.hit('ip', now=105)[0]
+    assert limiter.hit('ip', now=105)[0]
+    assert not limiter.hit('ip', now=105)[0]
+
+
+def test_state_is_two_counters_per_key(tmp_path):
+    storage = SQLiteStorage(f"sqlite:///{tmp_path}/limits.db")
+    limiter = SlidingWindowLimiter(storage, max_requests=100, window=60)
+    for second in range(0, 120, 2):
+        limiter.hit('ip', now=second)
+
+    rows = storage._connection().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+    assert rows == 2
+
+
+def make_app(**config):
+    app = Flask(__name__)
+    app.config.update(config)
+
+    @app.route('/login', methods=['POST'])
+    @rate_limit_by_ip(max_requests=2, window=60)
+    def login():
+        return 'ok'
+
+    return app
+
+
+def test_decorator_returns_429_with_retry_after():
+    app = make_app()
+    client = app.test_client()
+    responses = [client.post('/login') for _ in range(3)]
+
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert 1 <= int(responses[2].headers['Retry-After']) <= 60
+
+    app.config['RATELIMIT_ENABLED'] = False
+    assert client.post('/login').status_code == 200
+
+
+def test_workers_share_the_configured_storage(tmp_path):
+    uri = f"sqlite:///{tmp_path}/limits.db"
+    worker_a = make_app(RATELIMIT_STORAGE_URI=uri).test_client()
+    worker_b = make_app(RATELIMIT_STORAGE_URI=uri).test_client()
+
+    statuses = [client.post('/login').status_code for client in (worker_a, worker_b, worker_a)]
+    assert statuses == [200, 200, 429]
+
+
+def test_clients_behind_the_proxy_have_separate_budgets():
+    app = make_app()
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+    client = app.test_client()
+
+    def login(ip):
+        return client.post('/login', headers={'X-Forwarded-For': ip}).status_code
+
+    assert [login('10.0.0.1') for _ in range(3)] == [200, 200, 429]
+    assert login('10.0.0.2') == 200
+    # Only the hop added by the trusted proxy counts, so a spoofed first entry does not help
+    assert login('1.2.3.4, 10.0.0.1') == 429
@@ -0,0 +1,68 @@
+import threading
+import time
+import pytest
+from flask import Flask, jsonify
+from app.utils.single_flight import SingleFlight, single_flight
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.release = threading.Event()
+    app.view_calls = 0
+
+    @app.route('/hostels/<int:hostel_id>/reviews')
+    @single_flight()
+    def reviews(hostel_id):
+        app.view_calls += 1
+        app.release.wait(5)
+        return jsonify({'hostel_id': hostel_id, 'calls': app.view_calls})
+
+    return app
+
+
+def test_concurrent_identical_requests_share_one_computation(app):
+    results = []
+
+    def fetch(path):
+        response = app.test_client().get(path)
+        results.append((path, response.status_code, response.get_json()))
+
+    threads = [threading.Thread(target=fetch, args=('/hostels/42/reviews',)) for _ in range(5)]
+    threads.append(threading.Thread(target=fetch, args=('/hostels/7/reviews',)))
+    for thread in threads:
+        thread.start()
+    while app.view_calls < 2:
+        time.sleep(0.01)
+    # Give the other requests time to start waiting on the first one
+    time.sleep(0.1)
+    app.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert app.view_calls == 2
+    assert sorted(body['hostel_id'] for _, status, body in results if status == 200) == [7, 42, 42, 42, 42, 42]
+
+
+def test_followers_run_alone_after_timeout_or_failure():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'slow'
+
+    leader = threading.Thread(target=flights.do, args=('key', slow))
+    leader.start()
+    started.wait(5)
+    assert flights.do('key', lambda: 'own', timeout=0.05) == ('own', 'fallback')
+    release.set()
+    leader.join()
+
+    def fail():
+        raise RuntimeError('database went away')
+
+    with pytest.raises(RuntimeError):
+        flights.do('key', fail)
+    assert flights.do('key', lambda: 'retry') == ('retry', 'leader')
@@ -0,0 +1,88 @@
+import io
+import json
+import logging
+import time
+from flask import Flask
+from app.utils import structured_logging
+from app.utils.structured_logging import AsyncQueueHandler, init_logging, parse_sample_rates
+
+
+def make_app(stream, **config):
+    app = Flask(__name__)
+    app.config.update({'LOG_FORMAT': 'json', 'LOG_SAMPLE_RATES': {'request': 1.0}, **config})
+    init_logging(app)
+    # Write to the test stream instead of stdout
+    structured_logging._handler.target.setStream(stream)
+
+    @app.route('/ping')
+    def ping():
+        logging.getLogger('app.test').info('pinged', extra={'event': 'ping', 'count': 2})
+        return 'pong'
+
+    return app
+
+
+def read_lines(stream):
+    structured_logging._handler.stop()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_are_json_with_request_context():
+    stream = io.StringIO()
+    client = make_app(stream).test_client()
+
+    response = client.get('/ping', headers={'X-Request-ID': 'abc-123'})
+
+    assert response.headers['X-Request-ID'] == 'abc-123'
+    lines = read_lines(stream)
+    ping = next(line for line in lines if line.get('event') == 'ping')
+    assert ping['message'] == 'pinged'
+    assert ping['count'] == 2
+    assert ping['request_id'] == 'abc-123'
+    assert ping['path'] == '/ping'
+    access = next(line for line in lines if line.get('event') == 'request')
+    assert access['status'] == 200
+    assert access['request_id'] == 'abc-123'
+
+
+def test_invalid_request_ids_are_replaced():
+    stream = io.StringIO()
+    client = make_app(stream).test_client()
+
+    response = client.get('/ping', headers={'X-Request-ID': 'bad id; drop table'})
+
+    assert response.headers['X-Request-ID'] != 'bad id; drop table'
+    assert len(response.headers['X-Request-ID']) == 32
+    read_lines(stream)
+
+
+def test_sampled_events_are_dropped_but_warnings_kept():
+    stream = io.StringIO()
+    make_app(stream, LOG_SAMPLE_RATES={'ping': 0.0})
+    logger = logging.getLogger('app.test')
+
+    logger.info('dropped', extra={'event': 'ping'})
+    logger.warning('kept', extra={'event': 'ping'})
+
+    assert [line['message'] for line in read_lines(stream)] == ['kept']
+
+
+def test_full_queue_drops_instead_of_blocking():
+    class SlowHandler(logging.Handler):
+        def emit(self, record):
+            time.sleep(0.05)
+
+    handler = AsyncQueueHandler(SlowHandler(), maxsize=1)
+    record = logging.makeLogRecord({'msg': 'x', 'levelno': logging.INFO, 'levelname': 'INFO'})
+    started = time.perf_counter()
+    for _ in range(20):
+        handler.handle(record)
+
+    assert time.perf_counter() - started < 0.05
+    assert handler.dropped > 0
+    handler.stop()
+
+
+def test_parse_sample_rates():
+    assert parse_sample_rates('request=0.1, login_failed=0.5,') == {'request': 0.1, 'login_failed': 0.5}
+    assert parse_sample_rates(None) == {}
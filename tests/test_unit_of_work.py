@@ -0,0 +1,72 @@
+import pytest
+from flask import Flask, jsonify
+from sqlalchemy import event
+from app.db import db
+from app.models.user import User
+from app.utils.unit_of_work import commit_now, init_unit_of_work
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path}/uow.db"
+    db.init_app(app)
+    init_unit_of_work(app)
+    app.commits = 0
+
+    @app.route('/register/<name>', methods=['POST'])
+    def register(name):
+        user = User(email=f"{name}@example.com", first_name=name, last_name='Mwangi', password_hash='x')
+        user.save()
+        if name == 'boundary':
+            commit_now()
+        user.update(phone_number='254700000000')
+        user.update(is_verified=True)
+        if name == 'broken':
+            return jsonify({'error': 'upstream failed'}), 500
+        if name == 'invalid':
+            return jsonify({'error': 'phone number taken'}), 409
+        return jsonify(user.serialize()), 201
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        event.listen(db.engine, 'commit', lambda connection: setattr(app, 'commits', app.commits + 1))
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+def test_request_commits_once(app):
+    response = app.test_client().post('/register/amina')
+    assert response.status_code == 201
+    assert response.get_json()['phone_number'] == '254700000000'
+    assert app.commits == 1
+    with app.app_context():
+        assert User.find_by_email('amina@example.com').is_verified
+
+
+def test_external_call_boundary_commits_early(app):
+    app.test_client().post('/register/boundary')
+    assert app.commits == 2
+    with app.app_context():
+        assert User.find_by_email('boundary@example.com').phone_number == '254700000000'
+
+
+def test_server_error_rolls_back(app):
+    assert app.test_client().post('/register/broken').status_code == 500
+    assert app.commits == 0
+    with app.app_context():
+        assert User.find_by_email('broken@example.com') is None
+
+
+def test_client_error_rolls_back(app):
+    assert app.test_client().post('/register/invalid').status_code == 409
+    assert app.commits == 0
+    with app.app_context():
+        assert User.find_by_email('invalid@example.com') is None
+
+
+def test_commits_immediately_outside_requests(app):
+    with app.app_context():
+        User(email='cli@example.com', first_name='Cli', last_name='User', password_hash='x').save()
+        assert app.commits == 1
@@ -0,0 +1,86 @@
+import io
+import os
+import pytest
+from flask import Flask
+from app.services.file_service import FileService
+from app.utils.exceptions import BadRequestError, FileTooLargeError
+from app.utils.uploads import receive_upload
+
+BOUNDARY = 'testboundary'
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 32
+
+
+class CountingStream(io.BytesIO):
+    """Request body that records how much of it was read."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def multipart(filename, content, field='file'):
+    return (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"note\"\r\n\r\nhello\r\n"
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024
+    return app
+
+
+def upload(app, body, content_length=None, **limits):
+    stream = CountingStream(body)
+    with app.test_request_context(
+        '/upload', method='PUT', input_stream=stream,
+        content_type=f"multipart/form-data; boundary={BOUNDARY}",
+        environ_overrides={'CONTENT_LENGTH': str(content_length if content_length is not None else len(body))}
+    ):
+        try:
+            return receive_upload('file', allowed_extensions={'png', 'jpg'}, allowed_types={'png'}, **limits)
+        finally:
+            upload.bytes_read = stream.bytes_read
+
+
+def test_accepted_file_is_stored(app):
+    result = upload(app, multipart('me.png', PNG * 1000))
+    assert result.filename == 'me.png'
+    assert result.size == len(PNG) * 1000
+    with app.app_context():
+        with open(FileService.path_for(result.key), 'rb') as stored:
+            assert stored.read() == PNG * 1000
+
+
+def test_oversized_file_is_rejected_early(app):
+    body = multipart('big.png', PNG + b'\x00' * 5 * 1024 * 1024)
+    with pytest.raises(FileTooLargeError):
+        upload(app, body, max_bytes=100 * 1024)
+    # Reading stopped shortly after the limit, not at the end of the body
+    assert upload.bytes_read < 300 * 1024
+    assert not [name for name in os.listdir(app.config['UPLOAD_FOLDER']) if not name.startswith('.')]
+
+
+def test_declared_length_over_limit_reads_nothing(app):
+    with pytest.raises(FileTooLargeError):
+        upload(app, multipart('me.png', PNG), content_length=11 * 1024 * 1024)
+    assert upload.bytes_read == 0
+
+
+def test_disguised_and_disallowed_files_are_rejected(app):
+    with pytest.raises(BadRequestError):
+        upload(app, multipart('shell.php', PNG))
+    with pytest.raises(BadRequestError):
+        upload(app, multipart('photo.png', b'<?php system($_GET["c"]); ?>' + b' ' * 5 * 1024 * 1024))
+    assert upload.bytes_read < 300 * 1024
+    with pytest.raises(BadRequestError):
+        upload(app, multipart('photo.png', PNG, field='other'))
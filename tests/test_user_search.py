@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta
+import pytest
+from flask import Flask
+from sqlalchemy import update
+from app.db import db
+from app.models.user import User
+from app.services.search_service import NGramIndex, PrefixIndex, UserSearchService
+
+
+def make_doc(doc_id, email, first_name, last_name, created_at=0.0):
+    return {
+        'id': doc_id,
+        'email': email,
+        'first_name': first_name,
+        'last_name': last_name,
+        'created_at': created_at
+    }
+
+
+def test_search_matches_substrings_across_fields():
+    index = NGramIndex()
+    index.rebuild([
+        make_doc(1, 'jane.doe@x.com', 'jane', 'doe'),
+        make_doc(2, 'bob@x.com', 'bob', 'smith'),
+    ])
+
+    assert index.search('DOE') == [1]
+    assert index.search('jane doe') == [1]
+    assert index.search('smi') == [2]
+    assert index.search('nobody') == []
+
+
+def test_search_ranks_exact_and_prefix_matches_first():
+    index = NGramIndex()
+    index.rebuild([
+        make_doc(1, 'x@y.com', 'benjamin', 'ojanen', created_at=3.0),
+        make_doc(2, 'jan@y.com', 'jan', 'kowalski', created_at=1.0),
+        make_doc(3, 'a@y.com', 'janet', 'moss', created_at=2.0),
+    ])
+
+    assert index.search('jan') == [2, 3, 1]
+    assert index.search('jan', limit=1) == [2]
+
+
+def test_short_terms_fall_back_to_scanning():
+    index = NGramIndex()
+    index.rebuild([make_doc(1, 'al@x.com', 'al', 'b')])
+
+    assert index.search('al') == [1]
+
+
+def test_apply_updates_and_removes_documents():
+    index = NGramIndex()
+    index.rebuild([make_doc(1, 'old@x.com', 'old', 'name')])
+
+    index.apply({1: make_doc(1, 'new@x.com', 'new', 'name'), 2: make_doc(2, 'other@x.com', 'other', 'user')})
+    assert index.search('old') == []
+    assert index.search('new') == [1]
+
+    index.apply({2: None})
+    assert index.search('other') == []
+    assert len(index) == 1
+
+
+def test_prefix_index_matches_name_and_email_prefixes():
+    index = PrefixIndex()
+    index.rebuild([
+        make_doc(1, 'jane.doe@x.com', 'jane', 'doe'),
+        make_doc(2, 'bob@x.com', 'bob', 'janeway'),
+        make_doc(3, 'carol@x.com', 'carol', 'smith'),
+    ])
+
+    assert [doc['id'] for doc in index.search('JANE')] == [1, 2]
+    assert [doc['id'] for doc in index.search('doe j')] == [1]
+    assert [doc['id'] for doc in index.search('jane', limit=1)] == [1]
+    assert index.search('zz') == []
+
+
+def test_prefix_index_applies_changes():
+    index = PrefixIndex()
+    index.rebuild([make_doc(1, 'old@x.com', 'old', 'name')])
+
+    index.apply({1: make_doc(1, 'new@x.com', 'new', 'name')})
+    assert index.search('old') == []
+    assert [doc['id'] for doc in index.search('new')] == [1]
+
+    index.apply({1: None})
+    assert index.search('name') == []
+    assert len(index) == 0
+
+
+@pytest.fixture
+def search_app(monkeypatch):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['USER_SEARCH_BACKEND'] = 'ngram'
+    app.config['USER_SEARCH_REFRESH_SECONDS'] = 0
+    db.init_app(app)
+    UserSearchService.reset()
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.add(User(email='amina@x.com', first_name='Amina', last_name='Otieno', password_hash='x'))
+        db.session.commit()
+        yield app
+        db.session.remove()
+    UserSearchService.reset()
+
+
+def count_rebuilds(monkeypatch):
+    rebuilds = []
+    for name, index in UserSearchService._indexes.items():
+        original = index.rebuild
+        monkeypatch.setattr(index, 'rebuild', lambda docs, name=name, original=original: (rebuilds.append(name), original(docs)))
+    return rebuilds
+
+
+def test_logins_and_local_writes_do_not_rebuild(search_app, monkeypatch):
+    assert [s['email'] for s in UserSearchService.suggest('ami')] == ['amina@x.com']
+    rebuilds = count_rebuilds(monkeypatch)
+
+    user = User.find_by_email('amina@x.com')
+    user.updated_at = datetime.utcnow() + timedelta(seconds=1)  # what a login does
+    db.session.commit()
+    assert UserSearchService.suggest('ami')
+
+    # This worker's own change is applied in place and its signature kept in step
+    db.session.add(User(email='brian@x.com', first_name='Brian', last_name='Kamau', password_hash='x'))
+    db.session.commit()
+    assert [s['email'] for s in UserSearchService.suggest('bri')] == ['brian@x.com']
+    assert rebuilds == []
+
+
+def test_other_workers_changes_rebuild(search_app, monkeypatch):
+    UserSearchService.suggest('ami')
+    rebuilds = count_rebuilds(monkeypatch)
+
+    # Bulk SQL stands in for another worker: no listener in this process sees it
+    db.session.execute(
+        update(User).values(first_name='Zawadi', search_updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    assert [s['email'] for s in UserSearchService.suggest('zaw')] == ['amina@x.com']
+    assert rebuilds == ['prefix']
+
+
+def test_common_terms_beyond_the_candidate_cap_use_ilike(search_app):
+    search_app.config['USER_SEARCH_MAX_CANDIDATES'] = 2
+    for name in ('Amani', 'Amara', 'Amali'):
+        db.session.add(User(email=f"{name.lower()}@x.com", first_name=name, last_name='Wanjiku', password_hash='x'))
+    db.session.commit()
+
+    query = UserSearchService.apply(User.query, 'ama')
+    assert ' IN ' not in str(query.statement.compile())
+    assert sorted(user.email for user in query) == ['amali@x.com', 'amani@x.com', 'amara@x.com']
+
+    # Under the cap the ranked id list is still used
+    assert [user.email for user in UserSearchService.apply(User.query, 'amar')] == ['amara@x.com']
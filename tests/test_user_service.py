@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+import time
+import pytest
+from flask import Flask
+from app.db import db
+from app.models.user import User
+from app.services.user_service import UserService, invalidate_user_stats
+from app.utils import cache
+from app.utils.exceptions import BadRequestError
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        now = datetime.utcnow()
+        for i, (age_days, active) in enumerate([(0, True), (2, True), (2, False), (45, True)]):
+            db.session.add(User(email=f"user{i}@example.com", first_name='Njeri', last_name=f"Kariuki{i}",
+                                password_hash='x', is_active=active, created_at=now - timedelta(days=age_days)))
+        db.session.commit()
+        invalidate_user_stats()
+        yield app
+        db.session.remove()
+
+
+def test_user_stats_aggregate(app):
+    stats = UserService(db.session).get_user_stats(days=7)
+    assert (stats['total_users'], stats['active_users'], stats['inactive_users']) == (4, 3, 1)
+    assert stats['recent_registrations'] == 3
+
+    series = stats['registrations_by_day']
+    assert len(series) == 8
+    today = datetime.utcnow().date()
+    assert series[-1] == {'date': today.isoformat(), 'count': 1}
+    assert series[-3] == {'date': (today - timedelta(days=2)).isoformat(), 'count': 2}
+    assert sum(day['count'] for day in series) == 3
+
+
+def test_user_stats_are_cached_until_expiry_or_invalidation(app, monkeypatch):
+    service = UserService(db.session, stats_cache_ttl=60)
+    first = service.get_user_stats()
+    db.session.add(User(email='new@example.com', first_name='New', last_name='User', password_hash='x'))
+    db.session.commit()
+    assert service.get_user_stats() is first
+
+    # A minute later the snapshot has expired
+    later = time.monotonic() + 61
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: later)
+    assert service.get_user_stats()['total_users'] == 5
+
+    monkeypatch.undo()
+    db.session.add(User(email='newer@example.com', first_name='Newer', last_name='User', password_hash='x'))
+    db.session.commit()
+    invalidate_user_stats()
+    assert service.get_user_stats()['total_users'] == 6
+
+
+def test_bulk_update_runs_one_update_per_chunk(app):
+    ids = [user.id for user in User.query.order_by(User.id)]
+    service = UserService(db.session)
+    stats = service.get_user_stats()
+
+    # Duplicates are updated once and unknown ids count for nothing
+    result = service.bulk_update_users(ids + [ids[0], 999], {'is_active': False}, chunk_size=2)
+    assert result['updated_count'] == 4
+    assert result['total_requested'] == 6
+    assert result['chunk_counts'] == [2, 2, 0]
+    assert User.query.filter_by(is_active=True).count() == 0
+    # Cached snapshots derived from users were dropped
+    assert service.get_user_stats() is not stats
+
+
+def test_bulk_update_rejects_other_fields(app):
+    service = UserService(db.session)
+    with pytest.raises(BadRequestError, match='is_admin'):
+        service.bulk_update_users([1], {'is_active': True, 'is_admin': True})
+    assert User.query.filter_by(is_admin=True).count() == 0
+
+    assert service.bulk_update_users([1], {'first_name': 'Wambui'})['chunk_counts'] == [1]
+    assert db.session.get(User, 1).first_name == 'Wambui'